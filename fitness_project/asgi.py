@@ -2,6 +2,10 @@
 ASGI config for fitness_project project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+The views are synchronous; Django runs them in a worker thread. Serve it with
+an ASGI server, e.g.
+
+    gunicorn fitness_project.asgi:application -k uvicorn.workers.UvicornWorker
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 import dj_database_url
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,12 +44,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover every other middleware; off unless REQUEST_METRICS=True
+    'tracker.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Django's AuthenticationMiddleware plus the optional user cache (AUTH_USER_CACHE)
+    'tracker.middleware.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -84,6 +88,45 @@ DATABASES = {
 }
 
 
+# Cache
+# Per-user pages are cached against a data version (see tracker/caching.py).
+# Local memory is private to each process, so production defaults to a
+# file-based cache that every worker on the host shares. Point CACHE_BACKEND /
+# CACHE_LOCATION at Redis or Memcached when running on several hosts.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache' if DEBUG
+            else 'django.core.cache.backends.filebased.FileBasedCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', os.path.join(tempfile.gettempdir(), 'fitness-tracker-cache')),
+    }
+}
+
+# Seconds a cached per-user page lives if the user's data does not change
+TRACKER_CACHE_TIMEOUT = int(os.environ.get('TRACKER_CACHE_TIMEOUT', 60 * 60 * 24))
+
+
+# Sessions
+# Production reads sessions from the cache above and only falls back to the
+# database on a miss. SESSION_ENGINE=django.contrib.sessions.backends.signed_cookies
+# keeps them in the browser instead, with no server-side storage at all.
+SESSION_ENGINE = os.environ.get(
+    'SESSION_ENGINE',
+    'django.contrib.sessions.backends.db' if DEBUG else 'django.contrib.sessions.backends.cached_db'
+)
+
+# Authenticated user cache (see tracker/users.py), on unless DEBUG is set
+# Each process keeps request.user and its profile for this many seconds
+# instead of querying them on every request. Saves and deletes invalidate
+# them at once; QuerySet.update() on users does not, so a deactivation
+# made that way takes effect after at most AUTH_USER_CACHE_SECONDS.
+AUTH_USER_CACHE = os.environ.get('AUTH_USER_CACHE', str(not DEBUG)) == 'True'
+AUTH_USER_CACHE_SECONDS = int(os.environ.get('AUTH_USER_CACHE_SECONDS', 60))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -120,7 +163,17 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# Hashed file names plus pre-built gzip and (with Brotli installed) brotli
+# copies; WhiteNoise serves hashed files with far-future cache headers.
+# Third-party CSS, JS and fonts are vendored under tracker/static/tracker/vendor.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
 
 # Media files
 MEDIA_URL = '/media/'
@@ -129,4 +182,54 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Food catalog
+# Seconds between checks of the shared catalog version by each process
+CATALOG_VERSION_CHECK_SECONDS = int(os.environ.get('CATALOG_VERSION_CHECK_SECONDS', 30))
+
+# Delta sync (see tracker/sync.py)
+# Changes younger than this are held back so a slow transaction that got a
+# lower change id cannot commit behind a client's sync token
+SYNC_SETTLE_SECONDS = int(os.environ.get('SYNC_SETTLE_SECONDS', 2))
+
+# Background jobs (see tracker/jobs.py and the run_jobs command)
+# Base delay before the first retry; it doubles with every further attempt
+JOB_BACKOFF_SECONDS = int(os.environ.get('JOB_BACKOFF_SECONDS', 30))
+# A job still running after this long is assumed lost and is queued again
+JOB_TIMEOUT_SECONDS = int(os.environ.get('JOB_TIMEOUT_SECONDS', 60 * 60))
+# Set to True where a `python manage.py run_jobs` process runs next to the
+# web server. build.sh deploys none, so by default each job runs in a
+# thread of the web process that queued it.
+JOB_WORKER = os.environ.get('JOB_WORKER', 'False') == 'True'
+# Where background exports are written, and how long run_jobs keeps them
+# for download before deleting them
+EXPORT_ROOT = os.environ.get('EXPORT_ROOT', os.path.join(MEDIA_ROOT, 'exports'))
+EXPORT_MAX_AGE_SECONDS = int(os.environ.get('EXPORT_MAX_AGE_SECONDS', 60 * 60 * 24))
+
+# Archive (see tracker/archive.py and the archive_entries command)
+# Entries dated more than this many days ago are moved to compressed chunks
+ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', 365))
+
+# Conditional GET (see tracker/conditional.py)
+# Identifies the deployed code; part of every page ETag, so browsers drop
+# pages rendered by older templates. Render sets RENDER_GIT_COMMIT.
+RELEASE = os.environ.get('RELEASE', os.environ.get('RENDER_GIT_COMMIT', ''))
+
+# Request metrics (see tracker/middleware.py)
+# Opt-in: adds Server-Timing headers, logs slow requests and keeps per-URL
+# percentiles for the staff metrics page
+REQUEST_METRICS_ENABLED = os.environ.get('REQUEST_METRICS', 'False') == 'True'
+REQUEST_METRICS_SLOW_MS = int(os.environ.get('REQUEST_METRICS_SLOW_MS', 500))
+REQUEST_METRICS_SAMPLES = int(os.environ.get('REQUEST_METRICS_SAMPLES', 1000))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'tracker.requests': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+    },
+}
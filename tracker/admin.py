@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import UserProfile, Workout, Meal
+from .models import (UserProfile, Workout, Meal, DailySummary, FoodCatalog, Job, ArchiveChunk, Exercise,
+                     ExerciseAlias, PersonalRecord)
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
@@ -10,13 +11,62 @@ class UserProfileAdmin(admin.ModelAdmin):
 @admin.register(Workout)
 class WorkoutAdmin(admin.ModelAdmin):
     list_display = ['user', 'exercise_name', 'sets', 'reps', 'calories_burned', 'date', 'created_at']
-    list_filter = ['date', 'exercise_name']
+    list_filter = ['date', 'exercise']
     search_fields = ['user__username', 'exercise_name']
     date_hierarchy = 'date'
+    readonly_fields = ['exercise']
+
+class ExerciseAliasInline(admin.TabularInline):
+    model = ExerciseAlias
+    extra = 1
+
+@admin.register(Exercise)
+class ExerciseAdmin(admin.ModelAdmin):
+    list_display = ['name', 'category', 'met', 'created_at']
+    list_filter = ['category']
+    search_fields = ['name', 'aliases__alias']
+    inlines = [ExerciseAliasInline]
+
+@admin.register(PersonalRecord)
+class PersonalRecordAdmin(admin.ModelAdmin):
+    list_display = ['user', 'exercise', 'max_weight', 'best_one_rep_max', 'total_volume', 'workout_count', 'last_performed']
+    search_fields = ['user__username', 'exercise__name']
+    readonly_fields = ['user', 'exercise', 'max_weight', 'best_one_rep_max', 'total_volume', 'workout_count',
+                       'last_performed', 'updated_at']
 
 @admin.register(Meal)
 class MealAdmin(admin.ModelAdmin):
     list_display = ['user', 'food_name', 'meal_type', 'calories', 'protein', 'carbs', 'fats', 'date', 'created_at']
     list_filter = ['date', 'meal_type']
     search_fields = ['user__username', 'food_name']
-    date_hierarchy = 'date'
\ No newline at end of file
+    date_hierarchy = 'date'
+    raw_id_fields = ['food']
+
+@admin.register(FoodCatalog)
+class FoodCatalogAdmin(admin.ModelAdmin):
+    list_display = ['name', 'meal_type', 'calories', 'protein', 'carbs', 'fats', 'updated_at']
+    list_filter = ['meal_type']
+    search_fields = ['name']
+
+@admin.register(DailySummary)
+class DailySummaryAdmin(admin.ModelAdmin):
+    list_display = ['user', 'date', 'calories_burned', 'calories_consumed', 'workout_count', 'meal_count', 'updated_at']
+    search_fields = ['user__username']
+    date_hierarchy = 'date'
+    readonly_fields = ['user', 'date', 'calories_burned', 'calories_consumed', 'protein', 'carbs', 'fats',
+                       'workout_count', 'meal_count', 'updated_at']
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'user', 'status', 'attempts', 'run_after', 'created_at', 'finished_at']
+    list_filter = ['status', 'name']
+    search_fields = ['user__username', 'name']
+    readonly_fields = ['attempts', 'locked_by', 'result', 'error', 'created_at', 'started_at', 'finished_at']
+
+@admin.register(ArchiveChunk)
+class ArchiveChunkAdmin(admin.ModelAdmin):
+    list_display = ['user', 'kind', 'year', 'row_count', 'first_date', 'last_date', 'updated_at']
+    list_filter = ['kind', 'year']
+    search_fields = ['user__username']
+    exclude = ['data']
+    readonly_fields = ['user', 'kind', 'year', 'row_count', 'first_date', 'last_date', 'exercise_totals', 'updated_at']
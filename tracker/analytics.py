@@ -0,0 +1,229 @@
+"""
+Trend analytics over a user's whole daily history.
+
+The DailySummary rollups are loaded with one query into NumPy arrays that
+have one slot per calendar day, so days without entries are zeros. Rolling
+averages are then differences of cumulative sums, streaks are run lengths
+and the weight projection is a closed-form curve: every statistic costs a
+few array passes however many years of history there are.
+
+Intake is averaged over days with logged meals and burn over days with any
+entries, the same convention as the recommendations' weekly stats.
+"""
+from datetime import date, timedelta
+
+import numpy as np
+
+from .caching import cached_for_user
+from .models import DailySummary
+from .users import get_profile
+
+WINDOWS = (7, 28)
+# Days of rolling averages sent to the progress chart
+CHART_DAYS = 90
+# Energy stored in a kilogram of body weight
+KCAL_PER_KG = 7700
+# Mifflin-St Jeor without the sex term (its male and female constants averaged),
+# times the sedentary activity factor; logged workouts are added on top
+ACTIVITY_FACTOR = 1.2
+PROJECTION_DAYS = 90
+
+
+class History:
+    """A user's daily totals as aligned arrays, oldest day first"""
+
+    def __init__(self, rows, today):
+        self.today = today
+        first = rows[0][0] if rows else today
+        self.start = min(first, today)
+        self.length = (today - self.start).days + 1
+        self.intake = np.zeros(self.length)
+        self.burn = np.zeros(self.length)
+        self.workouts = np.zeros(self.length, dtype=np.int64)
+        self.meals = np.zeros(self.length, dtype=np.int64)
+        if rows:
+            days, intake, burn, workouts, meals = zip(*rows)
+            offsets = (np.array(days, dtype='datetime64[D]') - np.datetime64(self.start, 'D')).astype(np.int64)
+            self.intake[offsets] = intake
+            self.burn[offsets] = burn
+            self.workouts[offsets] = workouts
+            self.meals[offsets] = meals
+        self.meal_days = self.meals > 0
+        self.active_days = self.meal_days | (self.workouts > 0)
+
+    def dates(self, last):
+        """ISO dates of the last ``last`` days"""
+        count = min(last, self.length)
+        return [(self.today - timedelta(days=offset)).isoformat() for offset in range(count - 1, -1, -1)]
+
+
+def history_queryset(user, today):
+    """The rows summarize() expects, oldest first"""
+    return DailySummary.objects.filter(user=user, date__lte=today).order_by('date').values_list(
+        'date', 'calories_consumed', 'calories_burned', 'workout_count', 'meal_count',
+    )
+
+
+def window_sums(values, window):
+    """Sum of each day's trailing ``window`` days (fewer at the start)"""
+    totals = np.cumsum(values, dtype=float)
+    totals[window:] -= totals[:-window].copy()
+    return totals
+
+
+def rolling_mean(values, counted, window):
+    """Trailing mean of ``values`` over the days flagged in ``counted``; 0 where none are"""
+    sums = window_sums(np.where(counted, values, 0), window)
+    counts = window_sums(counted, window)
+    return np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+
+
+def run_lengths(flags):
+    """(starts, lengths) of every run of True in a boolean array"""
+    edges = np.diff(np.concatenate(([0], flags.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    return starts, np.flatnonzero(edges == -1) - starts
+
+
+def streaks(flags):
+    """
+    (current, longest) run of flagged days. The current streak may end
+    yesterday, since today can still be logged.
+    """
+    starts, lengths = run_lengths(flags)
+    if not len(lengths):
+        return 0, 0
+    end = starts[-1] + lengths[-1]
+    current = int(lengths[-1]) if end >= len(flags) - 1 else 0
+    return current, int(lengths.max())
+
+
+def _rolling(history):
+    averages = {}
+    for window in WINDOWS:
+        intake = rolling_mean(history.intake, history.meal_days, window)
+        burn = rolling_mean(history.burn, history.active_days, window)
+        averages[window] = {'intake': intake, 'burn': burn, 'net': intake - burn}
+    return averages
+
+
+def _week_over_week(history):
+    """This week (the last 7 days) against the 7 days before it"""
+    def week(end):
+        span = slice(max(end - 7, 0), end)
+        meal_days = history.meal_days[span]
+        active_days = history.active_days[span]
+        intake = float(history.intake[span][meal_days].mean()) if meal_days.any() else 0.0
+        burn = float(history.burn[span][active_days].mean()) if active_days.any() else 0.0
+        return {
+            'intake': intake,
+            'burn': burn,
+            'net': intake - burn,
+            'workouts': int(history.workouts[span].sum()),
+        }
+
+    current, previous = week(history.length), week(history.length - 7)
+    labels = [
+        ('intake', 'Calories in / day'),
+        ('burn', 'Calories burned / day'),
+        ('net', 'Net balance / day'),
+        ('workouts', 'Workouts'),
+    ]
+    return [
+        {
+            'key': key,
+            'label': label,
+            'current': round(current[key]),
+            'previous': round(previous[key]),
+            'delta': round(current[key] - previous[key]),
+            'percent': round((current[key] - previous[key]) / abs(previous[key]) * 100) if previous[key] else None,
+        }
+        for key, label in labels
+    ]
+
+
+def maintenance_calories(weight, height, age):
+    """Daily calories to hold ``weight`` (kg) before exercise"""
+    return (10 * weight + 6.25 * height - 5 * age - 78) * ACTIVITY_FACTOR
+
+
+def project_weight(weight, height, age, intake, burn, days=PROJECTION_DAYS):
+    """
+    Expected weight for each of the next ``days`` days if intake and burn
+    stay as they are. Maintenance falls as weight does, so the balance
+    shrinks over time: w(t) = w0 + B0 / k * (1 - exp(-k t / 7700)), where
+    B0 is today's balance and k the maintenance cost of one kg per day.
+    """
+    balance = intake - burn - maintenance_calories(weight, height, age)
+    per_kg = 10 * ACTIVITY_FACTOR
+    elapsed = np.arange(1, days + 1)
+    return balance, weight + balance / per_kg * (1 - np.exp(-per_kg * elapsed / KCAL_PER_KG))
+
+
+def _projection(history, profile, rolling):
+    if not (profile and profile.weight and profile.height and profile.age):
+        return None
+    # Intake guesses from a few logged days would swing the curve wildly
+    if history.meal_days[-WINDOWS[-1]:].sum() < 3:
+        return None
+    intake = rolling[WINDOWS[-1]]['intake'][-1]
+    burn = rolling[WINDOWS[-1]]['burn'][-1]
+    balance, weights = project_weight(profile.weight, profile.height, profile.age, float(intake), float(burn))
+    weekly = np.arange(6, PROJECTION_DAYS, 7)
+    return {
+        'start_weight': round(profile.weight, 1),
+        'maintenance': round(maintenance_calories(profile.weight, profile.height, profile.age)),
+        'balance': round(balance),
+        'dates': [(history.today + timedelta(days=int(offset) + 1)).isoformat() for offset in weekly],
+        'weights': np.round(weights[weekly], 1).tolist(),
+        'in_30_days': round(float(weights[29]), 1),
+        'in_90_days': round(float(weights[-1]), 1),
+        'change_90_days': round(float(weights[-1]) - profile.weight, 1),
+    }
+
+
+def summarize(rows, profile, today):
+    """All trend statistics from history_queryset() rows and the user's profile"""
+    history = History(rows, today)
+    rolling = _rolling(history)
+    workout_current, workout_longest = streaks(history.workouts > 0)
+    logging_current, logging_longest = streaks(history.active_days)
+
+    chart_days = min(CHART_DAYS, history.length)
+    chart = {'dates': history.dates(chart_days)}
+    for window, series in rolling.items():
+        for name, values in series.items():
+            chart[f'{name}_{window}'] = np.round(values[-chart_days:]).astype(int).tolist()
+
+    return {
+        'has_data': bool(rows),
+        'rolling': chart,
+        'latest': {
+            f'{name}_{window}': round(float(values[-1]))
+            for window, series in rolling.items() for name, values in series.items()
+        },
+        'streaks': {
+            'workout_current': workout_current,
+            'workout_longest': workout_longest,
+            'logging_current': logging_current,
+            'logging_longest': logging_longest,
+        },
+        'week_over_week': _week_over_week(history),
+        'projection': _projection(history, profile, rolling),
+    }
+
+
+def trends(user, today=None):
+    """
+    Rolling averages, streaks, week-over-week deltas and a weight projection
+    for the user, from one query over the summaries plus the profile
+    """
+    today = today or date.today()
+    profile = get_profile(user)
+    return summarize(list(history_queryset(user, today)), profile, today)
+
+
+def get_trends(user):
+    """Cached trends; the key includes today since every window moves daily"""
+    today = date.today()
+    return cached_for_user(user.pk, 'trends', lambda: trends(user, today), today)
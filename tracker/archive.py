@@ -0,0 +1,183 @@
+"""
+Cold storage for old workouts and meals.
+
+The archive_entries command moves rows older than a horizon out of the
+Workout and Meal tables into one ArchiveChunk per user, kind and year.
+Each chunk stores its rows as columns, JSON-encoded and zlib-compressed.
+The helpers here read those chunks back so the lists, exports, summary
+rebuilds and delta sync see archived entries as if they had never moved.
+DailySummary rows are left alone, so progress charts and recommendations
+need no changes at all.
+"""
+import json
+import threading
+import zlib
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import ArchiveChunk, Meal, Workout
+
+MODELS = {'workout': Workout, 'meal': Meal}
+# Every concrete column except the owner, which the chunk itself records
+FIELDS = {
+    kind: [field.attname for field in model._meta.concrete_fields if field.attname != 'user_id']
+    for kind, model in MODELS.items()
+}
+
+
+def sort_key(row):
+    """Oldest first; the same order as the lists' keyset, reversed"""
+    return row['date'], row['created_at'], row['id']
+
+
+class _Encoder(DjangoJSONEncoder):
+    """Keeps the microseconds that DjangoJSONEncoder rounds away; keyset order needs them"""
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode(kind, rows):
+    """Pack row dicts into the compressed column format"""
+    columns = [[row[name] for row in rows] for name in FIELDS[kind]]
+    return zlib.compress(json.dumps(
+        {'fields': FIELDS[kind], 'columns': columns}, cls=_Encoder, separators=(',', ':')
+    ).encode(), 9)
+
+
+# Recently decoded chunks, keyed by (pk, updated_at) so rewrites miss
+DECODED_CACHE_SIZE = 16
+_decoded = OrderedDict()
+_lock = threading.Lock()
+
+
+def _decode(kind, data):
+    packed = json.loads(zlib.decompress(data))
+    model = MODELS[kind]
+    columns = [
+        [model._meta.get_field(name).to_python(value) if value is not None else None for value in column]
+        for name, column in zip(packed['fields'], packed['columns'])
+    ]
+    return tuple(dict(zip(packed['fields'], values)) for values in zip(*columns))
+
+
+def decode(chunk):
+    """The chunk's rows as dicts of Python values, oldest first. Do not modify them."""
+    key = (chunk.pk, chunk.updated_at)
+    with _lock:
+        if key in _decoded:
+            _decoded.move_to_end(key)
+            return _decoded[key]
+    rows = _decode(chunk.kind, bytes(chunk.data))
+    with _lock:
+        _decoded[key] = rows
+        while len(_decoded) > DECODED_CACHE_SIZE:
+            _decoded.popitem(last=False)
+    return rows
+
+
+def chunks(user_ids, kind, years=None, start=None, end=None):
+    """Chunks of the given users (None for everyone) overlapping the date range"""
+    queryset = ArchiveChunk.objects.filter(kind=kind)
+    if user_ids is not None:
+        queryset = queryset.filter(user_id__in=user_ids)
+    if years is not None:
+        queryset = queryset.filter(year__in=years)
+    if start is not None:
+        queryset = queryset.filter(last_date__gte=start)
+    if end is not None:
+        queryset = queryset.filter(first_date__lte=end)
+    return queryset
+
+
+def archived_rows(user_id, kind, start=None, end=None):
+    """
+    Yield a user's archived row dicts between ``start`` and ``end``, oldest
+    first. With ``user_id=None`` every user's rows are yielded, chunk by
+    chunk, with a ``user_id`` key added.
+    """
+    queryset = chunks(None if user_id is None else [user_id], kind, start=start, end=end)
+    for chunk in queryset.order_by('user_id', 'year'):
+        for row in decode(chunk):
+            if (start is None or row['date'] >= start) and (end is None or row['date'] <= end):
+                yield {**row, 'user_id': chunk.user_id} if user_id is None else row
+
+
+def entries_after(user_id, kind, key=None, limit=20, newer_than=None):
+    """
+    Up to ``limit`` archived entries of the user that sort after ``key`` in
+    the lists' newest-first order, as unsaved model instances flagged
+    ``archived``. Chunks entirely older than ``newer_than`` are skipped,
+    since they cannot interleave with a full page of hot rows.
+    """
+    queryset = chunks([user_id], kind)
+    if key is not None:
+        queryset = queryset.filter(first_date__lte=key[0])
+    if newer_than is not None:
+        queryset = queryset.filter(last_date__gte=newer_than)
+
+    found = []
+    for chunk in queryset.order_by('-year'):
+        rows = decode(chunk)
+        if key is not None:
+            rows = [row for row in rows if sort_key(row) < key]
+        found.extend(rows[-limit:])
+        # Every row in an older chunk sorts after these
+        if len(found) >= limit:
+            break
+
+    found.sort(key=sort_key, reverse=True)
+    entries = []
+    for row in found[:limit]:
+        entry = MODELS[kind](user_id=user_id, **row)
+        entry.archived = True
+        entries.append(entry)
+    return entries
+
+
+def find_entries(user_id, kind, ids):
+    """{id: row dict} for archived entries of the user with the given ids"""
+    wanted = set(ids)
+    found = {}
+    for chunk in chunks([user_id], kind):
+        for row in decode(chunk):
+            if row['id'] in wanted:
+                found[row['id']] = row
+    return found
+
+
+def archived_exercise_ids():
+    """Ids of the exercises archived workouts point at, from the chunks' stored totals"""
+    ids = set()
+    for totals in ArchiveChunk.objects.filter(kind='workout').values_list('exercise_totals', flat=True):
+        ids.update(int(exercise_id) for exercise_id in totals)
+    return ids
+
+
+def archived_day_totals(user_ids, dates=None):
+    """
+    {(user_id, date): totals} over archived entries, in the same shape as
+    the rollups' per-day aggregates
+    """
+    totals = defaultdict(lambda: defaultdict(int))
+    years = None if dates is None else {day.year for day in dates}
+    for kind in MODELS:
+        for chunk in chunks(user_ids, kind, years=years):
+            for row in decode(chunk):
+                if dates is not None and row['date'] not in dates:
+                    continue
+                day = totals[(chunk.user_id, row['date'])]
+                if kind == 'workout':
+                    day['calories_burned'] += row['calories_burned'] or 0
+                    day['workout_count'] += 1
+                else:
+                    day['calories_consumed'] += row['calories'] or 0
+                    day['protein'] += row['protein'] or 0
+                    day['carbs'] += row['carbs'] or 0
+                    day['fats'] += row['fats'] or 0
+                    day['meal_count'] += 1
+    return totals
@@ -0,0 +1,252 @@
+"""
+Helpers for validating and inserting (or rewriting) many workouts or meals
+at once.
+
+Rows are validated with the field definitions of the same forms the web UI
+uses, then written with bulk_create. Derived data is updated once per batch
+through the entries_bulk_changed signal instead of once per row. Bulk edits
+and deletes of a user's selected entries work the same way, with a single
+UPDATE or DELETE.
+"""
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .calories import DEFAULT_MET, DEFAULT_WEIGHT_KG, apply_estimates, body_weights, estimate, met_table
+from .exercises import assign_exercises, resolve
+from .forms import MealForm, WorkoutForm
+from .models import FoodCatalog, Meal, Workout
+from .signals import entries_bulk_changed, suppress_entry_signals
+
+FORMS = {'workout': WorkoutForm, 'meal': MealForm}
+MODELS = {'workout': Workout, 'meal': Meal}
+MAX_BATCH = 500
+# Fields the list pages can set on many selected entries at once
+EDIT_FIELDS = {'workout': ['exercise_name', 'date'], 'meal': ['meal_type', 'date']}
+CLIENT_ID_LENGTH = Workout._meta.get_field('client_id').max_length
+
+
+def build_entry(kind, data, user_id, foods=None):
+    """
+    Validate ``data`` with the form fields for ``kind``.
+    Returns (unsaved instance, None) or (None, {field: [messages]}).
+
+    The form's fields are used directly rather than binding a new form per
+    row, which spends most of its time deep-copying field definitions.
+    ``foods`` ({pk: FoodCatalog}, see load_foods) replaces the food field's
+    query per row.
+    """
+    cleaned = {}
+    errors = {}
+    for name, field in FORMS[kind].base_fields.items():
+        value = field.widget.value_from_datadict(data, {}, name)
+        try:
+            if name == 'food' and foods is not None and value not in field.empty_values:
+                cleaned[name] = _food(field, value, foods)
+            else:
+                cleaned[name] = field.clean(value)
+        except ValidationError as exc:
+            errors[name] = exc.messages
+    if errors:
+        return None, errors
+    return MODELS[kind](user_id=user_id, **cleaned), None
+
+
+def load_foods(items):
+    """{pk: FoodCatalog} of the foods the meal ``items`` refer to, in one query"""
+    ids = set()
+    for item in items:
+        if isinstance(item, dict) and item.get('kind') == 'meal':
+            try:
+                ids.add(int(item['food']))
+            except (KeyError, TypeError, ValueError):
+                pass
+    return FoodCatalog.objects.in_bulk(ids) if ids else {}
+
+
+def _food(field, value, foods):
+    """The food field's clean(), looked up in ``foods``"""
+    try:
+        return foods[int(value)]
+    except (KeyError, TypeError, ValueError):
+        raise ValidationError(field.error_messages['invalid_choice'], code='invalid_choice', params={'value': value})
+
+
+def insert_entries(model, entries, batch_size=None):
+    """bulk_create ``entries`` and refresh derived data for them in one pass"""
+    if model is Workout:
+        assign_exercises(entries)
+        apply_estimates(entries)
+    created = model.objects.bulk_create(entries, batch_size=batch_size)
+    entries_bulk_changed.send(
+        sender=model,
+        entries=[(entry.pk, entry.user_id, entry.date) for entry in created],
+        action='create',
+    )
+    return created
+
+
+def _existing_ids(user_id, kind, client_ids):
+    """{client_id: pk} of the user's already stored entries with these keys"""
+    if not client_ids:
+        return {}
+    return dict(
+        MODELS[kind].objects.filter(user_id=user_id, client_id__in=client_ids).values_list('client_id', 'pk')
+    )
+
+
+def save_batch(user_id, items):
+    """
+    Validate and store a batch of API items, each a dict with a ``kind`` and
+    the form fields plus an optional ``client_id``. Valid items are stored
+    even when others are rejected. Returns one result dict per item, in order.
+
+    An item whose client_id is already stored (by an earlier upload or earlier
+    in the same batch) is reported as a duplicate of that entry instead of
+    being inserted again, so clients can safely retry whole uploads.
+    """
+    results = [None] * len(items)
+    pending = {kind: [] for kind in MODELS}
+    foods = load_foods(items)
+
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[index] = {'index': index, 'status': 'invalid', 'errors': {'__all__': ['Expected an object']}}
+            continue
+        kind = item.get('kind')
+        client_id = item.get('client_id')
+        result = {'index': index, 'kind': kind, 'client_id': client_id}
+        results[index] = result
+
+        if kind not in MODELS:
+            result.update(status='invalid', errors={'kind': [f"Must be one of: {', '.join(sorted(MODELS))}"]})
+            continue
+        if client_id is not None and not (isinstance(client_id, str) and 0 < len(client_id) <= CLIENT_ID_LENGTH):
+            result.update(status='invalid',
+                          errors={'client_id': [f'Must be a string of 1-{CLIENT_ID_LENGTH} characters']})
+            continue
+
+        entry, errors = build_entry(kind, item, user_id, foods)
+        if errors:
+            result.update(status='invalid', errors=errors)
+            continue
+        entry.client_id = client_id
+        pending[kind].append((result, entry))
+
+    # A concurrent retry of the same upload can insert a key between the
+    # lookup and the insert; the unique constraint catches it and the next
+    # attempt reports those items as duplicates.
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                _insert_pending(user_id, pending)
+            break
+        except IntegrityError:
+            if attempt:
+                raise
+            # The rolled back insert left its ids on the instances
+            for items in pending.values():
+                for _, entry in items:
+                    entry.pk = None
+                    entry._state.adding = True
+    return results
+
+
+def _insert_pending(user_id, pending):
+    for kind, items in pending.items():
+        existing = _existing_ids(user_id, kind, [entry.client_id for _, entry in items if entry.client_id])
+        new = []
+        batch_keys = {}
+        for result, entry in items:
+            key = entry.client_id
+            if key in existing:
+                result.update(status='duplicate', id=existing[key])
+            elif key is not None and key in batch_keys:
+                batch_keys[key].append(result)
+            else:
+                if key is not None:
+                    batch_keys[key] = []
+                result['status'] = 'created'
+                new.append((result, entry))
+        if not new:
+            continue
+
+        created = insert_entries(MODELS[kind], [entry for _, entry in new])
+        for (result, _), entry in zip(new, created):
+            result['id'] = entry.pk
+            for repeat in batch_keys.get(entry.client_id, ()):
+                repeat.update(status='duplicate', id=entry.pk)
+
+
+def clean_edit(kind, data):
+    """
+    Validate the bulk edit fields filled in ``data``, with the same form
+    fields as build_entry. Blank fields are left unchanged.
+    Returns ({field: value}, {field: [messages]}).
+    """
+    changes = {}
+    errors = {}
+    for name in EDIT_FIELDS[kind]:
+        field = FORMS[kind].base_fields[name]
+        value = field.widget.value_from_datadict(data, {}, name)
+        if value in field.empty_values:
+            continue
+        try:
+            changes[name] = field.clean(value)
+        except ValidationError as exc:
+            errors[name] = exc.messages
+    return changes, errors
+
+
+def delete_entries(model, user_id, pks):
+    """
+    Delete the user's entries among ``pks`` with one DELETE and refresh
+    derived data once. Returns the ids that were deleted.
+    """
+    entries = model.objects.filter(user_id=user_id, pk__in=pks)
+    with transaction.atomic():
+        rows = list(entries.values_list('pk', 'user_id', 'date'))
+        if not rows:
+            return []
+        with suppress_entry_signals():
+            entries.delete()
+        entries_bulk_changed.send(sender=model, entries=rows, action='delete')
+    return [pk for pk, _, _ in rows]
+
+
+def update_entries(model, user_id, pks, changes):
+    """
+    Set ``changes`` ({field: value}) on the user's entries among ``pks`` with
+    one UPDATE and refresh derived data once. Returns the ids that were updated.
+    """
+    changes = dict(changes)
+    if model is Workout and 'exercise_name' in changes:
+        changes['exercise_id'] = resolve([changes['exercise_name']])[changes['exercise_name']]
+    entries = model.objects.filter(user_id=user_id, pk__in=pks)
+    with transaction.atomic():
+        rows = list(entries.values_list('pk', 'user_id', 'date'))
+        if not rows:
+            return []
+        now = timezone.now()
+        entries.update(updated_at=now, **changes)
+        fields = list(changes)
+        if 'exercise_id' in changes:
+            # The new exercise may have another MET; typed-in calories stay
+            _reestimate(entries.filter(calories_estimated=True), user_id, changes['exercise_id'], now)
+            fields.append('calories_burned')
+        # Entries moved to another day change both days' summaries
+        moved = [(pk, owner, changes['date']) for pk, owner, day in rows if day != changes.get('date', day)]
+        entries_bulk_changed.send(sender=model, entries=rows + moved, action='update', fields=fields)
+    return [pk for pk, _, _ in rows]
+
+
+def _reestimate(workouts, user_id, exercise_id, now):
+    """
+    Redo the estimated calories of one user's workouts that all have
+    ``exercise_id`` now; only the duration differs, so one UPDATE per duration
+    """
+    met = met_table({exercise_id}).get(exercise_id, DEFAULT_MET)
+    weight = body_weights([user_id]).get(user_id, DEFAULT_WEIGHT_KG)
+    durations = sorted(set(workouts.values_list('duration', flat=True)))
+    for duration, calories in zip(durations, estimate(met, weight, durations).tolist()):
+        workouts.filter(duration=duration).update(calories_burned=calories, updated_at=now)
@@ -0,0 +1,67 @@
+"""
+Per-user versioned cache.
+
+Every user has a data version stored in the cache. Cached values for that
+user include the version in their key, so bumping it whenever the user's
+workouts, meals or profile change makes all earlier entries unreachable at
+once; they simply expire. Works with any Django cache backend, including
+local-memory and file-based ones. auser_version is the async equivalent
+of user_version, for tracker.users.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+VERSION_KEY = 'tracker:version:{}'
+ENTRY_KEY = 'tracker:{}:{}:{}:{}'
+
+
+def _timeout():
+    return getattr(settings, 'TRACKER_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def _clock_version():
+    return time.time_ns() // 1000
+
+
+def user_version(user_id):
+    """
+    The user's current data version. Versions are microsecond timestamps of
+    the last write, so a version lost from the cache is replaced by a newer one.
+    """
+    key = VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _clock_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_user_version(user_id):
+    """Invalidate everything cached for the user"""
+    key = VERSION_KEY.format(user_id)
+    previous = cache.get(key) or 0
+    cache.set(key, max(_clock_version(), previous + 1), None)
+
+
+def cached_for_user(user_id, name, builder, *parts):
+    """
+    Return the cached value of ``builder()`` for the user's current data
+    version; ``parts`` further distinguish entries (page cursor, date, ...)
+    """
+    key = ENTRY_KEY.format(name, user_id, user_version(user_id), ':'.join(str(part) for part in parts))
+    value = cache.get(key)
+    if value is None:
+        value = builder()
+        cache.set(key, value, _timeout())
+    return value
+
+
+async def auser_version(user_id):
+    key = VERSION_KEY.format(user_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, _clock_version(), None)
+        version = await cache.aget(key)
+    return version
@@ -0,0 +1,149 @@
+"""
+Workout calorie estimates from MET values.
+
+Calories burned per minute are MET x 3.5 x body weight in kg / 200 (the
+ACSM formula). Each exercise has its own MET or its category's typical
+one, and the weight is the user's profile weight or DEFAULT_WEIGHT_KG.
+Workouts logged without calories are estimated when they are saved, and
+calories typed in by hand are kept as they are; recalculate_calories
+redoes the estimates in NumPy batches after a user's weight or the MET
+table changes.
+"""
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Exercise, UserProfile, Workout
+
+KCAL_PER_MET_KG_MINUTE = 3.5 / 200
+DEFAULT_WEIGHT_KG = 70.0
+# Typical METs (Compendium of Physical Activities) for exercises without their own
+CATEGORY_METS = {'strength': 5.0, 'bodyweight': 4.0, 'cardio': 7.0, 'flexibility': 2.5, 'other': 4.0}
+DEFAULT_MET = CATEGORY_METS['other']
+# Ids per UPDATE, well below the bound-parameter limits of every backend
+UPDATE_CHUNK = 900
+
+
+def estimate(mets, weights, durations):
+    """Whole calories for arrays (or scalars) of METs, weights in kg and durations in minutes"""
+    calories = np.asarray(mets, dtype=float) * np.asarray(weights, dtype=float) * np.asarray(durations, dtype=float)
+    return np.rint(calories * KCAL_PER_MET_KG_MINUTE).astype(np.int64)
+
+
+def met_table(exercise_ids=None):
+    """{exercise id: MET} for the given exercises, or all of them"""
+    exercises = Exercise.objects.all()
+    if exercise_ids is not None:
+        exercises = exercises.filter(pk__in=exercise_ids)
+    return {
+        pk: met if met is not None else CATEGORY_METS.get(category, DEFAULT_MET)
+        for pk, met, category in exercises.values_list('pk', 'met', 'category')
+    }
+
+
+def body_weights(user_ids=None):
+    """{user id: weight in kg} for the given users, or everyone, that have one"""
+    profiles = UserProfile.objects.filter(weight__isnull=False)
+    if user_ids is not None:
+        profiles = profiles.filter(user_id__in=user_ids)
+    return dict(profiles.values_list('user_id', 'weight'))
+
+
+def apply_estimates(workouts):
+    """
+    Fill in calories for unsaved workouts that have none; calories that are
+    set are never replaced. Two queries however many workouts.
+    """
+    pending = [workout for workout in workouts if workout.calories_burned is None]
+    if not pending:
+        return
+    mets = met_table({workout.exercise_id for workout in pending})
+    weights = body_weights({workout.user_id for workout in pending})
+    calories = estimate(
+        [mets.get(workout.exercise_id, DEFAULT_MET) for workout in pending],
+        [weights.get(workout.user_id, DEFAULT_WEIGHT_KG) for workout in pending],
+        [workout.duration for workout in pending],
+    )
+    for workout, value in zip(pending, calories.tolist()):
+        workout.calories_burned = value
+        workout.calories_estimated = True
+
+
+class Lookup:
+    """Vectorized dict lookup for integer keys, such as user or exercise ids"""
+
+    def __init__(self, mapping, default):
+        self.keys = np.array(sorted(mapping), dtype=np.int64)
+        self.values = np.array([mapping[key] for key in self.keys.tolist()], dtype=float)
+        self.default = default
+
+    def __call__(self, keys):
+        """Values for an integer array of keys; missing keys get the default"""
+        if not len(self.keys):
+            return np.full(len(keys), self.default, dtype=float)
+        index = np.searchsorted(self.keys, keys).clip(max=len(self.keys) - 1)
+        return np.where(self.keys[index] == keys, self.values[index], self.default)
+
+
+def recalculate_calories(user_ids=None, include_manual=False, batch_size=50000):
+    """
+    Recompute the estimated calories of the given users' workouts, or of
+    everyone's, from the current MET table and body weights. With
+    ``include_manual`` calories typed in by hand are replaced too.
+
+    Workouts are read in primary-key batches and estimated with NumPy; only
+    the rows whose value changes are written, grouped by their new value,
+    and derived data is refreshed once per batch. Returns the number of
+    workouts updated.
+    """
+    # Imported here: tracker.signals imports this module for apply_estimates
+    from .signals import entries_bulk_changed
+
+    mets = Lookup(met_table(), DEFAULT_MET)
+    weights = Lookup(body_weights(user_ids), DEFAULT_WEIGHT_KG)
+    workouts = Workout.objects.order_by('pk')
+    if user_ids is not None:
+        workouts = workouts.filter(user_id__in=user_ids)
+    if not include_manual:
+        workouts = workouts.filter(calories_estimated=True)
+
+    updated = 0
+    last_pk = 0
+    while True:
+        rows = list(workouts.filter(pk__gt=last_pk).values_list(
+            'pk', 'user_id', 'exercise_id', 'duration', 'calories_burned', 'calories_estimated', 'date',
+        )[:batch_size])
+        if not rows:
+            return updated
+        last_pk = rows[-1][0]
+
+        pks, users, exercises, durations, calories, estimated, days = zip(*rows)
+        # Unlinked workouts (None) become -1, which no exercise has
+        exercises = np.nan_to_num(np.array(exercises, dtype=float), nan=-1).astype(np.int64)
+        new = estimate(mets(exercises), weights(np.array(users, dtype=np.int64)), durations)
+        changed = np.flatnonzero((new != np.array(calories)) | ~np.array(estimated, dtype=bool))
+        if not changed.size:
+            continue
+
+        # One UPDATE per distinct new value. bulk_update's per-row CASE
+        # expressions cost far more to build than these few statements.
+        values, groups = np.unique(new[changed], return_inverse=True)
+        order = np.argsort(groups, kind='stable')
+        bounds = np.cumsum(np.bincount(groups))[:-1]
+        pk_array = np.array(pks, dtype=np.int64)
+        now = timezone.now()
+        with transaction.atomic():
+            for value, members in zip(values.tolist(), np.split(changed[order], bounds)):
+                ids = pk_array[members].tolist()
+                for start in range(0, len(ids), UPDATE_CHUNK):
+                    Workout.objects.filter(pk__in=ids[start:start + UPDATE_CHUNK]).update(
+                        calories_burned=value, calories_estimated=True, updated_at=now,
+                    )
+            changed = changed.tolist()
+            entries_bulk_changed.send(
+                sender=Workout,
+                entries=[(pks[i], users[i], days[i]) for i in changed],
+                action='update',
+                fields=['calories_burned', 'calories_estimated'],
+            )
+        updated += len(changed)
@@ -0,0 +1,83 @@
+"""
+Process-local cache of the food catalog.
+
+Every process keeps the whole catalog in memory and only reloads it when the
+CatalogVersion row changes. The version itself is re-read at most once every
+CATALOG_VERSION_CHECK_SECONDS, so most catalog reads cost no queries at all.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import F
+
+from .models import CatalogVersion, FoodCatalog
+
+# Sections shown on the catalog page, in display order
+SECTIONS = {
+    'breakfast': ('breakfast',),
+    'lunch': ('lunch', 'dinner'),
+    'snack': ('snack',),
+}
+
+
+class Catalog:
+    """Immutable snapshot of the catalog at one version"""
+
+    def __init__(self, version, foods):
+        self.version = version
+        self.foods = tuple(foods)
+        self.by_id = {food.pk: food for food in self.foods}
+        self.by_meal_type = {}
+        for food in self.foods:
+            self.by_meal_type.setdefault(food.meal_type, []).append(food)
+
+    def section(self, name):
+        """Foods listed under one section of the catalog page"""
+        foods = []
+        for meal_type in SECTIONS[name]:
+            foods.extend(self.by_meal_type.get(meal_type, ()))
+        return sorted(foods, key=lambda food: food.name)
+
+    def get(self, pk):
+        return self.by_id.get(pk)
+
+
+_lock = threading.Lock()
+_catalog = None
+_checked_at = 0.0
+
+
+def current_version():
+    """Read the shared catalog version from the database"""
+    return CatalogVersion.objects.values_list('version', flat=True).first() or 0
+
+
+def get_catalog():
+    """Return the cached catalog, reloading it if another process changed it"""
+    global _catalog, _checked_at
+
+    interval = getattr(settings, 'CATALOG_VERSION_CHECK_SECONDS', 30)
+    if _catalog is not None and time.monotonic() - _checked_at < interval:
+        return _catalog
+
+    version = current_version()
+    with _lock:
+        if _catalog is None or _catalog.version != version:
+            _catalog = Catalog(version, FoodCatalog.objects.order_by('meal_type', 'name'))
+        _checked_at = time.monotonic()
+        return _catalog
+
+
+def invalidate_catalog(**fields):
+    """
+    Bump the shared version and drop this process's copy. Extra keyword
+    arguments (such as ``checksum``) are stored on the version row.
+    """
+    global _catalog
+
+    updated = CatalogVersion.objects.update(version=F('version') + 1, **fields)
+    if not updated:
+        CatalogVersion.objects.create(version=1, **fields)
+    with _lock:
+        _catalog = None
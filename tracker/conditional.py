@@ -0,0 +1,62 @@
+"""
+Conditional GET for the per-user pages.
+
+Everything those pages show is cached under the user's data version and
+today's date (see tracker.caching), so the two together validate the page.
+A browser revalidating with If-None-Match or If-Modified-Since gets a 304
+after one cache read, before the view queries or renders anything.
+
+Besides the data, the HTML depends on the CSRF cookie (forms carry a token
+derived from it) and the deployed templates and static files (RELEASE),
+which are part of the ETag too. Pages with messages waiting to be shown
+are always rendered. Responses are marked ``private, no-cache`` so the
+browser keeps its copy but asks before every reuse.
+"""
+import hashlib
+from datetime import date, datetime, time, timezone
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .caching import user_version
+
+
+def _validators(request):
+    """
+    (ETag, Last-Modified timestamp) for the request; both are None when the
+    page must always be rendered
+    """
+    user = request.user
+    if not user.is_authenticated or len(get_messages(request)):
+        return None, None
+    version = user_version(user.pk)
+    today = date.today()
+    parts = [user.pk, version, today, request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''), settings.RELEASE]
+    etag = 'W/"%s"' % hashlib.sha1(':'.join(str(part) for part in parts).encode()).hexdigest()
+    # Day-based content changes at midnight even if the data does not
+    midnight = datetime.combine(today, time()).astimezone()
+    written = datetime.fromtimestamp(version / 1_000_000, timezone.utc)
+    return etag, int(max(written, midnight).timestamp())
+
+
+def conditional_page(view):
+    """Answer matching conditional GETs for a per-user page with 304 Not Modified"""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view(request, *args, **kwargs)
+        etag, last_modified = _validators(request)
+        response = None
+        if etag is not None:
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = view(request, *args, **kwargs)
+        if etag is not None and response.status_code in (200, 304):
+            response.headers.setdefault('ETag', etag)
+            response.headers.setdefault('Last-Modified', http_date(last_modified))
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+    return wrapper
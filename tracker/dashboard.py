@@ -0,0 +1,36 @@
+"""
+Context for the logged-in home page dashboard
+"""
+from datetime import date, timedelta
+
+from .models import DailySummary, Meal, Workout
+
+# Entries listed per section on the dashboard
+PREVIEW_SIZE = 3
+
+
+def dashboard_context(user, today=None):
+    today = today or date.today()
+    week_ago = today - timedelta(days=7)
+
+    # One small read of the rollup table covers today and this week
+    summaries = {
+        summary.date: summary
+        for summary in DailySummary.objects.filter(user=user, date__gte=week_ago)
+    }
+    today_summary = summaries.get(today) or DailySummary(user=user, date=today)
+
+    return {
+        # Only the first few entries are shown on the dashboard
+        'today_workouts': list(Workout.objects.filter(user=user, date=today)[:PREVIEW_SIZE]),
+        'today_meals': list(Meal.objects.filter(user=user, date=today)[:PREVIEW_SIZE]),
+        'today_workout_count': today_summary.workout_count,
+        'today_meal_count': today_summary.meal_count,
+        'total_calories_burned': today_summary.calories_burned,
+        'total_calories_consumed': today_summary.calories_consumed,
+        'total_protein': round(today_summary.protein, 1),
+        'total_carbs': round(today_summary.carbs, 1),
+        'total_fats': round(today_summary.fats, 1),
+        'week_workouts': sum(summary.workout_count for summary in summaries.values()),
+        'week_meals': sum(summary.meal_count for summary in summaries.values()),
+    }
@@ -0,0 +1,58 @@
+"""
+Matching free-text workout names to canonical exercises.
+
+Every exercise has one or more aliases: normalized spellings such as
+"bench press" or "bench". A workout's exercise_name is normalized the same
+way and looked up among the aliases when it is saved. A name that matches
+nothing becomes a new exercise with its own alias, so every workout ends
+up linked to an exercise.
+"""
+import re
+
+from django.db import transaction
+
+from .models import Exercise, ExerciseAlias
+
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+
+
+def normalize(name):
+    """Lowercase, with punctuation and repeated spaces folded to single spaces"""
+    return ' '.join(_NON_WORD.sub(' ', (name or '').lower()).split())
+
+
+def resolve(names):
+    """
+    {name: exercise id} for the given free-text names, adding an exercise
+    for each one no alias matches. Names with nothing to match map to None.
+    """
+    keys = {name: normalize(name) for name in set(names)}
+    known = dict(
+        ExerciseAlias.objects.filter(alias__in={key for key in keys.values() if key})
+        .values_list('alias', 'exercise_id')
+    )
+
+    # One new exercise per unmatched spelling, named as first typed
+    missing = {}
+    for name, key in keys.items():
+        if key and key not in known:
+            missing.setdefault(key, ' '.join(name.split()))
+    if missing:
+        with transaction.atomic():
+            # Conflicts mean a concurrent save added the same exercise first
+            Exercise.objects.bulk_create([Exercise(name=name) for name in missing.values()], ignore_conflicts=True)
+            ids = dict(Exercise.objects.filter(name__in=missing.values()).values_list('name', 'pk'))
+            ExerciseAlias.objects.bulk_create(
+                [ExerciseAlias(alias=key, exercise_id=ids[name]) for key, name in missing.items()],
+                ignore_conflicts=True,
+            )
+        known.update(ExerciseAlias.objects.filter(alias__in=missing).values_list('alias', 'exercise_id'))
+
+    return {name: known.get(key) for name, key in keys.items()}
+
+
+def assign_exercises(workouts):
+    """Link unsaved workouts to their exercises before a bulk insert"""
+    ids = resolve(workout.exercise_name for workout in workouts)
+    for workout in workouts:
+        workout.exercise_id = ids.get(workout.exercise_name)
@@ -0,0 +1,109 @@
+"""
+Streaming CSV / NDJSON export of workouts, meals and profiles.
+
+Rows are read with QuerySet.iterator() and encoded one at a time, so memory
+use stays flat no matter how much history is exported. Archived workouts
+and meals (see tracker.archive) are included.
+"""
+import csv
+import heapq
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from django.contrib.auth.models import User
+
+from .archive import archived_rows
+from .models import Meal, UserProfile, Workout
+
+CHUNK_SIZE = 2000
+
+EXPORTS = {
+    'profile': (UserProfile, ['age', 'weight', 'height', 'fitness_goal', 'created_at']),
+    'workouts': (Workout, ['id', 'date', 'exercise_name', 'sets', 'reps', 'weight_used',
+                           'calories_burned', 'duration', 'notes', 'created_at']),
+    'meals': (Meal, ['id', 'date', 'meal_type', 'food_name', 'calories', 'protein', 'carbs',
+                     'fats', 'quantity', 'notes', 'created_at']),
+}
+KINDS = list(EXPORTS)
+# Export kind -> archive kind
+ARCHIVED = {'workouts': 'workout', 'meals': 'meal'}
+
+
+def export_rows(kind, user=None, start=None, end=None, chunk_size=CHUNK_SIZE):
+    """
+    Yield one dict per row of ``kind``. Without ``user`` every user's rows are
+    exported and a ``username`` column is added.
+    """
+    model, fields = EXPORTS[kind]
+    queryset = model.objects.all()
+    columns = list(fields)
+
+    if user is not None:
+        queryset = queryset.filter(user=user)
+    else:
+        columns.insert(0, 'user__username')
+
+    if kind != 'profile':
+        if start:
+            queryset = queryset.filter(date__gte=start)
+        if end:
+            queryset = queryset.filter(date__lte=end)
+        queryset = queryset.order_by('date', 'created_at', 'pk') if user is not None else queryset.order_by('pk')
+    else:
+        queryset = queryset.order_by('pk')
+
+    names = ['username' if column == 'user__username' else column for column in columns]
+    rows = (dict(zip(names, values)) for values in queryset.values_list(*columns).iterator(chunk_size=chunk_size))
+    if kind not in ARCHIVED:
+        yield from rows
+    elif user is not None:
+        # Both sides are in date order, so a streaming merge keeps the export sorted
+        archived = ({name: row[name] for name in names} for row in archived_rows(user.pk, ARCHIVED[kind], start, end))
+        yield from heapq.merge(rows, archived, key=lambda row: (row['date'], row['created_at'], row['id']))
+    else:
+        yield from rows
+        yield from _archived_for_everyone(ARCHIVED[kind], names, start, end)
+
+
+def _archived_for_everyone(kind, names, start, end):
+    usernames = {}
+    for row in archived_rows(None, kind, start, end):
+        if row['user_id'] not in usernames:
+            usernames[row['user_id']] = User.objects.values_list('username', flat=True).get(pk=row['user_id'])
+        yield {name: usernames[row['user_id']] if name == 'username' else row[name] for name in names}
+
+
+def columns(kind, all_users=False):
+    names = list(EXPORTS[kind][1])
+    return ['username'] + names if all_users else names
+
+
+class _Echo:
+    """File-like object whose write() just hands the line back"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(kind, rows, all_users=False):
+    """Encode rows of a single kind as CSV lines"""
+    writer = csv.DictWriter(_Echo(), fieldnames=columns(kind, all_users))
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_ndjson(kinds, user=None, start=None, end=None):
+    """Encode rows of several kinds as newline-delimited JSON tagged with their type"""
+    for kind in kinds:
+        for row in export_rows(kind, user, start, end):
+            yield json.dumps({'type': kind, **row}, cls=DjangoJSONEncoder) + '\n'
+
+
+def stream_export(file_format, kinds, user=None, start=None, end=None):
+    """Chunks for a full export; CSV supports exactly one kind"""
+    if file_format == 'csv':
+        kind, = kinds
+        return stream_csv(kind, export_rows(kind, user, start, end), all_users=user is None)
+    return stream_ndjson(kinds, user, start, end)
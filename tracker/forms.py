@@ -30,7 +30,7 @@ class WorkoutForm(forms.ModelForm):
             }),
             'calories_burned': forms.NumberInput(attrs={
                 'class': 'form-control',
-                'placeholder': 'Estimated calories',
+                'placeholder': 'Leave blank to estimate',
                 'min': '0'
             }),
             'duration': forms.NumberInput(attrs={
@@ -56,11 +56,13 @@ class MealForm(forms.ModelForm):
     """
     class Meta:
         model = Meal
-        fields = ['meal_type', 'food_name', 'calories', 'protein', 'carbs', 'fats', 'quantity', 'notes', 'date']
+        fields = ['meal_type', 'food', 'food_name', 'calories', 'protein', 'carbs', 'fats', 'quantity', 'notes', 'date']
         widgets = {
             'meal_type': forms.Select(attrs={
                 'class': 'form-control'
             }),
+            # Filled in by the food search when a catalog food is picked
+            'food': forms.HiddenInput(),
             'food_name': forms.TextInput(attrs={
                 'class': 'form-control',
                 'placeholder': 'e.g., Chicken Breast, Oatmeal, Apple'
@@ -0,0 +1,211 @@
+"""
+Database-backed background jobs.
+
+Job functions are registered with ``@job('name')`` and queued with
+``enqueue``. The run_jobs management command claims due jobs and runs
+them in a thread or process pool, and deletes finished exports once
+they are older than EXPORT_MAX_AGE_SECONDS. A failed job is retried with
+exponential backoff until it has used up its ``max_attempts``. A job
+still marked running after JOB_TIMEOUT_SECONDS belonged to a worker that
+died, so it is queued again.
+
+Jobs are claimed with SELECT ... FOR UPDATE SKIP LOCKED where the database
+supports it, followed by a conditional UPDATE. The UPDATE alone is enough
+to keep two workers from taking the same job on backends such as SQLite.
+
+Deployments without a run_jobs process (such as the build.sh one) leave
+JOB_WORKER off, and each job then runs in a thread of the process that
+queued it once the enqueuing transaction commits. Those jobs are retried
+in the same thread, but one cut short by a restart stays marked running
+until a worker requeues it; start ``python manage.py run_jobs`` next to
+the web server and set JOB_WORKER=True where that matters.
+"""
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+import traceback
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .calories import recalculate_calories
+from .exports import KINDS, stream_export
+from .models import Job
+from .recommendations import get_recommendations
+from .rollups import rebuild_daily_summaries
+
+logger = logging.getLogger('tracker.jobs')
+
+JOBS = {}
+# Users rebuilt per transaction, as in the rebuild_daily_summaries command
+REBUILD_CHUNK = 200
+
+
+def job(name):
+    """Register a job function; it is called with the job's user and payload"""
+    def register(func):
+        JOBS[name] = func
+        return func
+    return register
+
+
+def enqueue(name, user=None, max_attempts=3, **payload):
+    if name not in JOBS:
+        raise ValueError(f'Unknown job: {name}')
+    queued = Job.objects.create(name=name, user=user, payload=payload, max_attempts=max_attempts)
+    if not getattr(settings, 'JOB_WORKER', True):
+        # After the commit, so the thread's own connection can see the job
+        transaction.on_commit(lambda: threading.Thread(target=run_inline, args=[queued.pk], daemon=True).start())
+    return queued
+
+
+def backoff(attempts):
+    """Seconds to wait before retrying a job that has failed ``attempts`` times"""
+    base = getattr(settings, 'JOB_BACKOFF_SECONDS', 30)
+    return base * 2 ** (attempts - 1)
+
+
+def requeue_stale():
+    """Queue again the jobs whose worker stopped without finishing them"""
+    timeout = getattr(settings, 'JOB_TIMEOUT_SECONDS', 60 * 60)
+    return Job.objects.filter(
+        status='running', started_at__lt=timezone.now() - timedelta(seconds=timeout)
+    ).update(status='queued', locked_by='', run_after=timezone.now())
+
+
+def prune_exports():
+    """Delete export files older than EXPORT_MAX_AGE_SECONDS; returns how many"""
+    cutoff = time.time() - getattr(settings, 'EXPORT_MAX_AGE_SECONDS', 60 * 60 * 24)
+    removed = 0
+    for path in Path(settings.EXPORT_ROOT).glob('*/*'):
+        try:
+            if path.is_file() and path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            # Removed by another worker in the meantime
+            continue
+    return removed
+
+
+def claim(worker, limit):
+    """Mark up to ``limit`` due jobs as running for ``worker``; returns their ids"""
+    now = timezone.now()
+    with transaction.atomic():
+        candidates = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status='queued', run_after__lte=now)
+            .order_by('run_after', 'pk')
+            .values_list('pk', flat=True)[:limit]
+        )
+        claimed = []
+        for pk in candidates:
+            updated = Job.objects.filter(pk=pk, status='queued').update(
+                status='running', locked_by=worker, started_at=now, attempts=F('attempts') + 1,
+            )
+            if updated:
+                claimed.append(pk)
+    return claimed
+
+
+def run(job_id):
+    """Run one claimed job and record its outcome; returns the final status"""
+    close_old_connections()
+    try:
+        current = Job.objects.select_related('user').get(pk=job_id)
+        try:
+            result = JOBS[current.name](current.user, **current.payload)
+        except Exception:
+            error = traceback.format_exc()
+            logger.warning('Job %s #%s failed (attempt %s/%s)', current.name, current.pk,
+                           current.attempts, current.max_attempts)
+            if current.attempts < current.max_attempts:
+                retry_at = timezone.now() + timedelta(seconds=backoff(current.attempts))
+                fields = {'status': 'queued', 'run_after': retry_at}
+            else:
+                fields = {'status': 'failed', 'finished_at': timezone.now()}
+            Job.objects.filter(pk=current.pk).update(error=error, locked_by='', **fields)
+            return fields['status']
+
+        Job.objects.filter(pk=current.pk).update(
+            status='succeeded', result=result, error='', locked_by='', finished_at=timezone.now(),
+        )
+        return 'succeeded'
+    finally:
+        close_old_connections()
+
+
+def run_inline(job_id):
+    """Run a queued job in this process, retrying it as run_jobs would (see JOB_WORKER)"""
+    worker = f'{socket.gethostname()}:{os.getpid()}:inline'
+    while Job.objects.filter(pk=job_id, status='queued').update(
+        status='running', locked_by=worker, started_at=timezone.now(), attempts=F('attempts') + 1,
+    ):
+        if run(job_id) != 'queued':
+            break
+        time.sleep(backoff(Job.objects.get(pk=job_id).attempts))
+    # No worker sweeps expired exports either
+    prune_exports()
+    close_old_connections()
+
+
+# ==================== JOB FUNCTIONS ====================
+
+@job('rebuild_summaries')
+def rebuild_summaries(user, user_ids=None):
+    """Rebuild the daily summaries of ``user``, of the given user ids, or of everyone"""
+    if user_ids is None:
+        user_ids = [user.pk] if user else list(User.objects.order_by('pk').values_list('pk', flat=True))
+    written = 0
+    for start in range(0, len(user_ids), REBUILD_CHUNK):
+        written += rebuild_daily_summaries(user_ids[start:start + REBUILD_CHUNK])
+    return {'summaries': written}
+
+
+@job('export')
+def export(user, file_format='ndjson', kinds=None, start=None, end=None):
+    """
+    Write a full export to EXPORT_ROOT for download once the job succeeds;
+    the worker deletes it after EXPORT_MAX_AGE_SECONDS
+    """
+    kinds = kinds or KINDS
+    start = date.fromisoformat(start) if start else None
+    end = date.fromisoformat(end) if end else None
+
+    label = kinds[0] if len(kinds) == 1 else 'all'
+    filename = f'fitness-{label}-{date.today().isoformat()}.{file_format}'
+    target = Path(settings.EXPORT_ROOT) / str(user.pk)
+    target.mkdir(parents=True, exist_ok=True)
+    # A unique file per job, so concurrent exports never share one
+    with tempfile.NamedTemporaryFile('w', dir=target, suffix=f'.{file_format}', delete=False,
+                                     newline='', encoding='utf-8') as output:
+        path = Path(output.name)
+        try:
+            for chunk in stream_export(file_format, kinds, user, start, end):
+                output.write(chunk)
+        except BaseException:
+            # A failed attempt is retried into a new file; nothing links to this one
+            path.unlink(missing_ok=True)
+            raise
+    return {'path': str(path), 'filename': filename, 'size': path.stat().st_size}
+
+
+@job('recommendations')
+def recommendations(user):
+    """Recompute the user's recommendations into the cache"""
+    return {'count': len(get_recommendations(user)['recommendations'])}
+
+
+@job('recalculate_calories')
+def calories(user, user_ids=None, include_manual=False):
+    """Redo the estimated calories of ``user``, of the given user ids, or of everyone"""
+    ids = user_ids if user_ids is not None else [user.pk] if user else None
+    return {'updated': recalculate_calories(ids, include_manual=include_manual)}
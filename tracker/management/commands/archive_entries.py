@@ -0,0 +1,123 @@
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from tracker.archive import FIELDS, MODELS, decode, encode, sort_key
+from tracker.caching import bump_user_version
+from tracker.models import ArchiveChunk
+from tracker.records import exercise_totals
+from tracker.signals import suppress_entry_signals
+
+# Ids per DELETE, well below the bound-parameter limits of every backend
+DELETE_CHUNK = 900
+
+
+class Command(BaseCommand):
+    help = 'Moves old workouts and meals into compressed per-user, per-year archive chunks (or back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, dest='days',
+                            help='Archive entries dated more than this many days ago '
+                                 '(default: ARCHIVE_AFTER_DAYS)')
+        parser.add_argument('--user', action='append', dest='usernames', default=[],
+                            help='Only this user (may be repeated)')
+        parser.add_argument('--kind', choices=sorted(MODELS), help='Only workouts or only meals')
+        parser.add_argument('--restore', action='store_true',
+                            help='Move archived entries back into the Workout and Meal tables')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would move, change nothing')
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('pk')
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+            missing = set(options['usernames']) - set(users.values_list('username', flat=True))
+            if missing:
+                raise CommandError(f"Unknown user(s): {', '.join(sorted(missing))}")
+        user_ids = list(users.values_list('pk', flat=True))
+        kinds = [options['kind']] if options['kind'] else list(MODELS)
+
+        if options['restore']:
+            self.restore(user_ids, kinds, options['dry_run'])
+            return
+
+        days = options['days'] if options['days'] is not None else settings.ARCHIVE_AFTER_DAYS
+        cutoff = date.today() - timedelta(days=days)
+        self.stdout.write(self.style.SUCCESS(f'Archiving entries dated before {cutoff}...'))
+
+        moved = stored = 0
+        for user_id in user_ids:
+            user_moved = 0
+            for kind in kinds:
+                old = MODELS[kind].objects.filter(user_id=user_id, date__lt=cutoff)
+                for year in old.dates('date', 'year'):
+                    if options['dry_run']:
+                        user_moved += old.filter(date__year=year.year).count()
+                        continue
+                    count, size = self.archive_year(user_id, kind, year.year, cutoff)
+                    user_moved += count
+                    stored += size
+            if user_moved:
+                moved += user_moved
+                if not options['dry_run']:
+                    bump_user_version(user_id)
+                self.stdout.write(f'User #{user_id}: {user_moved} entries')
+
+        verb = 'Would archive' if options['dry_run'] else 'Archived'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {moved} entries' + ('' if options['dry_run'] else f' ({stored / 1024:.0f} KiB of chunks written)')
+        ))
+
+    def archive_year(self, user_id, kind, year, cutoff):
+        """Move one user's rows of one kind and year into their chunk; returns (rows moved, chunk size)"""
+        model = MODELS[kind]
+        with transaction.atomic():
+            rows = list(
+                model.objects.filter(user_id=user_id, date__lt=cutoff, date__year=year).values(*FIELDS[kind])
+            )
+            if not rows:
+                return 0, 0
+            chunk = ArchiveChunk.objects.select_for_update().filter(user_id=user_id, kind=kind, year=year).first()
+
+            merged = {row['id']: row for row in decode(chunk)} if chunk else {}
+            merged.update((row['id'], row) for row in rows)
+            ordered = sorted(merged.values(), key=sort_key)
+
+            chunk = chunk or ArchiveChunk(user_id=user_id, kind=kind, year=year)
+            chunk.data = encode(kind, ordered)
+            chunk.row_count = len(ordered)
+            chunk.first_date = ordered[0]['date']
+            chunk.last_date = ordered[-1]['date']
+            # Personal records read these instead of decoding the chunk
+            chunk.exercise_totals = exercise_totals(ordered) if kind == 'workout' else {}
+            chunk.save()
+
+            # Summaries and the sync log already describe these rows; they only change storage
+            ids = [row['id'] for row in rows]
+            with suppress_entry_signals():
+                for start in range(0, len(ids), DELETE_CHUNK):
+                    model.objects.filter(pk__in=ids[start:start + DELETE_CHUNK]).delete()
+        return len(rows), len(chunk.data)
+
+    def restore(self, user_ids, kinds, dry_run):
+        restored = 0
+        for chunk in ArchiveChunk.objects.filter(user_id__in=user_ids, kind__in=kinds).order_by('user_id', 'kind', 'year'):
+            restored += chunk.row_count
+            if dry_run:
+                continue
+            model = MODELS[chunk.kind]
+            rows = decode(chunk)
+            entries = [model(user_id=chunk.user_id, **row) for row in rows]
+            with transaction.atomic(), suppress_entry_signals():
+                model.objects.bulk_create(entries, batch_size=1000)
+                # bulk_create stamps auto_now(_add) fields; put the originals back
+                for entry, row in zip(entries, rows):
+                    entry.created_at, entry.updated_at = row['created_at'], row['updated_at']
+                model.objects.bulk_update(entries, ['created_at', 'updated_at'], batch_size=1000)
+                chunk.delete()
+            bump_user_version(chunk.user_id)
+
+        verb = 'Would restore' if dry_run else 'Restored'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {restored} archived entries'))
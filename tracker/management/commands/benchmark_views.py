@@ -0,0 +1,217 @@
+import asyncio
+import json
+import statistics
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from tracker.caching import bump_user_version
+from tracker.metrics import percentile
+from tracker.models import Meal, Workout
+
+# benchmark name -> (url name, query string)
+VIEWS = {
+    'home': ('home', ''),
+    'workout_list': ('workout_list', ''),
+    'meal_list': ('meal_list', ''),
+    'progress_view': ('progress', ''),
+    'progress_view_year': ('progress', '?range=365'),
+    'recommendations_view': ('recommendations', ''),
+    'indian_foods_list': ('indian_foods', ''),
+}
+
+
+class QueryTimer:
+    """Database execute wrapper that counts queries and times them precisely"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+class Command(BaseCommand):
+    help = 'Times the main views through the test client and reports wall time, query count and SQL time as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='User to log in as (default: the first generated sample user)')
+        parser.add_argument('--view', action='append', dest='views', choices=sorted(VIEWS), default=[],
+                            help='Only benchmark this view (may be repeated)')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed requests per view and cache state')
+        parser.add_argument('--cache', choices=['cold', 'warm', 'both'], default='both',
+                            help="Measure with the user's cached data invalidated before every request, "
+                                 "with it warmed up, or both")
+        parser.add_argument('--handler', choices=['wsgi', 'asgi'], default='wsgi',
+                            help='Request handler the test client goes through')
+        parser.add_argument('--concurrency', type=int, default=1,
+                            help='Requests in flight at once. Load runs (above 1, or any ASGI run) report '
+                                 'latency percentiles and throughput instead of per-request SQL')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+        else:
+            user = User.objects.filter(username__startswith='sample').order_by('pk').first()
+        if user is None:
+            raise CommandError('No user to benchmark as; run generate_sample_data or pass --user')
+
+        states = ['cold', 'warm'] if options['cache'] == 'both' else [options['cache']]
+        names = options['views'] or list(VIEWS)
+
+        setup_test_environment()
+        try:
+            client = Client()
+            client.force_login(user)
+            load = options['handler'] == 'asgi' or options['concurrency'] > 1
+            results = {}
+            for name in names:
+                url_name, query = VIEWS[name]
+                url = reverse(url_name) + query
+                results[name] = {}
+                for state in states:
+                    if load:
+                        results[name][state] = self.measure_load(
+                            client, user, url, state, options['repeat'], options['concurrency'], options['handler']
+                        )
+                    else:
+                        results[name][state] = self.measure(client, user, url, state, options['repeat'])
+        finally:
+            teardown_test_environment()
+
+        report = {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'revision': self.revision(),
+            'database': connection.vendor,
+            'cache': settings.CACHES['default']['BACKEND'],
+            'handler': options['handler'],
+            'concurrency': options['concurrency'],
+            'user': user.username,
+            'dataset': {
+                'workouts': Workout.objects.filter(user=user).count(),
+                'meals': Meal.objects.filter(user=user).count(),
+            },
+            'repeat': options['repeat'],
+            'views': results,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as target:
+                target.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Wrote benchmark report to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def measure(self, client, user, url, state, repeat):
+        """Request ``url`` ``repeat`` times; times are in milliseconds"""
+        if state == 'warm':
+            client.get(url)
+
+        wall, sql, queries = [], [], []
+        for _ in range(repeat):
+            if state == 'cold':
+                bump_user_version(user.pk)
+            timer = QueryTimer()
+            with connection.execute_wrapper(timer):
+                started = time.perf_counter()
+                response = client.get(url)
+                wall.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f'{url} returned {response.status_code}')
+            queries.append(timer.count)
+            sql.append(timer.seconds * 1000)
+
+        return {
+            'wall_ms': {
+                'min': round(min(wall), 2),
+                'median': round(statistics.median(wall), 2),
+                'max': round(max(wall), 2),
+            },
+            'sql_ms': round(statistics.median(sql), 2),
+            'queries': max(queries),
+        }
+
+    def measure_load(self, client, user, url, state, rounds, concurrency, handler):
+        """
+        Send ``rounds`` waves of ``concurrency`` simultaneous requests and
+        report per-request latency (milliseconds) and overall throughput
+        """
+        cookies = client.cookies
+        if state == 'warm':
+            client.get(url)
+
+        def fetch():
+            worker = Client()
+            worker.cookies = cookies
+            started = time.perf_counter()
+            response = worker.get(url)
+            return response.status_code, (time.perf_counter() - started) * 1000
+
+        async def afetch():
+            worker = AsyncClient()
+            worker.cookies = cookies
+            started = time.perf_counter()
+            response = await worker.get(url)
+            return response.status_code, (time.perf_counter() - started) * 1000
+
+        async def arounds():
+            results = []
+            for _ in range(rounds):
+                if state == 'cold':
+                    await asyncio.to_thread(bump_user_version, user.pk)
+                results.extend(await asyncio.gather(*(afetch() for _ in range(concurrency))))
+            return results
+
+        started = time.perf_counter()
+        if handler == 'asgi':
+            results = asyncio.run(arounds())
+        else:
+            results = []
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                for _ in range(rounds):
+                    if state == 'cold':
+                        bump_user_version(user.pk)
+                    futures = [pool.submit(fetch) for _ in range(concurrency)]
+                    results.extend(future.result() for future in futures)
+        elapsed = time.perf_counter() - started
+
+        statuses = {status for status, _ in results if status != 200}
+        if statuses:
+            raise CommandError(f'{url} returned {", ".join(map(str, sorted(statuses)))}')
+        latencies = sorted(latency for _, latency in results)
+        return {
+            'wall_ms': {
+                'min': round(latencies[0], 2),
+                'median': round(statistics.median(latencies), 2),
+                'p95': round(percentile(latencies, 0.95), 2),
+                'max': round(latencies[-1], 2),
+            },
+            'requests': len(latencies),
+            'throughput_rps': round(len(latencies) / elapsed, 1),
+        }
+
+    def revision(self):
+        """Current git commit, so reports can be compared across commits"""
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,57 @@
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from tracker.exports import KINDS, stream_export
+
+
+class Command(BaseCommand):
+    help = "Streams workout, meal and profile history to CSV or NDJSON in constant memory"
+
+    def add_arguments(self, parser):
+        who = parser.add_mutually_exclusive_group(required=True)
+        who.add_argument('--user', help='Export a single user')
+        who.add_argument('--all-users', action='store_true', help='Export every user (full table dump)')
+        parser.add_argument('--kind', choices=KINDS + ['all'], default='all')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], default='ndjson')
+        parser.add_argument('--start', help='First date to include (YYYY-MM-DD)')
+        parser.add_argument('--end', help='Last date to include (YYYY-MM-DD)')
+        parser.add_argument('--output', help='File to write (default: stdout)')
+
+    def handle(self, *args, **options):
+        kinds = KINDS if options['kind'] == 'all' else [options['kind']]
+        if options['format'] == 'csv' and len(kinds) != 1:
+            raise CommandError('CSV exports need a single --kind')
+
+        start, end = (self.parse(options[name], name) for name in ('start', 'end'))
+
+        user = None
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f"Unknown user: {options['user']}")
+
+        chunks = stream_export(options['format'], kinds, user, start, end)
+        output = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else sys.stdout
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+        finally:
+            if options['output']:
+                output.close()
+
+        if options['output']:
+            self.stderr.write(self.style.SUCCESS(f"Exported to {options['output']}"))
+
+    def parse(self, value, name):
+        if not value:
+            return None
+        try:
+            parsed = parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise CommandError(f'--{name} must be YYYY-MM-DD')
+        return parsed
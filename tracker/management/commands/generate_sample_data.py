@@ -0,0 +1,162 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from tracker.exercises import assign_exercises
+from tracker.models import Exercise, FoodCatalog, Meal, UserProfile, Workout
+from tracker.records import rebuild_personal_records
+from tracker.rollups import rebuild_daily_summaries
+from tracker.sync import record_changes
+
+# (exercise, calories burned per minute, uses weights)
+EXERCISES = [
+    ('Bench Press', 6, True),
+    ('Squat', 8, True),
+    ('Deadlift', 8, True),
+    ('Overhead Press', 6, True),
+    ('Barbell Row', 6, True),
+    ('Pull Ups', 7, False),
+    ('Push Ups', 7, False),
+    ('Running', 11, False),
+    ('Cycling', 9, False),
+    ('Yoga', 4, False),
+    ('Skipping', 12, False),
+    ('Swimming', 10, False),
+]
+
+# meal type -> probability of being logged on a given day
+MEAL_ODDS = {'breakfast': 0.8, 'lunch': 0.9, 'dinner': 0.9, 'snack': 0.5}
+
+
+class Command(BaseCommand):
+    help = 'Fills the database with synthetic users, workouts and meals for benchmarking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help='Number of users to create')
+        parser.add_argument('--years', type=float, default=1, help='Years of history per user')
+        parser.add_argument('--prefix', default='sample', help='Username prefix for the generated users')
+        parser.add_argument('--password', default='sample-pass', help='Password for every generated user')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for reproducible datasets')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk insert')
+        parser.add_argument('--clear', action='store_true',
+                            help='Delete existing users with the same prefix first')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        days = max(1, round(options['years'] * 365))
+        started = time.monotonic()
+
+        existing = User.objects.filter(username__startswith=prefix)
+        if existing.exists():
+            if not options['clear']:
+                raise CommandError(f'Users starting with "{prefix}" already exist; use --clear to replace them')
+            deleted, _ = existing.delete()
+            self.stdout.write(f'Deleted {deleted} existing sample rows')
+
+        if not FoodCatalog.objects.exists():
+            call_command('load_indian_foods', stdout=self.stdout)
+        if not Exercise.objects.exists():
+            call_command('load_exercises', stdout=self.stdout)
+        self.foods = list(FoodCatalog.objects.all())
+        self.foods_by_type = {}
+        for food in self.foods:
+            self.foods_by_type.setdefault(food.meal_type, []).append(food)
+
+        # Hashing is deliberately slow, so every user shares one hash
+        password = make_password(options['password'])
+        with transaction.atomic():
+            User.objects.bulk_create([
+                User(username=f'{prefix}{i}', password=password, email=f'{prefix}{i}@example.com')
+                for i in range(1, options['users'] + 1)
+            ], batch_size=self.batch_size)
+            users = list(User.objects.filter(username__startswith=prefix).order_by('pk'))
+            UserProfile.objects.bulk_create(
+                [self.profile(user) for user in users], batch_size=self.batch_size
+            )
+
+        end = date.today()
+        start = end - timedelta(days=days - 1)
+        workouts = meals = 0
+        for user in users:
+            pending_workouts, pending_meals = [], []
+            for offset in range(days):
+                day = start + timedelta(days=offset)
+                pending_workouts.extend(self.workouts(user, day))
+                pending_meals.extend(self.meals(user, day))
+            # Summaries and records are rebuilt once at the end instead of per batch
+            assign_exercises(pending_workouts)
+            with transaction.atomic():
+                Workout.objects.bulk_create(pending_workouts, batch_size=self.batch_size)
+                Meal.objects.bulk_create(pending_meals, batch_size=self.batch_size)
+                record_changes('workout', [(entry.pk, user.pk) for entry in pending_workouts], 'upsert')
+                record_changes('meal', [(entry.pk, user.pk) for entry in pending_meals], 'upsert')
+            workouts += len(pending_workouts)
+            meals += len(pending_meals)
+            self.stdout.write(f'{user.username}: {len(pending_workouts)} workouts, {len(pending_meals)} meals')
+
+        summaries = rebuild_daily_summaries([user.pk for user in users])
+        records = rebuild_personal_records([user.pk for user in users])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(users)} users, {workouts} workouts, {meals} meals, '
+            f'{summaries} daily summaries and {records} personal records in {time.monotonic() - started:.1f}s'
+        ))
+
+    def profile(self, user):
+        rng = self.rng
+        return UserProfile(
+            user=user,
+            age=rng.randint(18, 60),
+            weight=round(rng.uniform(50, 100), 1),
+            height=round(rng.uniform(150, 195), 1),
+            fitness_goal=rng.choice([choice for choice, _ in UserProfile.GOAL_CHOICES]),
+        )
+
+    def workouts(self, user, day):
+        rng = self.rng
+        if rng.random() < 0.4:
+            return []
+        entries = []
+        for name, per_minute, weighted in rng.sample(EXERCISES, rng.randint(1, 3)):
+            duration = rng.choice([15, 20, 30, 45, 60])
+            entries.append(Workout(
+                user=user,
+                exercise_name=name,
+                sets=rng.randint(3, 5) if weighted else 1,
+                reps=rng.randint(5, 12) if weighted else 1,
+                weight_used=round(rng.uniform(20, 120), 1) if weighted else None,
+                calories_burned=round(per_minute * duration * rng.uniform(0.8, 1.2)),
+                duration=duration,
+                date=day,
+            ))
+        return entries
+
+    def meals(self, user, day):
+        rng = self.rng
+        entries = []
+        for meal_type, odds in MEAL_ODDS.items():
+            if rng.random() >= odds:
+                continue
+            food = rng.choice(self.foods_by_type.get(meal_type) or self.foods)
+            quantity = rng.choice([1, 1, 1, 1.5, 2])
+            entries.append(Meal(
+                user=user,
+                meal_type=meal_type,
+                food=food,
+                food_name=food.name,
+                calories=round(food.calories * quantity),
+                protein=round(food.protein * quantity, 1),
+                carbs=round(food.carbs * quantity, 1),
+                fats=round(food.fats * quantity, 1),
+                quantity=quantity,
+                date=day,
+            ))
+        return entries
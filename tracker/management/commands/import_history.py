@@ -0,0 +1,131 @@
+import csv
+import json
+import time
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from tracker.bulk import MODELS, build_entry, insert_entries
+
+
+class Command(BaseCommand):
+    help = 'Imports workouts and meals from a CSV or JSONL file in bounded memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSONL file to import')
+        parser.add_argument('--format', choices=['csv', 'jsonl'],
+                            help='File format (default: guessed from the extension)')
+        parser.add_argument('--user', help='Owner for rows without a "username" column')
+        parser.add_argument('--kind', choices=sorted(MODELS),
+                            help='Entry type for rows without a "kind" column')
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help='Rows written per transaction')
+        parser.add_argument('--rejects', help='Write rejected rows with their errors to this JSONL file')
+        parser.add_argument('--dry-run', action='store_true', help='Validate only, write nothing')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f'{path} does not exist')
+        file_format = options['format'] or ('jsonl' if path.suffix in ('.jsonl', '.ndjson', '.json') else 'csv')
+
+        self.user_ids = {}
+        if options['user']:
+            self.default_user_id = self._user_id(options['user'])
+            if self.default_user_id is None:
+                raise CommandError(f"Unknown user: {options['user']}")
+        else:
+            self.default_user_id = None
+        self.default_kind = options['kind']
+        self.batch_size = options['batch_size']
+        self.dry_run = options['dry_run']
+
+        self.imported = 0
+        self.rejected = 0
+        self.pending = {kind: [] for kind in MODELS}
+        rejects = open(options['rejects'], 'w') if options['rejects'] else None
+        started = time.monotonic()
+
+        with path.open(newline='', encoding='utf-8') as source:
+            for line_no, row, error in self._rows(source, file_format):
+                if error:
+                    kind, entry, errors = None, None, {'__all__': [error]}
+                else:
+                    kind, entry, errors = self._build(row)
+                if errors:
+                    self.rejected += 1
+                    if rejects:
+                        rejects.write(json.dumps({'line': line_no, 'errors': errors, 'row': row}) + '\n')
+                    elif self.rejected <= 10:
+                        self.stderr.write(f'Line {line_no}: {errors}')
+                    continue
+
+                self.pending[kind].append(entry)
+                if len(self.pending[kind]) >= self.batch_size:
+                    self._flush(kind)
+                    elapsed = time.monotonic() - started
+                    self.stdout.write(f'{self.imported} rows imported ({self.imported / elapsed:.0f} rows/s)')
+
+        for kind in MODELS:
+            self._flush(kind)
+        if rejects:
+            rejects.close()
+
+        elapsed = time.monotonic() - started
+        verb = 'Validated' if self.dry_run else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {self.imported} rows in {elapsed:.1f}s '
+            f'({self.imported / elapsed if elapsed else 0:.0f} rows/s), rejected {self.rejected}'
+        ))
+
+    def _rows(self, source, file_format):
+        """Yield (line number, row, parse error) without reading the whole file"""
+        if file_format == 'csv':
+            reader = csv.DictReader(source)
+            for row in reader:
+                yield reader.line_num, row, None
+            return
+
+        for line_no, line in enumerate(source, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                yield line_no, line.strip(), f'Invalid JSON: {exc}'
+                continue
+            if not isinstance(row, dict):
+                yield line_no, row, 'Row is not a JSON object'
+                continue
+            yield line_no, row, None
+
+    def _user_id(self, username):
+        if username not in self.user_ids:
+            self.user_ids[username] = User.objects.filter(username=username).values_list('pk', flat=True).first()
+        return self.user_ids[username]
+
+    def _build(self, row):
+        """Return (kind, unsaved entry, None) or (kind, None, errors)"""
+        kind = row.get('kind') or self.default_kind
+        if kind not in MODELS:
+            return kind, None, {'kind': [f'Expected one of: {", ".join(sorted(MODELS))}']}
+
+        username = row.get('username')
+        user_id = self._user_id(username) if username else self.default_user_id
+        if user_id is None:
+            return kind, None, {'username': ['Unknown or missing user']}
+
+        entry, errors = build_entry(kind, row, user_id)
+        return kind, entry, errors
+
+    def _flush(self, kind):
+        entries = self.pending[kind]
+        if not entries:
+            return
+        if not self.dry_run:
+            with transaction.atomic():
+                insert_entries(MODELS[kind], entries)
+        self.imported += len(entries)
+        self.pending[kind] = []
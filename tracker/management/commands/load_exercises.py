@@ -0,0 +1,128 @@
+import csv
+import hashlib
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from tracker.archive import archived_exercise_ids
+from tracker.calories import DEFAULT_MET, met_table
+from tracker.exercises import normalize, resolve
+from tracker.jobs import enqueue
+from tracker.models import Exercise, ExerciseAlias, ExerciseDataVersion, Workout
+from tracker.signals import entries_bulk_changed
+
+DATA_DIR = Path(__file__).resolve().parents[2] / 'data' / 'exercises'
+CATEGORIES = {choice for choice, _ in Exercise.CATEGORY_CHOICES}
+
+
+class Command(BaseCommand):
+    help = 'Loads canonical exercises and their aliases from data files and relinks existing workouts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*',
+                            help=f'CSV exercise files (default: every file in {DATA_DIR})')
+        parser.add_argument('--force', action='store_true',
+                            help='Reload and relink workouts even if the data files have not changed')
+
+    def handle(self, *args, **options):
+        paths = [Path(path) for path in options['paths']] or sorted(DATA_DIR.glob('*.csv'))
+        if not paths:
+            raise CommandError('No exercise data files found')
+
+        # Skip all work when the files are exactly what was loaded last time
+        checksum = self.checksum(paths)
+        loaded = ExerciseDataVersion.objects.values_list('checksum', flat=True).first()
+        if loaded == checksum and not options['force']:
+            self.stdout.write(self.style.SUCCESS('Exercises are up to date.'))
+            return
+
+        self.stdout.write(self.style.SUCCESS('Loading exercises...'))
+
+        # Later files win when the same exercise or alias appears twice
+        exercises = {}
+        aliases = {}
+        for path in paths:
+            for row in self.read(path):
+                name = ' '.join((row.get('name') or '').split())
+                category = row.get('category') or 'other'
+                if not normalize(name) or category not in CATEGORIES:
+                    raise CommandError(f'Bad row in {path}: {row}')
+                try:
+                    met = float(row['met']) if row.get('met') else None
+                except ValueError:
+                    raise CommandError(f'Bad MET in {path}: {row}')
+                exercises[name] = Exercise(name=name, category=category, met=met)
+                for alias in [name] + (row.get('aliases') or '').split('|'):
+                    if normalize(alias):
+                        aliases[normalize(alias)] = name
+
+        previous_mets = met_table()
+        with transaction.atomic():
+            Exercise.objects.bulk_create(
+                exercises.values(), update_conflicts=True, unique_fields=['name'], update_fields=['category', 'met'],
+            )
+            ids = dict(Exercise.objects.filter(name__in=exercises).values_list('name', 'pk'))
+            ExerciseAlias.objects.bulk_create(
+                [ExerciseAlias(alias=alias, exercise_id=ids[name]) for alias, name in aliases.items()],
+                update_conflicts=True, unique_fields=['alias'], update_fields=['exercise'],
+            )
+            moves = self.relink()
+            # Exercises made up from workout names that now match a listed one.
+            # Archived workouts keep their exercise ids, so those stay.
+            _, deleted = Exercise.objects.filter(aliases__isnull=True, workouts__isnull=True).exclude(
+                pk__in=archived_exercise_ids(),
+            ).delete()
+            if not ExerciseDataVersion.objects.update(checksum=checksum):
+                ExerciseDataVersion.objects.create(checksum=checksum)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully loaded {len(exercises)} exercises with {len(aliases)} aliases from {len(paths)} file(s); '
+            f"relinked {sum(moves.values())} workouts, removed {deleted.get('tracker.Exercise', 0)} unused exercises"
+        ))
+
+        # Only estimated workouts whose MET moved need new calories, either
+        # through their exercise's new MET or a relink to another exercise
+        mets = met_table()
+        stale = {pk for pk, met in mets.items() if pk in previous_mets and previous_mets[pk] != met}
+        stale.update(new for old, new in moves
+                     if previous_mets.get(old, DEFAULT_MET) != mets.get(new, DEFAULT_MET))
+        if stale and Workout.objects.filter(exercise_id__in=stale, calories_estimated=True).exists():
+            job = enqueue('recalculate_calories')
+            self.stdout.write(f'MET values changed; queued job #{job.pk} to recalculate estimated calories')
+
+    def relink(self):
+        """
+        Point workouts at the exercises their names match now; returns
+        {(old exercise id, new exercise id): workouts moved}
+        """
+        linked = set(Workout.objects.values_list('exercise_name', 'exercise_id').distinct())
+        matches = resolve(name for name, _ in linked)
+        moved = []
+        moves = {}
+        for name, exercise_id in linked:
+            if matches[name] != exercise_id:
+                workouts = Workout.objects.filter(exercise_name=name, exercise_id=exercise_id)
+                rows = list(workouts.values_list('pk', 'user_id', 'date'))
+                moved.extend(rows)
+                key = (exercise_id, matches[name])
+                moves[key] = moves.get(key, 0) + len(rows)
+                workouts.update(exercise_id=matches[name], updated_at=timezone.now())
+        if moved:
+            entries_bulk_changed.send(sender=Workout, entries=moved, action='update', fields=['exercise'])
+        return moves
+
+    def checksum(self, paths):
+        digest = hashlib.sha256()
+        for path in paths:
+            digest.update(path.name.encode())
+            digest.update(path.read_bytes())
+        return digest.hexdigest()
+
+    def read(self, path):
+        try:
+            with path.open(newline='', encoding='utf-8') as source:
+                return list(csv.DictReader(source))
+        except (OSError, ValueError) as exc:
+            raise CommandError(f'Could not read {path}: {exc}')
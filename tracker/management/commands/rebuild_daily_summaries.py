@@ -0,0 +1,33 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.rollups import rebuild_daily_summaries
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the DailySummary rollup table from the raw workout and meal logs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', dest='usernames', default=[],
+                            help='Only rebuild this user (may be repeated)')
+        parser.add_argument('--chunk-size', type=int, default=200,
+                            help='Number of users rebuilt per transaction')
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('pk')
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+            missing = set(options['usernames']) - set(users.values_list('username', flat=True))
+            if missing:
+                raise CommandError(f"Unknown user(s): {', '.join(sorted(missing))}")
+
+        user_ids = list(users.values_list('pk', flat=True))
+        chunk_size = options['chunk_size']
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilding daily summaries for {len(user_ids)} users...'))
+
+        total = 0
+        for start in range(0, len(user_ids), chunk_size):
+            total += rebuild_daily_summaries(user_ids[start:start + chunk_size])
+
+        self.stdout.write(self.style.SUCCESS(f'Successfully wrote {total} daily summaries!'))
@@ -0,0 +1,39 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.calories import recalculate_calories
+
+
+class Command(BaseCommand):
+    help = "Recomputes estimated workout calories from the exercises' METs and the users' weights"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', dest='usernames', default=[],
+                            help='Only recalculate this user (may be repeated)')
+        parser.add_argument('--include-manual', action='store_true',
+                            help='Also replace calories that were entered by hand')
+        parser.add_argument('--batch-size', type=int, default=50000,
+                            help='Workouts estimated per vectorized batch')
+
+    def handle(self, *args, **options):
+        user_ids = None
+        if options['usernames']:
+            users = User.objects.filter(username__in=options['usernames'])
+            missing = set(options['usernames']) - set(users.values_list('username', flat=True))
+            if missing:
+                raise CommandError(f"Unknown user(s): {', '.join(sorted(missing))}")
+            user_ids = list(users.values_list('pk', flat=True))
+
+        scope = f'{len(user_ids)} users' if user_ids is not None else 'all users'
+        self.stdout.write(self.style.SUCCESS(f'Recalculating estimated calories for {scope}...'))
+
+        started = time.monotonic()
+        updated = recalculate_calories(
+            user_ids, include_manual=options['include_manual'], batch_size=options['batch_size'],
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Updated {updated} workouts in {time.monotonic() - started:.1f}s'
+        ))
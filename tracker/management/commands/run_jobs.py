@@ -0,0 +1,88 @@
+import os
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from tracker.jobs import claim, prune_exports, requeue_stale, run
+
+# Seconds between sweeps for expired export files
+PRUNE_INTERVAL = 5 * 60
+
+
+def _init_process():
+    """Give each pool process its own Django setup and database connections"""
+    django.setup()
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Runs queued background jobs (summary rebuilds, exports, recommendations) and deletes expired exports'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Jobs run at the same time')
+        parser.add_argument('--pool', choices=['thread', 'process'], default='thread',
+                            help='Run jobs in threads, or in processes for CPU-heavy work')
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Seconds to sleep when no job is due')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once no job is due instead of polling forever')
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        worker_id = f'{socket.gethostname()}:{os.getpid()}'
+
+        if options['pool'] == 'process':
+            # Children must not share the parent's open database connections
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_process)
+        else:
+            pool = ThreadPoolExecutor(max_workers=workers)
+
+        pool_size = f"{workers} {'processes' if options['pool'] == 'process' else 'threads'}"
+        self.stdout.write(self.style.SUCCESS(f'Worker {worker_id} running jobs with {pool_size}...'))
+
+        running = {}
+        done = 0
+        pruned_at = None
+        try:
+            while True:
+                requeued = requeue_stale()
+                if requeued:
+                    self.stdout.write(f'Requeued {requeued} stale jobs')
+
+                if pruned_at is None or time.monotonic() - pruned_at >= PRUNE_INTERVAL:
+                    pruned = prune_exports()
+                    pruned_at = time.monotonic()
+                    if pruned:
+                        self.stdout.write(f'Deleted {pruned} expired exports')
+
+                free = workers - len(running)
+                if free:
+                    for job_id in claim(worker_id, free):
+                        running[pool.submit(run, job_id)] = job_id
+
+                if not running:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                finished, _ = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                for future in finished:
+                    job_id = running.pop(future)
+                    done += 1
+                    try:
+                        self.stdout.write(f'Job #{job_id}: {future.result()}')
+                    except Exception as exc:
+                        self.stderr.write(f'Job #{job_id}: worker error {exc!r}')
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping; waiting for running jobs to finish...')
+        finally:
+            pool.shutdown(wait=True)
+            connections.close_all()
+
+        self.stdout.write(self.style.SUCCESS(f'Processed {done} jobs.'))
@@ -0,0 +1,103 @@
+"""
+In-process store of recent request timings, grouped by URL name.
+
+Each process keeps the last REQUEST_METRICS_SAMPLES requests per URL name in
+a ring buffer, so memory use is bounded and the percentiles describe recent
+traffic. With several worker processes every process reports only the
+requests it served itself.
+"""
+import math
+import threading
+from collections import deque
+
+from django.conf import settings
+
+_lock = threading.Lock()
+_samples = {}
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper that times every query and notices repeats.
+    A query is a duplicate when the same SQL ran earlier in the request with
+    the same parameters, and similar when only the parameters differ.
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = {}
+        self.seen = set()
+        self.duplicates = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = self.clock()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += self.clock() - started
+            self.count += 1
+            self.statements[sql] = self.statements.get(sql, 0) + 1
+            try:
+                key = (sql, repr(params))
+            except Exception:
+                key = None
+            if key is not None:
+                if key in self.seen:
+                    self.duplicates += 1
+                self.seen.add(key)
+
+    @property
+    def similar(self):
+        return sum(count - 1 for count in self.statements.values())
+
+    def repeated(self, limit=5):
+        """The most repeated statements, as (count, sql) pairs"""
+        repeats = [(count, sql) for sql, count in self.statements.items() if count > 1]
+        return sorted(repeats, reverse=True)[:limit]
+
+
+def record(url_name, total_ms, sql_ms, queries, duplicates):
+    size = getattr(settings, 'REQUEST_METRICS_SAMPLES', 1000)
+    with _lock:
+        samples = _samples.get(url_name)
+        if samples is None:
+            samples = _samples[url_name] = deque(maxlen=size)
+        samples.append((total_ms, sql_ms, queries, duplicates))
+
+
+def reset():
+    with _lock:
+        _samples.clear()
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def summary():
+    """Per URL name: request count and p50/p95/p99 of total time, SQL time and queries"""
+    with _lock:
+        snapshot = {name: list(samples) for name, samples in _samples.items()}
+
+    rows = []
+    for url_name, samples in sorted(snapshot.items()):
+        total = sorted(sample[0] for sample in samples)
+        sql = sorted(sample[1] for sample in samples)
+        queries = sorted(sample[2] for sample in samples)
+        rows.append({
+            'url_name': url_name,
+            'count': len(samples),
+            'p50_ms': round(percentile(total, 0.50), 1),
+            'p95_ms': round(percentile(total, 0.95), 1),
+            'p99_ms': round(percentile(total, 0.99), 1),
+            'sql_p95_ms': round(percentile(sql, 0.95), 1),
+            'queries_p50': percentile(queries, 0.50),
+            'queries_max': queries[-1],
+            'duplicates_max': max(sample[3] for sample in samples),
+        })
+    return rows
@@ -0,0 +1,83 @@
+"""
+Project middleware.
+
+RequestMetricsMiddleware is opt-in request instrumentation: it times each request and its SQL queries, adds a
+Server-Timing header, logs slow requests as JSON and feeds the per-URL
+percentiles on the staff metrics page. It is switched off unless
+REQUEST_METRICS_ENABLED is set.
+
+CachedAuthenticationMiddleware replaces Django's AuthenticationMiddleware
+and loads request.user through the per-process cache in tracker.users
+when AUTH_USER_CACHE is set.
+"""
+import json
+import logging
+import time
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.utils.functional import SimpleLazyObject
+
+from . import metrics, users
+
+logger = logging.getLogger('tracker.requests')
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, 'REQUEST_METRICS_SLOW_MS', 500)
+
+    def __call__(self, request):
+        recorder = metrics.QueryRecorder(time.perf_counter)
+        started = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - started) * 1000
+        sql_ms = recorder.seconds * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        url_name = (match.view_name if match else None) or 'unresolved'
+        metrics.record(url_name, total_ms, sql_ms, recorder.count, recorder.duplicates)
+
+        response['Server-Timing'] = ', '.join([
+            f'total;dur={total_ms:.1f}',
+            f'sql;dur={sql_ms:.1f};desc="{recorder.count} queries"',
+            f'dup;desc="{recorder.duplicates} duplicate, {recorder.similar} similar queries"',
+        ])
+
+        if total_ms >= self.slow_ms:
+            logger.warning(json.dumps({
+                'event': 'slow_request',
+                'method': request.method,
+                'path': request.path,
+                'url_name': url_name,
+                'status': response.status_code,
+                'user_id': getattr(getattr(request, 'user', None), 'pk', None),
+                'total_ms': round(total_ms, 1),
+                'sql_ms': round(sql_ms, 1),
+                'queries': recorder.count,
+                'duplicates': recorder.duplicates,
+                'similar': recorder.similar,
+                'repeated': [{'count': count, 'sql': sql} for count, sql in recorder.repeated()],
+            }))
+        return response
+
+
+async def _auser(request):
+    if not hasattr(request, '_acached_user'):
+        request._acached_user = await users.aget_user(request)
+    return request._acached_user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    def process_request(self, request):
+        super().process_request(request)
+        if getattr(settings, 'AUTH_USER_CACHE', False):
+            request.user = SimpleLazyObject(lambda: users.get_user(request))
+            request.auser = partial(_auser, request)
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+
+def build_summaries(apps, schema_editor):
+    Workout = apps.get_model('tracker', 'Workout')
+    Meal = apps.get_model('tracker', 'Meal')
+    DailySummary = apps.get_model('tracker', 'DailySummary')
+
+    totals = {}
+    for row in Workout.objects.values('user_id', 'date').annotate(
+        burned=Sum('calories_burned'), count=Count('id')
+    ).order_by():
+        totals.setdefault((row['user_id'], row['date']), {}).update(
+            calories_burned=row['burned'] or 0, workout_count=row['count'],
+        )
+    for row in Meal.objects.values('user_id', 'date').annotate(
+        consumed=Sum('calories'), total_protein=Sum('protein'),
+        total_carbs=Sum('carbs'), total_fats=Sum('fats'), count=Count('id')
+    ).order_by():
+        totals.setdefault((row['user_id'], row['date']), {}).update(
+            calories_consumed=row['consumed'] or 0, protein=row['total_protein'] or 0,
+            carbs=row['total_carbs'] or 0, fats=row['total_fats'] or 0, meal_count=row['count'],
+        )
+
+    now = timezone.now()
+    DailySummary.objects.bulk_create(
+        [DailySummary(user_id=user_id, date=day, updated_at=now, **values)
+         for (user_id, day), values in totals.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('calories_burned', models.IntegerField(default=0)),
+                ('calories_consumed', models.IntegerField(default=0)),
+                ('protein', models.FloatField(default=0)),
+                ('carbs', models.FloatField(default=0)),
+                ('fats', models.FloatField(default=0)),
+                ('workout_count', models.IntegerField(default=0)),
+                ('meal_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'daily summaries',
+                'ordering': ['-date'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'date'), name='unique_daily_summary')],
+            },
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
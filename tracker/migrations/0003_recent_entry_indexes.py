@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0002_dailysummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='meal',
+            index=models.Index(fields=['user', '-date', '-created_at', '-id'], name='meal_user_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workout',
+            index=models.Index(fields=['user', '-date', '-created_at', '-id'], name='workout_user_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def move_system_foods(apps, schema_editor):
+    """Copy the Meal rows owned by the old system_foods user into the catalog"""
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Meal = apps.get_model('tracker', 'Meal')
+    FoodCatalog = apps.get_model('tracker', 'FoodCatalog')
+    CatalogVersion = apps.get_model('tracker', 'CatalogVersion')
+
+    system_user = User.objects.filter(username='system_foods').first()
+    if system_user is not None:
+        foods = {}
+        for meal in Meal.objects.filter(user=system_user).order_by('pk'):
+            foods.setdefault(meal.food_name, FoodCatalog(
+                name=meal.food_name,
+                meal_type=meal.meal_type,
+                calories=meal.calories,
+                protein=meal.protein,
+                carbs=meal.carbs,
+                fats=meal.fats,
+                quantity=meal.quantity,
+            ))
+        FoodCatalog.objects.bulk_create(foods.values())
+        system_user.delete()
+
+    CatalogVersion.objects.create(version=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0003_recent_entry_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FoodCatalog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+                ('meal_type', models.CharField(choices=[('breakfast', 'Breakfast'), ('lunch', 'Lunch'), ('dinner', 'Dinner'), ('snack', 'Snack')], default='snack', max_length=20)),
+                ('calories', models.IntegerField(default=0)),
+                ('protein', models.FloatField(default=0, help_text='Protein in grams')),
+                ('carbs', models.FloatField(default=0, help_text='Carbohydrates in grams')),
+                ('fats', models.FloatField(default=0, help_text='Fats in grams')),
+                ('quantity', models.FloatField(default=1, help_text='Serving size')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'food catalog',
+                'ordering': ['meal_type', 'name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='meal',
+            name='food',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='meals', to='tracker.foodcatalog'),
+        ),
+        migrations.RunPython(move_system_foods, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0004_food_catalog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='catalogversion',
+            name='checksum',
+            field=models.CharField(blank=True, help_text='Checksum of the last loaded catalog data files', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='foodcatalog',
+            name='cuisine',
+            field=models.CharField(blank=True, help_text='Catalog data file the food came from', max_length=50),
+        ),
+    ]
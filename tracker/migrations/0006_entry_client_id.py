@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0005_catalog_checksum'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='meal',
+            name='client_id',
+            field=models.CharField(blank=True, help_text='Idempotency key supplied by API clients', max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='workout',
+            name='client_id',
+            field=models.CharField(blank=True, help_text='Idempotency key supplied by API clients', max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='meal',
+            constraint=models.UniqueConstraint(condition=models.Q(('client_id__isnull', False)), fields=('user', 'client_id'), name='meal_unique_client_id'),
+        ),
+        migrations.AddConstraint(
+            model_name='workout',
+            constraint=models.UniqueConstraint(condition=models.Q(('client_id__isnull', False)), fields=('user', 'client_id'), name='workout_unique_client_id'),
+        ),
+    ]
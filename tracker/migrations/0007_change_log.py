@@ -0,0 +1,58 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_change_log(apps, schema_editor):
+    """Log an upsert for every existing entry so a first sync returns it"""
+    ChangeLog = apps.get_model('tracker', 'ChangeLog')
+    for kind in ('workout', 'meal'):
+        model = apps.get_model('tracker', kind.capitalize())
+        model.objects.update(updated_at=F('created_at'))
+        batch = []
+        for pk, user_id in model.objects.order_by('pk').values_list('pk', 'user_id').iterator(chunk_size=5000):
+            batch.append(ChangeLog(user_id=user_id, kind=kind, object_id=pk, action='upsert'))
+            if len(batch) >= 5000:
+                ChangeLog.objects.bulk_create(batch)
+                batch = []
+        ChangeLog.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0006_entry_client_id'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='meal',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='workout',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.CreateModel(
+            name='ChangeLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('workout', 'Workout'), ('meal', 'Meal')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('action', models.CharField(choices=[('upsert', 'Created or updated'), ('delete', 'Deleted')], max_length=10)),
+                ('changed_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['user', 'id'], name='changelog_user_seq_idx'), models.Index(fields=['kind', 'object_id'], name='changelog_object_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_change_log, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0008_job'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('workout', 'Workout'), ('meal', 'Meal')], max_length=10)),
+                ('year', models.PositiveIntegerField()),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('first_date', models.DateField()),
+                ('last_date', models.DateField()),
+                ('data', models.BinaryField()),
+                ('exercise_totals', models.JSONField(blank=True, default=dict, help_text='Personal record totals of the archived workouts, by exercise id')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['user', 'kind', 'year'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'kind', 'year'), name='unique_archive_chunk')],
+            },
+        ),
+    ]
@@ -0,0 +1,118 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:23
+
+import re
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, Count, F, FloatField, Max, Sum, When
+from django.db.models.functions import Cast
+
+NON_WORD = re.compile(r'[^a-z0-9]+')
+
+
+def link_exercises(apps, schema_editor):
+    """
+    Give every existing workout an exercise, one per spelling as saves do
+    (see tracker.exercises), and build the personal records from them
+    """
+    Workout = apps.get_model('tracker', 'Workout')
+    Exercise = apps.get_model('tracker', 'Exercise')
+    ExerciseAlias = apps.get_model('tracker', 'ExerciseAlias')
+    PersonalRecord = apps.get_model('tracker', 'PersonalRecord')
+
+    exercise_ids = {}
+    for name in Workout.objects.order_by('exercise_name').values_list('exercise_name', flat=True).distinct():
+        key = ' '.join(NON_WORD.sub(' ', (name or '').lower()).split())
+        if not key:
+            continue
+        if key not in exercise_ids:
+            exercise = Exercise.objects.create(name=' '.join(name.split()))
+            ExerciseAlias.objects.create(alias=key, exercise=exercise)
+            exercise_ids[key] = exercise.pk
+        Workout.objects.filter(exercise_name=name).update(exercise_id=exercise_ids[key])
+
+    one_rep_max = Case(
+        When(reps__lte=1, then=F('weight_used')),
+        default=F('weight_used') * (1 + Cast('reps', FloatField()) / 30),
+        output_field=FloatField(),
+    )
+    volume = Cast(F('sets') * F('reps'), FloatField()) * F('weight_used')
+    rows = Workout.objects.filter(exercise__isnull=False).values('user_id', 'exercise_id').annotate(
+        top_weight=Max('weight_used'), top_one_rep_max=Max(one_rep_max), volume=Sum(volume),
+        count=Count('id'), last=Max('date'),
+    ).order_by()
+    PersonalRecord.objects.bulk_create(
+        [PersonalRecord(user_id=row['user_id'], exercise_id=row['exercise_id'], max_weight=row['top_weight'],
+                        best_one_rep_max=row['top_one_rep_max'], total_volume=row['volume'] or 0,
+                        workout_count=row['count'], last_performed=row['last'])
+         for row in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0009_archive_chunk'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Exercise',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+                ('category', models.CharField(choices=[('strength', 'Strength'), ('bodyweight', 'Bodyweight'), ('cardio', 'Cardio'), ('flexibility', 'Flexibility'), ('other', 'Other')], default='other', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='workout',
+            name='exercise',
+            field=models.ForeignKey(blank=True, help_text='Matched from exercise_name when the workout is saved', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='workouts', to='tracker.exercise'),
+        ),
+        migrations.CreateModel(
+            name='ExerciseAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alias', models.CharField(max_length=200, unique=True)),
+                ('exercise', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='tracker.exercise')),
+            ],
+            options={
+                'verbose_name_plural': 'exercise aliases',
+                'ordering': ['alias'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PersonalRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('max_weight', models.FloatField(blank=True, help_text='Heaviest weight in kg', null=True)),
+                ('best_one_rep_max', models.FloatField(blank=True, help_text='Best estimated one-rep max in kg (Epley)', null=True)),
+                ('total_volume', models.FloatField(default=0, help_text='Sum of sets x reps x weight in kg')),
+                ('workout_count', models.IntegerField(default=0)),
+                ('last_performed', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('exercise', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='records', to='tracker.exercise')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['user', 'exercise'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'exercise'), name='unique_personal_record')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ExerciseDataVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('checksum', models.CharField(blank=True, help_text='Checksum of the last loaded exercise data files', max_length=64)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(link_exercises, migrations.RunPython.noop),
+    ]
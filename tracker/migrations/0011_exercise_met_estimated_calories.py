@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0010_exercises_personal_records'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exercise',
+            name='met',
+            field=models.FloatField(blank=True, help_text="Metabolic equivalent; the category's typical value when empty", null=True),
+        ),
+        migrations.AddField(
+            model_name='workout',
+            name='calories_estimated',
+            field=models.BooleanField(default=False, help_text="Calories were computed from the exercise's MET, the duration and the user's weight"),
+        ),
+        migrations.AlterField(
+            model_name='workout',
+            name='calories_burned',
+            field=models.IntegerField(blank=True, default=0, help_text="Leave blank to estimate from the exercise's MET"),
+        ),
+    ]
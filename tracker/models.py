@@ -30,23 +30,93 @@ class UserProfile(models.Model):
         return None
 
 
+class Exercise(models.Model):
+    """
+    Canonical exercise that free-text workout names are matched to
+    """
+    CATEGORY_CHOICES = [
+        ('strength', 'Strength'),
+        ('bodyweight', 'Bodyweight'),
+        ('cardio', 'Cardio'),
+        ('flexibility', 'Flexibility'),
+        ('other', 'Other'),
+    ]
+    
+    name = models.CharField(max_length=200, unique=True)
+    category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default='other')
+    met = models.FloatField(null=True, blank=True,
+                            help_text="Metabolic equivalent; the category's typical value when empty")
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+
+
+class ExerciseAlias(models.Model):
+    """
+    Normalized spelling of an exercise name (see tracker.exercises.normalize)
+    """
+    alias = models.CharField(max_length=200, unique=True)
+    exercise = models.ForeignKey(Exercise, on_delete=models.CASCADE, related_name='aliases')
+    
+    class Meta:
+        ordering = ['alias']
+        verbose_name_plural = 'exercise aliases'
+    
+    def __str__(self):
+        return f"{self.alias} -> {self.exercise.name}"
+
+
+class ExerciseDataVersion(models.Model):
+    """
+    Single row recording which exercise data files load_exercises loaded
+    last, so deploys with unchanged files skip the reload
+    """
+    checksum = models.CharField(max_length=64, blank=True, help_text="Checksum of the last loaded exercise data files")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Exercise data {self.checksum[:12]}"
+
+
 class Workout(models.Model):
     """
     Workout log for tracking exercises
     """
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     exercise_name = models.CharField(max_length=200)
+    exercise = models.ForeignKey(Exercise, on_delete=models.SET_NULL, null=True, blank=True, related_name='workouts',
+                                 help_text="Matched from exercise_name when the workout is saved")
     sets = models.IntegerField(default=1)
     reps = models.IntegerField(default=1)
     weight_used = models.FloatField(help_text="Weight in kg", null=True, blank=True)
-    calories_burned = models.IntegerField(default=0)
+    calories_burned = models.IntegerField(default=0, blank=True,
+                                          help_text="Leave blank to estimate from the exercise's MET")
+    calories_estimated = models.BooleanField(default=False,
+                                             help_text="Calories were computed from the exercise's MET, "
+                                                       "the duration and the user's weight")
     duration = models.IntegerField(help_text="Duration in minutes", default=30)
     notes = models.TextField(blank=True, null=True)
     date = models.DateField(default=timezone.now)
+    client_id = models.CharField(max_length=64, null=True, blank=True,
+                                 help_text="Idempotency key supplied by API clients")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-date', '-created_at']
+        indexes = [
+            # Matches the list ordering so keyset pagination is an index range scan
+            models.Index(fields=['user', '-date', '-created_at', '-id'], name='workout_user_recent_idx'),
+        ]
+        constraints = [
+            # Retried API uploads reuse their keys, so a key is stored at most once per user
+            models.UniqueConstraint(fields=['user', 'client_id'], condition=models.Q(client_id__isnull=False),
+                                    name='workout_unique_client_id'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.exercise_name} on {self.date}"
@@ -65,6 +135,7 @@ class Meal(models.Model):
     
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     meal_type = models.CharField(max_length=20, choices=MEAL_TYPE_CHOICES, default='breakfast')
+    food = models.ForeignKey('FoodCatalog', on_delete=models.SET_NULL, null=True, blank=True, related_name='meals')
     food_name = models.CharField(max_length=200)
     calories = models.IntegerField(default=0)
     protein = models.FloatField(help_text="Protein in grams", default=0)
@@ -73,10 +144,205 @@ class Meal(models.Model):
     quantity = models.FloatField(default=1, help_text="Serving size")
     notes = models.TextField(blank=True, null=True)
     date = models.DateField(default=timezone.now)
+    client_id = models.CharField(max_length=64, null=True, blank=True,
+                                 help_text="Idempotency key supplied by API clients")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-date', '-created_at']
+        indexes = [
+            models.Index(fields=['user', '-date', '-created_at', '-id'], name='meal_user_recent_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'client_id'], condition=models.Q(client_id__isnull=False),
+                                    name='meal_unique_client_id'),
+        ]
     
     def __str__(self):
-        return f"{self.user.username} - {self.food_name} ({self.meal_type}) on {self.date}"
\ No newline at end of file
+        return f"{self.user.username} - {self.food_name} ({self.meal_type}) on {self.date}"
+
+
+
+class FoodCatalog(models.Model):
+    """
+    Shared food template with per-serving macros, used for quick adding meals
+    """
+    name = models.CharField(max_length=200, unique=True)
+    cuisine = models.CharField(max_length=50, blank=True, help_text="Catalog data file the food came from")
+    meal_type = models.CharField(max_length=20, choices=Meal.MEAL_TYPE_CHOICES, default='snack')
+    calories = models.IntegerField(default=0)
+    protein = models.FloatField(help_text="Protein in grams", default=0)
+    carbs = models.FloatField(help_text="Carbohydrates in grams", default=0)
+    fats = models.FloatField(help_text="Fats in grams", default=0)
+    quantity = models.FloatField(default=1, help_text="Serving size")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['meal_type', 'name']
+        verbose_name_plural = 'food catalog'
+    
+    def __str__(self):
+        return self.name
+
+
+class CatalogVersion(models.Model):
+    """
+    Single-row counter bumped whenever the food catalog changes, so
+    per-process catalog caches know when to reload
+    """
+    version = models.PositiveIntegerField(default=0)
+    checksum = models.CharField(max_length=64, blank=True, help_text="Checksum of the last loaded catalog data files")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Catalog v{self.version}"
+
+
+class DailySummary(models.Model):
+    """
+    Per-user, per-day rollup of workouts and meals used by the dashboard
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    date = models.DateField()
+    calories_burned = models.IntegerField(default=0)
+    calories_consumed = models.IntegerField(default=0)
+    protein = models.FloatField(default=0)
+    carbs = models.FloatField(default=0)
+    fats = models.FloatField(default=0)
+    workout_count = models.IntegerField(default=0)
+    meal_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date'], name='unique_daily_summary'),
+        ]
+        verbose_name_plural = 'daily summaries'
+
+    def __str__(self):
+        return f"{self.user.username} - summary for {self.date}"
+
+
+class PersonalRecord(models.Model):
+    """
+    Per-user, per-exercise bests, kept up to date on every workout write
+    (see tracker.records)
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    exercise = models.ForeignKey(Exercise, on_delete=models.CASCADE, related_name='records')
+    max_weight = models.FloatField(help_text="Heaviest weight in kg", null=True, blank=True)
+    best_one_rep_max = models.FloatField(help_text="Best estimated one-rep max in kg (Epley)", null=True, blank=True)
+    total_volume = models.FloatField(help_text="Sum of sets x reps x weight in kg", default=0)
+    workout_count = models.IntegerField(default=0)
+    last_performed = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['user', 'exercise']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'exercise'], name='unique_personal_record'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.exercise.name} records"
+
+
+class ChangeLog(models.Model):
+    """
+    Latest change to each workout or meal, used for delta sync. Every write
+    replaces the entry's previous row, so ids increase in change order and
+    the table holds one row per live entry plus a tombstone per deleted one.
+    """
+    KIND_CHOICES = [
+        ('workout', 'Workout'),
+        ('meal', 'Meal'),
+    ]
+    ACTION_CHOICES = [
+        ('upsert', 'Created or updated'),
+        ('delete', 'Deleted'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    changed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            # Sync reads a user's changes after a given id
+            models.Index(fields=['user', 'id'], name='changelog_user_seq_idx'),
+            models.Index(fields=['kind', 'object_id'], name='changelog_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.action} {self.kind} {self.object_id}"
+
+
+class Job(models.Model):
+    """
+    Background job run by the run_jobs worker (see tracker.jobs)
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100, help_text="Registered job function")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Workers look for due queued jobs and for stuck running ones
+            models.Index(fields=['status', 'run_after'], name='job_status_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+
+class ArchiveChunk(models.Model):
+    """
+    One user's workouts or meals for one year, moved out of the hot tables
+    by the archive_entries command and stored as compressed columns
+    (see tracker.archive)
+    """
+    KIND_CHOICES = ChangeLog.KIND_CHOICES
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    year = models.PositiveIntegerField()
+    row_count = models.PositiveIntegerField(default=0)
+    first_date = models.DateField()
+    last_date = models.DateField()
+    data = models.BinaryField()
+    exercise_totals = models.JSONField(default=dict, blank=True,
+                                       help_text="Personal record totals of the archived workouts, by exercise id")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['user', 'kind', 'year']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'kind', 'year'], name='unique_archive_chunk'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.kind}s {self.year} ({self.row_count} archived)"
@@ -0,0 +1,73 @@
+"""
+Keyset (cursor) pagination for the workout and meal logs.
+
+Pages follow the models' ``-date, -created_at`` ordering with ``-id`` as a
+tie-breaker. The cursor is the sort key of the last row on the previous page,
+so every page is a single index range scan no matter how deep the user scrolls.
+"""
+import base64
+import json
+from collections import namedtuple
+from datetime import date, datetime
+
+from django.db.models import Q
+
+PAGE_SIZE = 20
+ORDERING = ('-date', '-created_at', '-id')
+
+Page = namedtuple('Page', ['items', 'next_cursor'])
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(obj):
+    """Build an opaque cursor pointing just after ``obj``"""
+    key = [obj.date.isoformat(), obj.created_at.isoformat(), obj.pk]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Turn a cursor back into a (date, created_at, id) key"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        day, created_at, pk = json.loads(base64.urlsafe_b64decode(padded))
+        return date.fromisoformat(day), datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, TypeError):
+        raise InvalidCursor(cursor)
+
+
+def after_key(queryset, key):
+    """Restrict ``queryset`` to rows that sort after ``key``"""
+    day, created_at, pk = key
+    return queryset.filter(
+        Q(date__lt=day)
+        | Q(date=day, created_at__lt=created_at)
+        | Q(date=day, created_at=created_at, pk__lt=pk)
+    )
+
+
+def keyset_page(queryset, cursor=None, page_size=PAGE_SIZE, archive=None):
+    """
+    Return one page of ``queryset`` and the cursor for the next page
+    (``None`` on the last page). Raises InvalidCursor for malformed cursors.
+
+    ``archive`` is an optional callable(key, limit, newer_than) returning
+    archived entries after ``key`` in the same order; they are merged in.
+    """
+    key = decode_cursor(cursor) if cursor else None
+    queryset = queryset.order_by(*ORDERING)
+    if key:
+        queryset = after_key(queryset, key)
+
+    items = list(queryset[:page_size + 1])
+    if archive is not None:
+        # A full page of hot rows only needs archived rows that could sort before its last one
+        newer_than = items[-1].date if len(items) > page_size else None
+        items.extend(archive(key, page_size + 1, newer_than))
+        items.sort(key=lambda item: (item.date, item.created_at, item.pk), reverse=True)
+        items = items[:page_size + 1]
+
+    next_cursor = encode_cursor(items[page_size - 1]) if len(items) > page_size else None
+    return Page(items[:page_size], next_cursor)
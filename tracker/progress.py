@@ -0,0 +1,97 @@
+"""
+Chart data for the progress page.
+
+Longer ranges are bucketed by week or month in the database, so a year of
+history is ~52 points from one grouped query over the DailySummary rollups.
+"""
+from datetime import date, timedelta
+
+from django.db.models import Avg, DateField, F, Q
+from django.db.models.functions import TruncMonth, TruncWeek
+
+from .models import DailySummary
+
+# range key -> (days covered or None for all-time, bucket size)
+RANGES = {
+    '7': (7, 'day'),
+    '30': (30, 'day'),
+    '90': (90, 'week'),
+    '365': (365, 'week'),
+    'all': (None, 'month'),
+}
+DEFAULT_RANGE = '7'
+
+
+def bucket_start(day, bucket):
+    """First day of the bucket containing ``day``"""
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(day, bucket):
+    if bucket == 'week':
+        return day + timedelta(days=7)
+    if bucket == 'month':
+        return (day + timedelta(days=32)).replace(day=1)
+    return day + timedelta(days=1)
+
+
+def progress_series(user, range_key=DEFAULT_RANGE, today=None):
+    """
+    Per-bucket averages (per logged day) of calories burned, calories
+    consumed and protein, ready for Chart.js. Intake is averaged over the
+    days with meals, so a workout-only day doesn't read as a day of fasting.
+    """
+    days, bucket = RANGES[range_key]
+    today = today or date.today()
+
+    summaries = DailySummary.objects.filter(user=user, date__lte=today)
+    if days is not None:
+        summaries = summaries.filter(date__gte=today - timedelta(days=days))
+
+    if bucket == 'week':
+        summaries = summaries.annotate(bucket=TruncWeek('date', output_field=DateField()))
+    elif bucket == 'month':
+        summaries = summaries.annotate(bucket=TruncMonth('date', output_field=DateField()))
+    else:
+        summaries = summaries.annotate(bucket=F('date'))
+
+    rows = list(summaries.values('bucket').annotate(
+        burned=Avg('calories_burned'),
+        consumed=Avg('calories_consumed', filter=Q(meal_count__gt=0)),
+        protein=Avg('protein', filter=Q(meal_count__gt=0)),
+    ).order_by('bucket'))
+
+    if days is not None:
+        first = bucket_start(today - timedelta(days=days), bucket)
+    else:
+        first = rows[0]['bucket'] if rows else bucket_start(today, bucket)
+
+    # Every bucket gets a slot, even without data, so the x axis is continuous
+    labels = []
+    current = first
+    while current <= today:
+        labels.append(current)
+        current = next_bucket(current, bucket)
+    index = {day: i for i, day in enumerate(labels)}
+
+    workout_calories = [0] * len(labels)
+    meal_calories = [0] * len(labels)
+    protein_data = [0] * len(labels)
+    for row in rows:
+        i = index[row['bucket']]
+        workout_calories[i] = round(row['burned'] or 0)
+        meal_calories[i] = round(row['consumed'] or 0)
+        protein_data[i] = round(row['protein'] or 0, 1)
+
+    return {
+        'range': range_key,
+        'bucket': bucket,
+        'dates': [day.isoformat() for day in labels],
+        'workout_calories': workout_calories,
+        'meal_calories': meal_calories,
+        'protein_data': protein_data,
+    }
@@ -0,0 +1,183 @@
+"""
+Recommendation engine for the recommendations page.
+
+Window statistics come from one aggregate over the DailySummary rollups and
+are averaged per day, not per logged entry; longer-term trends come from
+tracker.analytics and are in the stats under ``trends``. Each rule is a
+function registered with ``@rule`` that receives the user's profile and the
+stats and returns a recommendation dict or None. Results are cached against
+the user's data version (see tracker.caching).
+"""
+from datetime import date, timedelta
+
+from django.db.models import Count, Q, Sum
+
+from .analytics import history_queryset, summarize
+from .caching import cached_for_user
+from .models import DailySummary
+from .users import get_profile
+
+WINDOW_DAYS = 7
+
+RULES = []
+
+
+def rule(func):
+    """Register a recommendation rule"""
+    RULES.append(func)
+    return func
+
+
+def window_stats(user, days=WINDOW_DAYS, today=None):
+    """
+    Per-day averages over the last ``days`` days. Intake and protein are
+    averaged over days with logged meals, burn over days with any entries.
+    """
+    today = today or date.today()
+    totals = DailySummary.objects.filter(
+        user=user, date__gte=today - timedelta(days=days), date__lte=today
+    ).aggregate(
+        active_days=Count('id'),
+        meal_days=Count('id', filter=Q(meal_count__gt=0)),
+        burned=Sum('calories_burned'),
+        consumed=Sum('calories_consumed'),
+        protein=Sum('protein'),
+        workouts=Sum('workout_count'),
+    )
+
+    active_days = totals['active_days']
+    meal_days = totals['meal_days']
+    return {
+        'avg_calories_burned': (totals['burned'] or 0) / active_days if active_days else 0,
+        'avg_calories_consumed': (totals['consumed'] or 0) / meal_days if meal_days else 0,
+        'avg_protein': (totals['protein'] or 0) / meal_days if meal_days else 0,
+        'workout_count': totals['workouts'] or 0,
+    }
+
+
+@rule
+def calorie_balance(profile, stats):
+    net = stats['avg_calories_consumed'] - stats['avg_calories_burned']
+
+    if profile and profile.fitness_goal == 'lose_weight':
+        target_deficit = 500
+        if net > target_deficit:
+            return {
+                'type': 'warning',
+                'icon': 'fa-fire',
+                'title': 'Calorie Deficit Needed',
+                'message': f'For weight loss, aim for 500 calorie deficit. Currently: {round(net)} calories. Reduce intake by {round(net - target_deficit)} calories.',
+                'action': 'Reduce portion sizes or increase cardio'
+            }
+
+    elif profile and profile.fitness_goal == 'gain_muscle':
+        target_surplus = 300
+        if net < target_surplus:
+            return {
+                'type': 'info',
+                'icon': 'fa-dumbbell',
+                'title': 'Calorie Surplus Needed',
+                'message': f'For muscle gain, aim for 300 calorie surplus. Currently: {round(net)} calories. Increase intake by {round(target_surplus - net)} calories.',
+                'action': 'Add protein-rich meals like eggs, chicken, paneer'
+            }
+    return None
+
+
+@rule
+def protein_intake(profile, stats):
+    if profile and profile.weight:
+        target_protein = profile.weight * 1.6  # 1.6g per kg bodyweight
+        avg_protein = stats['avg_protein']
+        if avg_protein < target_protein:
+            return {
+                'type': 'warning',
+                'icon': 'fa-egg',
+                'title': 'Low Protein Intake',
+                'message': f'Target: {round(target_protein)}g/day. Current: {round(avg_protein)}g/day. Increase by {round(target_protein - avg_protein)}g.',
+                'action': 'Add: Chicken breast (31g), Paneer (18g), Eggs (6g each)'
+            }
+    return None
+
+
+@rule
+def workout_frequency(profile, stats):
+    if stats['workout_count'] < 3:
+        return {
+            'type': 'info',
+            'icon': 'fa-running',
+            'title': 'Increase Workout Frequency',
+            'message': f'You worked out {stats["workout_count"]} times this week. Aim for at least 3-4 sessions for better results.',
+            'action': 'Schedule 3-4 workout days per week'
+        }
+    return None
+
+
+@rule
+def weight_trend(profile, stats):
+    projection = stats['trends']['projection']
+    if not (profile and projection):
+        return None
+    change = projection['change_90_days']
+    balance = projection['balance']
+
+    if profile.fitness_goal == 'lose_weight' and change >= 0:
+        return {
+            'type': 'warning',
+            'icon': 'fa-weight',
+            'title': 'Weight Trending Up',
+            'message': f'At your 28-day average balance ({balance:+} calories/day) you would weigh {projection["in_90_days"]} kg in 90 days ({change:+} kg).',
+            'action': 'Trim intake or add activity until the daily balance is negative'
+        }
+    if profile.fitness_goal == 'gain_muscle' and change <= 0:
+        return {
+            'type': 'info',
+            'icon': 'fa-weight',
+            'title': 'Not Gaining Yet',
+            'message': f'At your 28-day average balance ({balance:+} calories/day) you would weigh {projection["in_90_days"]} kg in 90 days ({change:+} kg).',
+            'action': 'Eat a little more on training days to reach a small surplus'
+        }
+    if profile.fitness_goal == 'maintain' and abs(change) > 2:
+        return {
+            'type': 'info',
+            'icon': 'fa-balance-scale',
+            'title': 'Weight Drifting',
+            'message': f'Your 28-day average balance ({balance:+} calories/day) points to {change:+} kg over 90 days.',
+            'action': 'Match intake to your burn to hold your current weight'
+        }
+    return None
+
+
+DOING_WELL = {
+    'type': 'success',
+    'icon': 'fa-trophy',
+    'title': 'Great Job! Keep It Up! 🎉',
+    'message': 'Your nutrition and workout routine look excellent! You\'re on track to reach your goals.',
+    'action': 'Maintain current habits and stay consistent'
+}
+
+
+def build_recommendations(user, today=None):
+    """Run every registered rule; returns the recommendations page context"""
+    today = today or date.today()
+    profile = get_profile(user)
+    stats = window_stats(user, today=today)
+    stats['trends'] = summarize(list(history_queryset(user, today)), profile, today)
+
+    recommendations = [result for result in (check(profile, stats) for check in RULES) if result]
+    if not recommendations:
+        recommendations.append(DOING_WELL)
+
+    return {
+        'recommendations': recommendations,
+        'avg_calories_burned': round(stats['avg_calories_burned']),
+        'avg_calories_consumed': round(stats['avg_calories_consumed']),
+        'avg_protein': round(stats['avg_protein'], 1),
+        'workout_count': stats['workout_count'],
+        'trends': stats['trends'],
+        'profile': profile,
+    }
+
+
+def get_recommendations(user):
+    """Cached build_recommendations; the key includes today since the window moves daily"""
+    return cached_for_user(user.pk, 'recommendations', lambda: build_recommendations(user), date.today())
@@ -0,0 +1,196 @@
+"""
+Helpers for maintaining the PersonalRecord table.
+
+A new workout can only raise a record, so it is folded into the stored row
+with a single UPDATE. Edits and deletes may lower one, so those recompute
+the affected (user, exercise) pairs from the workouts instead, the same way
+the daily summaries are kept (see tracker.rollups). Archived workouts count
+through the per-exercise totals stored on their chunks when they are
+archived, so recomputes never decompress the archive.
+"""
+from collections import defaultdict
+from datetime import date
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, FloatField, Max, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, Greatest
+from django.utils import timezone
+
+from .models import ArchiveChunk, PersonalRecord, Workout
+from .rollups import as_date
+
+RECORD_FIELDS = ['max_weight', 'best_one_rep_max', 'total_volume', 'workout_count', 'last_performed', 'updated_at']
+
+
+def one_rep_max(weight, reps):
+    """Estimated one-rep max (Epley); a single rep is the lift itself"""
+    if weight is None:
+        return None
+    return weight if reps <= 1 else weight * (1 + reps / 30)
+
+
+# The same formulas in SQL, for grouped recomputes
+ONE_REP_MAX = Case(
+    When(reps__lte=1, then=F('weight_used')),
+    default=F('weight_used') * (1 + Cast('reps', FloatField()) / 30),
+    output_field=FloatField(),
+)
+VOLUME = Cast(F('sets') * F('reps'), FloatField()) * F('weight_used')
+
+
+def _higher(current, value):
+    return value if current is None else current if value is None else max(current, value)
+
+
+def _fold(record, weight, sets, reps, day):
+    """Add one workout to a record's totals dict"""
+    record['workout_count'] = record.get('workout_count', 0) + 1
+    record['last_performed'] = _higher(record.get('last_performed'), day)
+    if weight is not None:
+        record['total_volume'] = record.get('total_volume', 0) + sets * reps * weight
+        record['max_weight'] = _higher(record.get('max_weight'), weight)
+        record['best_one_rep_max'] = _higher(record.get('best_one_rep_max'), one_rep_max(weight, reps))
+    return record
+
+
+def _merge(record, stored):
+    """Add totals stored on an archive chunk to a record's totals dict"""
+    record['workout_count'] = record.get('workout_count', 0) + stored['workout_count']
+    record['last_performed'] = _higher(record.get('last_performed'), date.fromisoformat(stored['last_performed']))
+    record['total_volume'] = record.get('total_volume', 0) + stored.get('total_volume', 0)
+    record['max_weight'] = _higher(record.get('max_weight'), stored.get('max_weight'))
+    record['best_one_rep_max'] = _higher(record.get('best_one_rep_max'), stored.get('best_one_rep_max'))
+    return record
+
+
+def exercise_totals(rows):
+    """
+    {exercise id: totals} over archived workout row dicts, in the JSON form
+    stored on ArchiveChunk.exercise_totals
+    """
+    totals = {}
+    for row in rows:
+        exercise_id = row.get('exercise_id')
+        if exercise_id is not None:
+            _fold(totals.setdefault(str(exercise_id), {}), row['weight_used'], row['sets'], row['reps'], row['date'])
+    for record in totals.values():
+        record['last_performed'] = record['last_performed'].isoformat()
+    return totals
+
+
+def _aggregate(user_ids, exercise_ids=None):
+    """
+    Return {(user_id, exercise_id): totals} for the given users (and
+    optionally exercises) using one grouped query plus one read of the
+    archive chunks' stored totals
+    """
+    totals = {}
+    workouts = Workout.objects.filter(user_id__in=user_ids, exercise__isnull=False)
+    if exercise_ids is not None:
+        workouts = workouts.filter(exercise_id__in=exercise_ids)
+
+    for row in workouts.values('user_id', 'exercise_id').annotate(
+        top_weight=Max('weight_used'),
+        top_one_rep_max=Max(ONE_REP_MAX),
+        volume=Sum(VOLUME),
+        count=Count('id'),
+        last=Max('date'),
+    ).order_by():
+        totals[(row['user_id'], row['exercise_id'])] = {
+            'max_weight': row['top_weight'],
+            'best_one_rep_max': row['top_one_rep_max'],
+            'total_volume': row['volume'] or 0,
+            'workout_count': row['count'],
+            'last_performed': row['last'],
+        }
+
+    chunks = ArchiveChunk.objects.filter(kind='workout', user_id__in=user_ids)
+    for user_id, stored in chunks.values_list('user_id', 'exercise_totals'):
+        for exercise_id, values in stored.items():
+            exercise_id = int(exercise_id)
+            if exercise_ids is None or exercise_id in exercise_ids:
+                _merge(totals.setdefault((user_id, exercise_id), {}), values)
+
+    return totals
+
+
+def _upsert(records, batch_size=1000):
+    PersonalRecord.objects.bulk_create(
+        records,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['user', 'exercise'],
+        update_fields=RECORD_FIELDS,
+    )
+
+
+def record_workout(workout):
+    """Fold a newly created workout into its record with one UPDATE"""
+    if workout.exercise_id is None:
+        return
+    weight = workout.weight_used
+    day = Value(as_date(workout.date))
+    changes = {
+        'workout_count': F('workout_count') + 1,
+        'last_performed': Greatest(Coalesce('last_performed', day), day),
+        'updated_at': timezone.now(),
+    }
+    if weight is not None:
+        weight = float(weight)
+        best = Value(one_rep_max(weight, workout.reps))
+        changes.update(
+            total_volume=F('total_volume') + workout.sets * workout.reps * weight,
+            max_weight=Greatest(Coalesce('max_weight', Value(weight)), Value(weight)),
+            best_one_rep_max=Greatest(Coalesce('best_one_rep_max', best), best),
+        )
+
+    records = PersonalRecord.objects.filter(user_id=workout.user_id, exercise_id=workout.exercise_id)
+    if records.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            PersonalRecord.objects.create(
+                user_id=workout.user_id, exercise_id=workout.exercise_id,
+                **_fold({}, weight, workout.sets, workout.reps, as_date(workout.date)),
+            )
+    except IntegrityError:
+        # Another request created the record first
+        records.update(**changes)
+
+
+def refresh_personal_records(keys):
+    """
+    Recompute the records for an iterable of (user_id, exercise_id) pairs.
+    Records of exercises the user no longer has workouts for are removed.
+    """
+    exercises_by_user = defaultdict(set)
+    for user_id, exercise_id in keys:
+        if exercise_id is not None:
+            exercises_by_user[user_id].add(exercise_id)
+
+    with transaction.atomic():
+        for user_id, exercise_ids in exercises_by_user.items():
+            totals = _aggregate([user_id], exercise_ids)
+            _upsert([
+                PersonalRecord(user_id=user_id, exercise_id=exercise_id, **values)
+                for (_, exercise_id), values in totals.items()
+            ])
+            empty = [exercise_id for exercise_id in exercise_ids if (user_id, exercise_id) not in totals]
+            if empty:
+                PersonalRecord.objects.filter(user_id=user_id, exercise_id__in=empty).delete()
+
+
+def rebuild_personal_records(user_ids, batch_size=1000):
+    """
+    Drop and rebuild every record for the given users.
+    Returns the number of record rows written.
+    """
+    with transaction.atomic():
+        PersonalRecord.objects.filter(user_id__in=user_ids).delete()
+        totals = _aggregate(user_ids)
+        records = [
+            PersonalRecord(user_id=user_id, exercise_id=exercise_id, **values)
+            for (user_id, exercise_id), values in totals.items()
+        ]
+        _upsert(records, batch_size=batch_size)
+    return len(records)
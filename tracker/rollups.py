@@ -0,0 +1,124 @@
+"""
+Helpers for maintaining the DailySummary rollup table.
+
+Summaries are recomputed per (user, date) from the raw Workout and Meal rows,
+so a write only ever touches the handful of days it affected. Rows moved to
+the archive (see tracker.archive) are counted too.
+"""
+from collections import defaultdict
+from datetime import date, datetime
+
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from .archive import archived_day_totals
+from .models import DailySummary, Meal, Workout
+
+SUMMARY_FIELDS = [
+    'calories_burned', 'calories_consumed', 'protein', 'carbs', 'fats',
+    'workout_count', 'meal_count', 'updated_at',
+]
+
+
+def as_date(value):
+    """Normalize a DateField value (which may still be a datetime or a string) to a date"""
+    if isinstance(value, datetime) or not isinstance(value, date):
+        return Workout._meta.get_field('date').to_python(value)
+    return value
+
+
+def _aggregate_days(user_ids, dates=None):
+    """
+    Return {(user_id, date): totals} for the given users (and optionally dates)
+    using one grouped query per table
+    """
+    totals = defaultdict(dict)
+
+    workouts = Workout.objects.filter(user_id__in=user_ids)
+    meals = Meal.objects.filter(user_id__in=user_ids)
+    if dates is not None:
+        workouts = workouts.filter(date__in=dates)
+        meals = meals.filter(date__in=dates)
+
+    for row in workouts.values('user_id', 'date').annotate(
+        burned=Sum('calories_burned'),
+        count=Count('id'),
+    ).order_by():
+        totals[(row['user_id'], row['date'])].update(
+            calories_burned=row['burned'] or 0,
+            workout_count=row['count'],
+        )
+
+    for row in meals.values('user_id', 'date').annotate(
+        consumed=Sum('calories'),
+        total_protein=Sum('protein'),
+        total_carbs=Sum('carbs'),
+        total_fats=Sum('fats'),
+        count=Count('id'),
+    ).order_by():
+        totals[(row['user_id'], row['date'])].update(
+            calories_consumed=row['consumed'] or 0,
+            protein=row['total_protein'] or 0,
+            carbs=row['total_carbs'] or 0,
+            fats=row['total_fats'] or 0,
+            meal_count=row['count'],
+        )
+
+    for key, archived in archived_day_totals(user_ids, dates).items():
+        day = totals[key]
+        for field, value in archived.items():
+            day[field] = day.get(field, 0) + value
+
+    return totals
+
+
+def _upsert(summaries, batch_size=1000):
+    DailySummary.objects.bulk_create(
+        summaries,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['user', 'date'],
+        update_fields=SUMMARY_FIELDS,
+    )
+
+
+def refresh_daily_summaries(keys):
+    """
+    Recompute the summaries for an iterable of (user_id, date) pairs.
+    Days that no longer have any entries are removed.
+    """
+    dates_by_user = defaultdict(set)
+    for user_id, day in keys:
+        dates_by_user[user_id].add(as_date(day))
+
+    with transaction.atomic():
+        for user_id, dates in dates_by_user.items():
+            totals = _aggregate_days([user_id], dates)
+            _upsert([
+                DailySummary(user_id=user_id, date=day, **values)
+                for (_, day), values in totals.items()
+            ])
+            empty = [day for day in dates if (user_id, day) not in totals]
+            if empty:
+                DailySummary.objects.filter(user_id=user_id, date__in=empty).delete()
+
+
+def refresh_daily_summary(user_id, day):
+    """Recompute a single day's summary"""
+    refresh_daily_summaries([(user_id, day)])
+
+
+def rebuild_daily_summaries(user_ids, batch_size=1000):
+    """
+    Drop and rebuild every summary for the given users.
+    Returns the number of summary rows written.
+    """
+    with transaction.atomic():
+        DailySummary.objects.filter(user_id__in=user_ids).delete()
+        totals = _aggregate_days(user_ids)
+        summaries = [
+            DailySummary(user_id=user_id, date=day, **values)
+            for (user_id, day), values in totals.items()
+        ]
+        _upsert(summaries, batch_size=batch_size)
+    return len(summaries)
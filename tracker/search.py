@@ -0,0 +1,156 @@
+"""
+In-memory food search used by the meal form autocomplete.
+
+Food names are indexed by word prefix and by trigram, so lookups never scan
+the meal table. The catalog index is rebuilt lazily whenever the catalog
+version changes; a user's own past foods are cached per data version and
+indexed on the fly since there are only a few hundred of them.
+"""
+import re
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+from .caching import cached_for_user
+from .catalog import get_catalog
+from .models import Meal
+
+RESULT_LIMIT = 10
+MIN_SIMILARITY = 0.45
+USER_FOODS_LIMIT = 500
+
+_non_word = re.compile(r'[^a-z0-9]+')
+
+
+def normalize(text):
+    return _non_word.sub(' ', text.lower()).strip()
+
+
+def trigrams(text):
+    """Word trigrams with pg_trgm style padding"""
+    grams = set()
+    for word in text.split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class FoodIndex:
+    """Prefix and trigram index over a list of food dicts"""
+
+    def __init__(self, foods):
+        self.foods = list(foods)
+        self.names = [normalize(food['name']) for food in self.foods]
+        self.words = sorted(
+            (word, i) for i, name in enumerate(self.names) for word in set(name.split())
+        )
+        self.grams = defaultdict(list)
+        for i, name in enumerate(self.names):
+            for gram in trigrams(name):
+                self.grams[gram].append(i)
+
+    def _prefix_matches(self, token):
+        matches = set()
+        position = bisect_left(self.words, (token,))
+        while position < len(self.words) and self.words[position][0].startswith(token):
+            matches.add(self.words[position][1])
+            position += 1
+        return matches
+
+    def search(self, query, limit=RESULT_LIMIT):
+        """Return [(score, food)] best first"""
+        query = normalize(query)
+        tokens = query.split()
+        if not tokens:
+            return []
+
+        # Entries where every query word prefixes some word of the name
+        prefixed = self._prefix_matches(tokens[0])
+        for token in tokens[1:]:
+            prefixed &= self._prefix_matches(token)
+
+        query_grams = trigrams(query)
+        shared = defaultdict(int)
+        for gram in query_grams:
+            for i in self.grams.get(gram, ()):
+                shared[i] += 1
+
+        results = []
+        for i in prefixed | set(shared):
+            score = shared.get(i, 0) / len(query_grams)
+            if i in prefixed:
+                score += 1
+                if self.names[i].startswith(query):
+                    score += 0.5
+            elif score < MIN_SIMILARITY:
+                continue
+            results.append((score, i))
+
+        results.sort(key=lambda result: (-result[0], len(self.names[result[1]]), self.names[result[1]]))
+        return [(score, self.foods[i]) for score, i in results[:limit]]
+
+
+def _food_dict(obj, source, name_attr):
+    return {
+        'id': obj.pk if source == 'catalog' else obj.food_id,
+        'name': getattr(obj, name_attr),
+        'meal_type': obj.meal_type,
+        'calories': obj.calories,
+        'protein': obj.protein,
+        'carbs': obj.carbs,
+        'fats': obj.fats,
+        'quantity': obj.quantity,
+        'source': source,
+    }
+
+
+_lock = threading.Lock()
+_catalog_index = None
+_catalog_index_version = None
+
+
+def catalog_index():
+    """Index over the cached catalog, rebuilt when the catalog version moves"""
+    global _catalog_index, _catalog_index_version
+
+    catalog = get_catalog()
+    if _catalog_index_version != catalog.version:
+        with _lock:
+            if _catalog_index_version != catalog.version:
+                _catalog_index = FoodIndex(_food_dict(food, 'catalog', 'name') for food in catalog.foods)
+                _catalog_index_version = catalog.version
+    return _catalog_index
+
+
+def _load_user_foods(user_id):
+    seen = {}
+    recent = Meal.objects.filter(user_id=user_id).only(
+        'food', 'food_name', 'meal_type', 'calories', 'protein', 'carbs', 'fats', 'quantity',
+    )[:USER_FOODS_LIMIT]
+    for meal in recent:
+        seen.setdefault(normalize(meal.food_name), _food_dict(meal, 'history', 'food_name'))
+    return list(seen.values())
+
+
+def user_foods(user_id):
+    """Most recent macros for each distinct food the user has logged"""
+    return cached_for_user(user_id, 'user-foods', lambda: _load_user_foods(user_id))
+
+
+def search_foods(user_id, query, limit=RESULT_LIMIT):
+    """
+    Rank the user's own past foods and the catalog together. A user's past
+    entry wins over a catalog food with the same name.
+    """
+    results = {}
+    for score, food in catalog_index().search(query, limit):
+        results[normalize(food['name'])] = (score, food)
+    for score, food in FoodIndex(user_foods(user_id)).search(query, limit):
+        name = normalize(food['name'])
+        # Small boost so the user's own foods rank above equally good catalog hits
+        score += 0.25
+        if name not in results or results[name][0] <= score:
+            results[name] = (score, food)
+
+    ranked = sorted(results.values(), key=lambda result: (-result[0], len(result[1]['name'])))
+    return [food for _, food in ranked[:limit]]
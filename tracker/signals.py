@@ -0,0 +1,233 @@
+"""
+Signal handlers that keep derived tables in sync with Workout and Meal writes
+"""
+import threading
+from contextlib import contextmanager
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from .caching import bump_user_version
+from .calories import apply_estimates
+from .catalog import invalidate_catalog
+from .exercises import resolve
+from .models import FoodCatalog, Meal, UserProfile, Workout
+from .records import rebuild_personal_records, record_workout, refresh_personal_records
+from .rollups import as_date, refresh_daily_summaries
+from .sync import KINDS, record_changes
+
+# Sent after set-based writes (bulk_create, QuerySet.update/delete) that skip
+# the per-row model signals. ``entries`` is a list of (pk, user_id, date)
+# tuples for the rows that were written; ``action`` is 'create', 'update'
+# or 'delete'. Updates may also pass ``fields``, the names of the fields
+# they wrote, so receivers can skip changes that do not concern them. An
+# update that moves rows to another date lists them under both dates.
+entries_bulk_changed = Signal()
+
+
+_state = threading.local()
+
+
+@contextmanager
+def suppress_entry_signals():
+    """
+    Skip the Workout/Meal receivers below for writes made in this block.
+    Use it for set-based writes that update the derived data themselves,
+    either directly or by sending entries_bulk_changed once afterwards.
+    """
+    previous = getattr(_state, 'suppressed', False)
+    _state.suppressed = True
+    try:
+        yield
+    finally:
+        _state.suppressed = previous
+
+
+def _suppressed():
+    return getattr(_state, 'suppressed', False)
+
+
+def _cascaded_from_user(origin):
+    """True when the delete is part of removing the owning user"""
+    if isinstance(origin, QuerySet):
+        return origin.model is User
+    return isinstance(origin, User)
+
+
+@receiver(pre_save, sender=Workout)
+@receiver(pre_save, sender=Meal)
+def remember_previous_day(sender, instance, raw=False, **kwargs):
+    """
+    Remember the stored (user, date), and for workouts the exercise, so edits
+    that move an entry refresh both days and both personal records
+    """
+    instance._previous_summary_key = instance._previous_record_key = None
+    if raw or instance.pk is None or _suppressed():
+        return
+    fields = ['user_id', 'date'] + (['exercise_id'] if sender is Workout else [])
+    previous = sender.objects.filter(pk=instance.pk).values_list(*fields).first()
+    if previous:
+        instance._previous_summary_key = previous[:2]
+        if sender is Workout:
+            instance._previous_record_key = (previous[0], previous[2])
+
+
+@receiver(pre_save, sender=Workout)
+def match_exercise(sender, instance, raw=False, **kwargs):
+    """Link the workout to the canonical exercise its name matches (see tracker.exercises)"""
+    if not raw:
+        instance.exercise_id = resolve([instance.exercise_name]).get(instance.exercise_name)
+
+
+@receiver(pre_save, sender=Workout)
+def estimate_calories(sender, instance, raw=False, **kwargs):
+    """
+    Estimate calories for workouts logged without them (see tracker.calories).
+    A saved estimate is redone if the calories were left as they were, and
+    becomes hand-entered if they were changed.
+    """
+    if raw:
+        return
+    if instance.calories_estimated and instance.calories_burned is not None:
+        stored = None
+        if instance.pk is not None:
+            stored = Workout.objects.filter(pk=instance.pk).values_list('calories_burned', flat=True).first()
+        if instance.calories_burned == stored:
+            instance.calories_burned = None
+        else:
+            instance.calories_estimated = False
+    apply_estimates([instance])
+
+
+@receiver(post_save, sender=Workout)
+@receiver(post_save, sender=Meal)
+def update_summary_on_save(sender, instance, raw=False, **kwargs):
+    if raw or _suppressed():
+        return
+    keys = {(instance.user_id, as_date(instance.date))}
+    previous = getattr(instance, '_previous_summary_key', None)
+    if previous:
+        keys.add(previous)
+    refresh_daily_summaries(keys)
+
+
+@receiver(post_delete, sender=Workout)
+@receiver(post_delete, sender=Meal)
+def update_summary_on_delete(sender, instance, origin=None, **kwargs):
+    if _cascaded_from_user(origin) or _suppressed():
+        return
+    refresh_daily_summaries([(instance.user_id, instance.date)])
+
+
+@receiver(entries_bulk_changed)
+def update_summaries_in_bulk(sender, entries, **kwargs):
+    refresh_daily_summaries((user_id, day) for _, user_id, day in entries)
+
+
+@receiver(post_save, sender=Workout)
+def update_records_on_save(sender, instance, created=False, raw=False, **kwargs):
+    """A new workout can only raise its record; an edit may lower either record it touches"""
+    if raw or _suppressed():
+        return
+    if created:
+        record_workout(instance)
+        return
+    keys = {(instance.user_id, instance.exercise_id)}
+    previous = getattr(instance, '_previous_record_key', None)
+    if previous:
+        keys.add(previous)
+    refresh_personal_records(keys)
+
+
+@receiver(post_delete, sender=Workout)
+def update_records_on_delete(sender, instance, origin=None, **kwargs):
+    if _cascaded_from_user(origin) or _suppressed():
+        return
+    refresh_personal_records([(instance.user_id, instance.exercise_id)])
+
+
+# Workout fields that personal records are computed from
+RECORD_SOURCES = {'user', 'exercise_name', 'exercise', 'exercise_id', 'sets', 'reps', 'weight_used', 'date'}
+
+
+@receiver(entries_bulk_changed, sender=Workout)
+def update_records_in_bulk(sender, entries, action, fields=None, **kwargs):
+    if action == 'update' and fields is not None and not RECORD_SOURCES.intersection(fields):
+        return
+    if action == 'create':
+        keys = Workout.objects.filter(pk__in=[pk for pk, _, _ in entries]).values_list('user_id', 'exercise_id')
+        refresh_personal_records(keys.distinct())
+    else:
+        # The rows' previous exercises are unknown, so redo the users' records
+        rebuild_personal_records({user_id for _, user_id, _ in entries})
+
+
+def _bump_on_commit(user_ids):
+    """
+    Bump once the write is visible. A bump inside the transaction lets a
+    concurrent request cache the old rows under the new version.
+    """
+    def bump():
+        for user_id in user_ids:
+            bump_user_version(user_id)
+    transaction.on_commit(bump)
+
+
+@receiver(post_save, sender=Workout)
+@receiver(post_save, sender=Meal)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=Workout)
+@receiver(post_delete, sender=Meal)
+@receiver(post_delete, sender=UserProfile)
+def bump_version_on_write(sender, instance, raw=False, **kwargs):
+    """Invalidate everything cached for the user (see tracker.caching)"""
+    if not raw and not _suppressed():
+        _bump_on_commit([instance.user_id])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def bump_version_on_user_write(sender, instance, raw=False, update_fields=None, **kwargs):
+    """The cached request.user is checked against the same version (see tracker.users)"""
+    # Every login stamps last_login; nothing cached depends on it
+    if not raw and update_fields != {'last_login'}:
+        _bump_on_commit([instance.pk])
+
+
+@receiver(entries_bulk_changed)
+def bump_version_in_bulk(sender, entries, **kwargs):
+    _bump_on_commit({user_id for _, user_id, _ in entries})
+
+
+@receiver(post_save, sender=Workout)
+@receiver(post_save, sender=Meal)
+def log_change_on_save(sender, instance, raw=False, **kwargs):
+    """Record the write for delta sync (see tracker.sync)"""
+    if not raw and not _suppressed():
+        record_changes(KINDS[sender], [(instance.pk, instance.user_id)], 'upsert')
+
+
+@receiver(post_delete, sender=Workout)
+@receiver(post_delete, sender=Meal)
+def log_change_on_delete(sender, instance, origin=None, **kwargs):
+    if not _cascaded_from_user(origin) and not _suppressed():
+        record_changes(KINDS[sender], [(instance.pk, instance.user_id)], 'delete')
+
+
+@receiver(entries_bulk_changed)
+def log_changes_in_bulk(sender, entries, action, **kwargs):
+    record_changes(
+        KINDS[sender],
+        list(dict.fromkeys((pk, user_id) for pk, user_id, _ in entries)),
+        'delete' if action == 'delete' else 'upsert',
+    )
+
+
+@receiver(post_save, sender=FoodCatalog)
+@receiver(post_delete, sender=FoodCatalog)
+def catalog_changed(sender, raw=False, **kwargs):
+    if not raw:
+        invalidate_catalog()
@@ -0,0 +1,164 @@
+// Add and delete entries in the background: for these requests the server
+// answers with just the new card (or 204 for a delete) instead of a redirect
+// and a whole page. Without JS the same forms and links redirect as before.
+
+function postFragment(url, body) {
+    return fetch(url, {
+        method: 'POST',
+        body: body,
+        headers: {
+            'X-Requested-With': 'XMLHttpRequest',
+            'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value,
+        },
+    });
+}
+
+// Same markup as the messages in base.html
+function showFlash(text, level = 'success') {
+    const alert = document.createElement('div');
+    alert.className = `alert alert-${level} alert-dismissible fade show`;
+    alert.setAttribute('role', 'alert');
+    alert.innerHTML = `<i class="fas fa-${level === 'success' ? 'check' : 'exclamation'}-circle me-2"></i> <span></span>` +
+        '<button type="button" class="btn-close btn-close-white" data-bs-dismiss="alert"></button>';
+    alert.querySelector('span').textContent = text;
+    document.querySelector('.content-wrapper').prepend(alert);
+}
+
+function showCard(containerId, html) {
+    const template = document.createElement('template');
+    template.innerHTML = html.trim();
+    document.getElementById(containerId).prepend(template.content);
+}
+
+function replaceCards(html) {
+    const template = document.createElement('template');
+    template.innerHTML = html.trim();
+    template.content.querySelectorAll('[data-card]').forEach(card => {
+        const current = document.querySelector(`[data-card="${card.dataset.card}"]`);
+        if (current) {
+            current.replaceWith(card);
+        }
+    });
+}
+
+function selectedBoxes(form) {
+    return document.querySelectorAll(`input[name="ids"][form="${form.id}"]`);
+}
+
+document.addEventListener('submit', function(e) {
+    const form = e.target;
+
+    // Delete buttons on entry cards remove the card in place
+    if (form.matches('[data-delete-card]')) {
+        e.preventDefault();
+        postFragment(form.action, new FormData(form))
+            .then(response => {
+                if (response.status !== 204) {
+                    throw new Error(response.status);
+                }
+                form.closest('[data-card]').remove();
+                showFlash(form.dataset.message);
+            })
+            .catch(() => {
+                form.submit();
+            });
+    }
+
+    // Add forms stay open for the next entry and list what was saved below
+    if (form.matches('[data-add-form]')) {
+        e.preventDefault();
+        postFragment(form.action, new FormData(form))
+            .then(response => {
+                if (response.status === 400) {
+                    // Let the server render the page with the form errors
+                    form.submit();
+                    return;
+                }
+                if (response.status !== 201) {
+                    throw new Error(response.status);
+                }
+                return response.text().then(html => {
+                    showCard(form.dataset.cards, html);
+                    form.reset();
+                    showFlash(form.dataset.message);
+                });
+            })
+            .catch(() => {
+                showFlash('Could not save, please try again.', 'danger');
+            });
+    }
+});
+
+// Bulk actions apply to the cards ticked on a list page
+document.addEventListener('submit', function(e) {
+    const form = e.target;
+    if (!form.matches('[data-bulk-form]')) {
+        return;
+    }
+    e.preventDefault();
+    const body = new FormData(form);
+    body.append(e.submitter.name, e.submitter.value);
+    postFragment(form.action, body)
+        .then(response => response.json().then(data => ({ status: response.status, data: data })))
+        .then(({ status, data }) => {
+            if (status === 400) {
+                showFlash(Object.values(data.errors).flat().join(' '), 'danger');
+                return;
+            }
+            if (status !== 200) {
+                throw new Error(status);
+            }
+            const ids = data.deleted || data.updated;
+            if (data.deleted) {
+                ids.forEach(id => document.querySelector(`[data-card="${id}"]`).remove());
+            } else {
+                replaceCards(data.html);
+            }
+            selectedBoxes(form).forEach(box => {
+                box.checked = false;
+            });
+            form.querySelector('[data-select-all]').checked = false;
+            const noun = form.dataset.noun + (ids.length === 1 ? '' : 's');
+            showFlash(`${data.deleted ? 'Deleted' : 'Updated'} ${ids.length} ${noun}.`);
+        })
+        .catch(() => {
+            showFlash('Could not apply the changes, please try again.', 'danger');
+        });
+});
+
+// "Select all" ticks every card loaded so far
+document.querySelectorAll('[data-select-all]').forEach(selectAll => {
+    selectAll.closest('.form-check').hidden = false;
+    selectAll.addEventListener('change', function() {
+        selectedBoxes(selectAll.form).forEach(box => {
+            box.checked = selectAll.checked;
+        });
+    });
+});
+
+// Quick-add links log the food and show its card without leaving the page
+document.addEventListener('click', function(e) {
+    const link = e.target.closest('[data-quick-add]');
+    if (!link) {
+        return;
+    }
+    e.preventDefault();
+    link.classList.add('disabled');
+    postFragment(link.href)
+        .then(response => {
+            if (response.status !== 201) {
+                throw new Error(response.status);
+            }
+            return response.text();
+        })
+        .then(html => {
+            showCard(link.dataset.cards, html);
+            showFlash(link.dataset.message);
+        })
+        .catch(() => {
+            showFlash('Could not add this food, please try again.', 'danger');
+        })
+        .finally(() => {
+            link.classList.remove('disabled');
+        });
+});
@@ -0,0 +1,31 @@
+// Infinite scroll: fetch the next page of cards instead of following the link
+const loadMore = document.getElementById('load-more');
+const cards = document.getElementById(loadMore.dataset.cards);
+
+loadMore.addEventListener('click', function(e) {
+    e.preventDefault();
+    loadMore.classList.add('disabled');
+
+    fetch(loadMore.dataset.feedUrl + '?cursor=' + encodeURIComponent(loadMore.dataset.cursor))
+        .then(response => response.json())
+        .then(data => {
+            cards.insertAdjacentHTML('beforeend', data.html);
+            if (data.next_cursor) {
+                loadMore.dataset.cursor = data.next_cursor;
+                loadMore.href = '?cursor=' + data.next_cursor;
+                loadMore.classList.remove('disabled');
+            } else {
+                loadMore.remove();
+            }
+        })
+        .catch(() => {
+            window.location = loadMore.href;
+        });
+});
+
+// Load the next page automatically when the button scrolls into view
+new IntersectionObserver(entries => {
+    if (entries[0].isIntersecting && !loadMore.classList.contains('disabled')) {
+        loadMore.click();
+    }
+}).observe(loadMore);
@@ -0,0 +1,89 @@
+// Food database search
+const foodSearch = document.getElementById('foodSearch');
+const searchResults = document.getElementById('searchResults');
+const foodInput = document.querySelector('input[name="food"]');
+const foodNameInput = document.querySelector('input[name="food_name"]');
+const caloriesInput = document.querySelector('input[name="calories"]');
+const proteinInput = document.querySelector('input[name="protein"]');
+const carbsInput = document.querySelector('input[name="carbs"]');
+const fatsInput = document.querySelector('input[name="fats"]');
+const quantityInput = document.querySelector('input[name="quantity"]');
+
+let searchTimer = null;
+let latestQuery = '';
+
+// Search functionality - ranked matches come from the server
+foodSearch.addEventListener('input', function() {
+    const searchTerm = this.value.trim();
+    clearTimeout(searchTimer);
+
+    if (searchTerm.length < 2) {
+        searchResults.classList.remove('show');
+        return;
+    }
+
+    searchTimer = setTimeout(() => {
+        latestQuery = searchTerm;
+        fetch(foodSearch.dataset.searchUrl + '?q=' + encodeURIComponent(searchTerm))
+            .then(response => response.json())
+            .then(data => {
+                // Ignore responses for queries the user has already typed past
+                if (searchTerm === latestQuery) {
+                    showResults(data.foods);
+                }
+            })
+            .catch(error => {
+                console.log('Could not search foods:', error);
+            });
+    }, 150);
+});
+
+function showResults(matches) {
+    if (matches.length === 0) {
+        searchResults.innerHTML = '<div class="search-item">No foods found. Try "Dosa", "Chicken", "Rice"</div>';
+        searchResults.classList.add('show');
+        return;
+    }
+
+    searchResults.innerHTML = '';
+    matches.forEach(food => {
+        const item = document.createElement('div');
+        item.className = 'search-item';
+
+        const name = document.createElement('strong');
+        name.textContent = food.name + (food.source === 'history' ? ' (logged before)' : '');
+        const macros = document.createElement('small');
+        macros.textContent = `Cal: ${food.calories} | P: ${food.protein}g | C: ${food.carbs}g | F: ${food.fats}g`;
+        item.append(name, macros);
+
+        // Auto-fill form
+        item.addEventListener('click', function() {
+            foodInput.value = food.id || '';
+            foodNameInput.value = food.name;
+            foodSearch.value = food.name;
+            caloriesInput.value = food.calories;
+            proteinInput.value = food.protein;
+            carbsInput.value = food.carbs;
+            fatsInput.value = food.fats;
+            quantityInput.value = food.quantity;
+
+            // Hide results
+            searchResults.classList.remove('show');
+        });
+        searchResults.appendChild(item);
+    });
+
+    searchResults.classList.add('show');
+}
+
+// Typing a different name by hand unlinks the catalog food
+foodNameInput.addEventListener('input', function() {
+    foodInput.value = '';
+});
+
+// Hide results when clicking outside
+document.addEventListener('click', function(e) {
+    if (!searchResults.contains(e.target) && e.target !== foodSearch) {
+        searchResults.classList.remove('show');
+    }
+});
@@ -0,0 +1,39 @@
+// Queue the export as a background job and poll until the file is ready
+const exportButton = document.getElementById('background-export');
+const exportStatus = document.getElementById('export-status');
+
+function showExportStatus(html) {
+    exportStatus.hidden = false;
+    exportStatus.innerHTML = html;
+}
+
+function pollExport(statusUrl) {
+    fetch(statusUrl)
+        .then(response => response.json())
+        .then(job => {
+            if (job.status === 'succeeded') {
+                showExportStatus('<a href="' + job.download_url + '"><i class="fas fa-download"></i> Your export is ready</a>');
+                exportButton.disabled = false;
+            } else if (job.status === 'failed') {
+                showExportStatus('Export failed, please try again.');
+                exportButton.disabled = false;
+            } else {
+                showExportStatus('<i class="fas fa-spinner fa-spin"></i> Preparing export (' + job.status + ')...');
+                setTimeout(() => pollExport(statusUrl), 2000);
+            }
+        });
+}
+
+exportButton.addEventListener('click', function() {
+    exportButton.disabled = true;
+    fetch(exportButton.dataset.startUrl, {
+        method: 'POST',
+        headers: {'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value},
+    })
+        .then(response => response.json())
+        .then(job => pollExport(job.status_url))
+        .catch(() => {
+            showExportStatus('Could not start the export.');
+            exportButton.disabled = false;
+        });
+});
@@ -0,0 +1,199 @@
+// Prepare data from Django
+let series = JSON.parse(document.getElementById('progressSeries').textContent);
+
+// Format bucket start dates for display
+function formatDates(series) {
+    return series.dates.map(date => {
+        const d = new Date(date + 'T00:00:00');
+        if (series.bucket === 'month') {
+            return d.toLocaleDateString('en-US', { month: 'short', year: 'numeric' });
+        }
+        return d.toLocaleDateString('en-US', { month: 'short', day: 'numeric' });
+    });
+}
+const formattedDates = formatDates(series);
+const workoutCalories = series.workout_calories;
+const mealCalories = series.meal_calories;
+const proteinData = series.protein_data;
+
+// Calories Chart
+const ctxCalories = document.getElementById('caloriesChart').getContext('2d');
+const caloriesChart = new Chart(ctxCalories, {
+    type: 'line',
+    data: {
+        labels: formattedDates,
+        datasets: [
+            {
+                label: 'Calories Burned',
+                data: workoutCalories,
+                borderColor: 'rgb(255, 159, 64)',
+                backgroundColor: 'rgba(255, 159, 64, 0.2)',
+                borderWidth: 3,
+                fill: true,
+                tension: 0.4
+            },
+            {
+                label: 'Calories Consumed',
+                data: mealCalories,
+                borderColor: 'rgb(75, 192, 192)',
+                backgroundColor: 'rgba(75, 192, 192, 0.2)',
+                borderWidth: 3,
+                fill: true,
+                tension: 0.4
+            }
+        ]
+    },
+    options: {
+        responsive: true,
+        maintainAspectRatio: true,
+        plugins: {
+            legend: {
+                labels: {
+                    color: 'white',
+                    font: { size: 14 }
+                }
+            }
+        },
+        scales: {
+            y: {
+                beginAtZero: true,
+                ticks: { color: 'white' },
+                grid: { color: 'rgba(255, 255, 255, 0.1)' }
+            },
+            x: {
+                ticks: { color: 'white' },
+                grid: { color: 'rgba(255, 255, 255, 0.1)' }
+            }
+        }
+    }
+});
+
+// Protein Chart
+const ctxProtein = document.getElementById('proteinChart').getContext('2d');
+const proteinChart = new Chart(ctxProtein, {
+    type: 'bar',
+    data: {
+        labels: formattedDates,
+        datasets: [{
+            label: 'Protein (grams)',
+            data: proteinData,
+            backgroundColor: 'rgba(255, 99, 132, 0.6)',
+            borderColor: 'rgb(255, 99, 132)',
+            borderWidth: 2
+        }]
+    },
+    options: {
+        responsive: true,
+        maintainAspectRatio: true,
+        plugins: {
+            legend: {
+                labels: {
+                    color: 'white',
+                    font: { size: 14 }
+                }
+            }
+        },
+        scales: {
+            y: {
+                beginAtZero: true,
+                ticks: { color: 'white' },
+                grid: { color: 'rgba(255, 255, 255, 0.1)' }
+            },
+            x: {
+                ticks: { color: 'white' },
+                grid: { color: 'rgba(255, 255, 255, 0.1)' }
+            }
+        }
+    }
+});
+
+// Trend charts cover fixed windows, independent of the range picker
+const trends = JSON.parse(document.getElementById('progressTrends').textContent);
+const chartOptions = {
+    responsive: true,
+    maintainAspectRatio: true,
+    plugins: {
+        legend: {
+            labels: {
+                color: 'white',
+                font: { size: 14 }
+            }
+        }
+    },
+    scales: {
+        y: {
+            ticks: { color: 'white' },
+            grid: { color: 'rgba(255, 255, 255, 0.1)' }
+        },
+        x: {
+            ticks: { color: 'white' },
+            grid: { color: 'rgba(255, 255, 255, 0.1)' }
+        }
+    }
+};
+const shortDate = date => new Date(date + 'T00:00:00').toLocaleDateString('en-US', { month: 'short', day: 'numeric' });
+
+if (document.getElementById('rollingChart')) {
+    new Chart(document.getElementById('rollingChart').getContext('2d'), {
+        type: 'line',
+        data: {
+            labels: trends.rolling.dates.map(shortDate),
+            datasets: [
+                { label: 'Intake (28-day)', data: trends.rolling.intake_28, borderColor: 'rgb(75, 192, 192)', borderWidth: 2, pointRadius: 0, tension: 0.3 },
+                { label: 'Burn (28-day)', data: trends.rolling.burn_28, borderColor: 'rgb(255, 159, 64)', borderWidth: 2, pointRadius: 0, tension: 0.3 },
+                { label: 'Net (7-day)', data: trends.rolling.net_7, borderColor: 'rgba(255, 99, 132, 0.6)', borderWidth: 1, borderDash: [4, 4], pointRadius: 0, tension: 0.3 },
+                { label: 'Net (28-day)', data: trends.rolling.net_28, borderColor: 'rgb(255, 99, 132)', borderWidth: 3, pointRadius: 0, tension: 0.3 }
+            ]
+        },
+        options: chartOptions
+    });
+}
+
+if (document.getElementById('projectionChart')) {
+    new Chart(document.getElementById('projectionChart').getContext('2d'), {
+        type: 'line',
+        data: {
+            labels: trends.projection.dates.map(shortDate),
+            datasets: [{
+                label: 'Projected weight (kg)',
+                data: trends.projection.weights,
+                borderColor: 'rgb(153, 102, 255)',
+                backgroundColor: 'rgba(153, 102, 255, 0.2)',
+                borderWidth: 3,
+                fill: true,
+                tension: 0.4
+            }]
+        },
+        options: chartOptions
+    });
+}
+
+// Switch ranges without reloading the page
+const rangePicker = document.getElementById('rangePicker');
+rangePicker.querySelectorAll('a').forEach(link => {
+    link.addEventListener('click', function(e) {
+        e.preventDefault();
+        fetch(rangePicker.dataset.dataUrl + '?range=' + this.dataset.range)
+            .then(response => response.json())
+            .then(data => {
+                series = data;
+                const labels = formatDates(data);
+                caloriesChart.data.labels = labels;
+                caloriesChart.data.datasets[0].data = data.workout_calories;
+                caloriesChart.data.datasets[1].data = data.meal_calories;
+                caloriesChart.update();
+                proteinChart.data.labels = labels;
+                proteinChart.data.datasets[0].data = data.protein_data;
+                proteinChart.update();
+
+                rangePicker.querySelectorAll('a').forEach(other => {
+                    other.classList.toggle('btn-primary', other === link);
+                    other.classList.toggle('btn-outline-primary', other !== link);
+                });
+                history.replaceState(null, '', '?range=' + data.range);
+            })
+            .catch(() => {
+                window.location = link.href;
+            });
+    });
+});
@@ -0,0 +1,115 @@
+"""
+Delta sync of a user's workouts and meals.
+
+Writes are recorded in the ChangeLog table (see tracker.signals). A sync
+token is a signed ChangeLog id: the client sends back the token from its
+last response and gets only the changes after it, in pages of at most
+``limit`` changes. Without a token every live entry is returned, so the
+first sync is a full download.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+
+from .archive import find_entries
+from .models import ChangeLog, Meal, Workout
+
+MODELS = {'workout': Workout, 'meal': Meal}
+KINDS = {model: kind for kind, model in MODELS.items()}
+FIELDS = {
+    'workout': ['id', 'date', 'exercise_name', 'exercise_id', 'sets', 'reps', 'weight_used', 'calories_burned',
+                'duration', 'notes', 'client_id', 'created_at', 'updated_at'],
+    'meal': ['id', 'date', 'meal_type', 'food_id', 'food_name', 'calories', 'protein', 'carbs',
+             'fats', 'quantity', 'notes', 'client_id', 'created_at', 'updated_at'],
+}
+PAGE_SIZE = 500
+MAX_PAGE_SIZE = 2000
+TOKEN_SALT = 'tracker.sync'
+# Ids per DELETE, well below the bound-parameter limits of every backend
+DELETE_CHUNK = 900
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+def encode_token(seq):
+    return signing.dumps(seq, salt=TOKEN_SALT, compress=True)
+
+
+def decode_token(token):
+    try:
+        seq = signing.loads(token, salt=TOKEN_SALT)
+    except signing.BadSignature:
+        raise InvalidToken(token)
+    if not isinstance(seq, int):
+        raise InvalidToken(token)
+    return seq
+
+
+def record_changes(kind, entries, action):
+    """
+    Log ``action`` ('upsert' or 'delete') for ``entries``, a list of
+    (pk, user_id) pairs, replacing any earlier rows for the same entries
+    """
+    ids = [pk for pk, _ in entries]
+    for start in range(0, len(ids), DELETE_CHUNK):
+        ChangeLog.objects.filter(kind=kind, object_id__in=ids[start:start + DELETE_CHUNK]).delete()
+    ChangeLog.objects.bulk_create([
+        ChangeLog(user_id=user_id, kind=kind, object_id=pk, action=action)
+        for pk, user_id in entries
+    ])
+
+
+def changes_since(user_id, token=None, limit=PAGE_SIZE):
+    """
+    One page of the user's changes after ``token``. Returns a dict with the
+    changes (upserts carry the current row), the token for the next request
+    and whether more changes are waiting.
+    """
+    seq = decode_token(token) if token else 0
+    log = ChangeLog.objects.filter(user_id=user_id, id__gt=seq)
+
+    # Ids are handed out when a row is inserted, not when its transaction
+    # commits, so very recent rows may still have lower ids committing
+    # behind them. Holding them back keeps a client from skipping those.
+    settle = getattr(settings, 'SYNC_SETTLE_SECONDS', 2)
+    if settle:
+        log = log.filter(changed_at__lte=timezone.now() - timedelta(seconds=settle))
+
+    rows = list(log.order_by('id').values_list('id', 'kind', 'object_id', 'action')[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    wanted = {kind: [] for kind in MODELS}
+    for _, kind, object_id, action in rows:
+        if action == 'upsert':
+            wanted[kind].append(object_id)
+    current = {}
+    for kind, ids in wanted.items():
+        if ids:
+            queryset = MODELS[kind].objects.filter(user_id=user_id, pk__in=ids).values(*FIELDS[kind])
+            current[kind] = {row['id']: row for row in queryset}
+            # Entries moved to the archive still exist as far as clients are concerned
+            missing = set(ids) - set(current[kind])
+            if missing:
+                for pk, row in find_entries(user_id, kind, missing).items():
+                    current[kind][pk] = {name: row.get(name) for name in FIELDS[kind]}
+
+    changes = []
+    for change_id, kind, object_id, action in rows:
+        data = current.get(kind, {}).get(object_id) if action == 'upsert' else None
+        # An entry deleted since its row was read goes out as a tombstone
+        change = {'seq': change_id, 'kind': kind, 'id': object_id,
+                  'action': 'upsert' if data is not None else 'delete'}
+        if data is not None:
+            change['data'] = data
+        changes.append(change)
+
+    return {
+        'changes': changes,
+        'next': encode_token(rows[-1][0] if rows else seq),
+        'has_more': has_more,
+    }
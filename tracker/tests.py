@@ -1,3 +1,1290 @@
-from django.test import TestCase
+"""
+Tests for the tracker app.
 
-# Create your tests here.
+Derived tables are compared against a from-scratch rebuild after each kind
+of write.
+"""
+import json
+import os
+import re
+import tempfile
+import time
+from datetime import date, timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.contrib.staticfiles import finders
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import analytics, bulk, caching, catalog, jobs, metrics, recommendations, search, users
+from .models import (ArchiveChunk, CatalogVersion, ChangeLog, DailySummary, Exercise, ExerciseAlias, FoodCatalog, Job,
+                     Meal, PersonalRecord, UserProfile, Workout)
+from .pagination import PAGE_SIZE
+from .progress import bucket_start, next_bucket
+from .records import rebuild_personal_records
+from .rollups import rebuild_daily_summaries
+
+SUMMARY_FIELDS = ['date', 'calories_burned', 'calories_consumed', 'protein', 'carbs', 'fats',
+                  'workout_count', 'meal_count']
+RECORD_FIELDS = ['exercise__name', 'max_weight', 'best_one_rep_max', 'total_volume', 'workout_count', 'last_performed']
+
+TEST_SETTINGS = override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    STORAGES={
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    },
+    SESSION_ENGINE='django.contrib.sessions.backends.db',
+    CATALOG_VERSION_CHECK_SECONDS=0,
+    JOB_WORKER=True,
+)
+
+
+@TEST_SETTINGS
+class TrackerTestCase(TestCase):
+    """
+    Logs in a fresh user with empty caches. The test's transaction never
+    commits, so writes that should invalidate caches run under committed().
+    """
+
+    def setUp(self):
+        cache.clear()
+        users._users.clear()
+        users._profiles.clear()
+        # Catalog versions restart with each test's rolled back database
+        catalog._catalog = None
+        search._catalog_index_version = None
+        self.user = User.objects.create_user('alice', password='not-a-real-password')
+        self.client.force_login(self.user)
+
+    def committed(self):
+        """Run the on_commit callbacks (cache version bumps) of the writes inside"""
+        return self.captureOnCommitCallbacks(execute=True)
+
+    def workout(self, days_ago=0, **fields):
+        fields = {'exercise_name': 'Bench Press', 'sets': 3, 'reps': 5, 'weight_used': 80, **fields}
+        with self.committed():
+            return Workout.objects.create(user=self.user, date=date.today() - timedelta(days=days_ago), **fields)
+
+    def meal(self, days_ago=0, **fields):
+        fields = {'meal_type': 'lunch', 'food_name': 'Dal', 'calories': 300, 'protein': 12.5, 'carbs': 40.2,
+                  'fats': 8.1, **fields}
+        with self.committed():
+            return Meal.objects.create(user=self.user, date=date.today() - timedelta(days=days_ago), **fields)
+
+    def snapshot(self, model, fields):
+        """The user's rows of a derived table, floats rounded past summation noise"""
+        rows = model.objects.filter(user=self.user).order_by(*fields[:2]).values_list(*fields)
+        return [tuple(round(value, 6) if isinstance(value, float) else value for value in row) for row in rows]
+
+    def assertMatchesRebuild(self, model, rebuild, fields):
+        """The incrementally maintained rows equal a from-scratch rebuild"""
+        maintained = self.snapshot(model, fields)
+        rebuild([self.user.pk])
+        self.assertEqual(maintained, self.snapshot(model, fields))
+        return maintained
+
+    def assertSummariesMatchRebuild(self):
+        return self.assertMatchesRebuild(DailySummary, rebuild_daily_summaries, SUMMARY_FIELDS)
+
+
+# ==================== DAILY SUMMARIES ====================
+
+class DailySummaryTests(TrackerTestCase):
+    def test_creates_edits_and_deletes_keep_summaries_in_step(self):
+        workout = self.workout(days_ago=1, calories_burned=200)
+        meal = self.meal(days_ago=1)
+        self.meal(days_ago=1, meal_type='dinner', calories=450, protein=20.3)
+        self.assertEqual(self.assertSummariesMatchRebuild(),
+                         [(date.today() - timedelta(days=1), 200, 750, 32.8, 80.4, 16.2, 1, 2)])
+
+        # Moving an entry to another day refreshes both days
+        workout.date = date.today()
+        workout.calories_burned = 250
+        workout.save()
+        meal.calories = 350
+        meal.save()
+        self.assertEqual([row[:3] for row in self.assertSummariesMatchRebuild()],
+                         [(date.today() - timedelta(days=1), 0, 800), (date.today(), 250, 0)])
+
+        # A day with nothing left loses its summary
+        workout.delete()
+        self.assertEqual([row[0] for row in self.assertSummariesMatchRebuild()], [date.today() - timedelta(days=1)])
+
+    def test_entries_created_with_string_dates(self):
+        Workout.objects.create(user=self.user, exercise_name='Squat', date='2024-02-10', calories_burned=100)
+        self.assertEqual(self.assertSummariesMatchRebuild(), [(date(2024, 2, 10), 100, 0, 0, 0, 0, 1, 0)])
+
+    def test_home_page_reads_todays_summary(self):
+        self.workout(calories_burned=180)
+        self.meal(calories=520)
+        self.meal(days_ago=3)
+        response = self.client.get(reverse('home'))
+        self.assertEqual((response.context['total_calories_burned'], response.context['total_calories_consumed']),
+                         (180, 520))
+        self.assertEqual(response.context['week_meals'], 2)
+
+    def test_rebuild_command_restores_dropped_summaries(self):
+        self.workout(days_ago=2, calories_burned=120)
+        self.meal()
+        maintained = self.snapshot(DailySummary, SUMMARY_FIELDS)
+        DailySummary.objects.all().delete()
+        call_command('rebuild_daily_summaries', user=['alice'], stdout=StringIO())
+        self.assertEqual(self.snapshot(DailySummary, SUMMARY_FIELDS), maintained)
+        with self.assertRaisesMessage(CommandError, 'Unknown user(s): nobody'):
+            call_command('rebuild_daily_summaries', user=['nobody'], stdout=StringIO())
+
+
+# ==================== PAGINATION ====================
+
+class PaginationTests(TrackerTestCase):
+    def feed(self, name, cursor=None):
+        response = self.client.get(reverse(name), {'cursor': cursor} if cursor else {})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        return [int(pk) for pk in re.findall(r'data-card="(\d+)"', data['html'])], data['next_cursor']
+
+    def test_feed_walks_every_entry_once_in_order(self):
+        # Several entries share a day, so the created_at and id tie-breakers decide
+        for index in range(PAGE_SIZE * 2 + 5):
+            self.workout(days_ago=index // 4)
+        Workout.objects.create(user=User.objects.create_user('bob'), exercise_name='Squat', date=date.today())
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            pks, cursor = self.feed('workout_feed', cursor)
+            seen += pks
+            pages += 1
+            if cursor is None:
+                break
+        expected = list(Workout.objects.filter(user=self.user)
+                        .order_by('-date', '-created_at', '-id').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+        self.assertEqual(pages, 3)
+
+    def test_entries_added_while_scrolling_do_not_shift_pages(self):
+        for index in range(PAGE_SIZE + 3):
+            self.meal(days_ago=index)
+        first, cursor = self.feed('meal_feed')
+        self.meal()
+        rest, cursor = self.feed('meal_feed', cursor)
+        self.assertEqual((len(first), len(rest), cursor), (PAGE_SIZE, 3, None))
+        self.assertFalse(set(first) & set(rest))
+
+    def test_bad_cursors_are_rejected(self):
+        self.assertEqual(self.client.get(reverse('workout_feed'), {'cursor': 'nonsense'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('meal_list'), {'cursor': 'bm9wZQ'}).status_code, 400)
+
+
+# ==================== FOOD CATALOG ====================
+
+class FoodCatalogTests(TrackerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dosa = FoodCatalog.objects.create(name='Masala Dosa', meal_type='breakfast', calories=250, protein=5,
+                                               carbs=40, fats=7)
+        FoodCatalog.objects.create(name='Dal Tadka', meal_type='dinner', calories=180, protein=9, carbs=20, fats=6)
+
+    def test_catalog_page_lists_foods_by_section(self):
+        response = self.client.get(reverse('indian_foods'))
+        self.assertEqual([food.name for food in response.context['breakfast_foods']], ['Masala Dosa'])
+        # Dinner foods are listed with lunch
+        self.assertEqual([food.name for food in response.context['lunch_foods']], ['Dal Tadka'])
+
+    def test_quick_add_copies_the_food_into_a_meal(self):
+        self.client.post(reverse('quick_add_meal', args=[self.dosa.pk]))
+        meal = Meal.objects.get()
+        self.assertEqual((meal.food, meal.food_name, meal.calories, meal.date),
+                         (self.dosa, 'Masala Dosa', 250, date.today()))
+        self.assertEqual(self.assertSummariesMatchRebuild(), [(date.today(), 0, 250, 5, 40, 7, 0, 1)])
+        self.assertEqual(self.client.post(reverse('quick_add_meal', args=[0])).status_code, 404)
+
+    def test_cached_catalog_reloads_after_a_change(self):
+        first = catalog.get_catalog()
+        with self.settings(CATALOG_VERSION_CHECK_SECONDS=60), self.assertNumQueries(0):
+            self.assertIs(catalog.get_catalog(), first)
+
+        self.dosa.calories = 260
+        self.dosa.save()
+        self.assertEqual(CatalogVersion.objects.get().version, first.version + 1)
+        self.assertEqual(catalog.get_catalog().get(self.dosa.pk).calories, 260)
+
+
+# ==================== FOOD SEARCH ====================
+
+class FoodSearchTests(TrackerTestCase):
+    def setUp(self):
+        super().setUp()
+        for name, calories in (('Masala Dosa', 250), ('Plain Dosa', 133), ('Dal Tadka', 180), ('Dal Makhani', 280)):
+            FoodCatalog.objects.create(name=name, meal_type='lunch', calories=calories)
+
+    def names(self, query):
+        response = self.client.get(reverse('search_foods'), {'q': query})
+        return [food['name'] for food in response.json()['foods']]
+
+    def test_word_prefixes_and_typos_match(self):
+        self.assertEqual(self.names('dos'), ['Plain Dosa', 'Masala Dosa'])
+        self.assertEqual(self.names('dal mak')[0], 'Dal Makhani')
+        self.assertEqual(self.names('masla dosa')[0], 'Masala Dosa')
+        self.assertEqual(self.names('   '), [])
+
+    def test_the_users_own_foods_rank_first(self):
+        self.meal(food_name='Dal Tadka', calories=210)
+        self.meal(food_name='Dalia Upma', calories=150)
+        foods = self.client.get(reverse('search_foods'), {'q': 'dal'}).json()['foods']
+        self.assertEqual([food['source'] for food in foods[:2]], ['history', 'history'])
+        # The user's own entry replaces the catalog food of the same name
+        tadka = [food for food in foods if food['name'] == 'Dal Tadka']
+        self.assertEqual([(food['calories'], food['source']) for food in tadka], [(210, 'history')])
+
+    def test_index_follows_catalog_changes(self):
+        self.assertEqual(self.names('idli'), [])
+        FoodCatalog.objects.create(name='Idli', meal_type='breakfast', calories=78)
+        self.assertEqual(self.names('idli'), ['Idli'])
+
+
+# ==================== IMPORT ====================
+
+class ImportHistoryTests(TrackerTestCase):
+    def run_import(self, name, content, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / name
+            path.write_text(content)
+            output = StringIO()
+            call_command('import_history', str(path), stdout=output, stderr=StringIO(), **options)
+            return output.getvalue()
+
+    def test_csv_rows_are_imported_in_batches(self):
+        header = 'kind,exercise_name,sets,reps,weight_used,duration,calories_burned,date\n'
+        rows = ''.join(f'workout,Bench Press,3,5,{60 + index},30,200,2024-03-{index + 1:02d}\n' for index in range(5))
+        output = self.run_import('history.csv', header + rows + 'workout,Bench Press,three,5,60,30,200,2024-03-09\n',
+                                 user='alice', batch_size=2)
+        self.assertIn('Imported 5 rows', output)
+        self.assertIn('rejected 1', output)
+        self.assertEqual(len(self.assertSummariesMatchRebuild()), 5)
+        records = self.assertMatchesRebuild(PersonalRecord, rebuild_personal_records, RECORD_FIELDS)
+        self.assertEqual(records[0][1], 64)
+        self.assertEqual(ChangeLog.objects.filter(user=self.user).count(), 5)
+
+    def test_jsonl_rows_name_their_owner_and_rejects_are_written(self):
+        bob = User.objects.create_user('bob')
+        meal = {'kind': 'meal', 'meal_type': 'lunch', 'food_name': 'Dal', 'protein': 10, 'carbs': 30, 'fats': 5,
+                'quantity': 1, 'date': '2024-03-01'}
+        lines = [
+            {**meal, 'username': 'alice', 'calories': 300},
+            {**meal, 'username': 'bob', 'calories': 200},
+            {**meal, 'username': 'nobody', 'calories': 100},
+        ]
+        content = '\n'.join(json.dumps(line) for line in lines) + '\nnot json\n'
+        with tempfile.NamedTemporaryFile('r', suffix='.jsonl') as rejects:
+            self.run_import('meals.jsonl', content, rejects=rejects.name)
+            rejected = [json.loads(line) for line in rejects]
+        self.assertEqual([row['line'] for row in rejected], [3, 4])
+        self.assertEqual(rejected[0]['errors'], {'username': ['Unknown or missing user']})
+        self.assertEqual(dict(Meal.objects.values_list('user_id', 'calories')), {self.user.pk: 300, bob.pk: 200})
+        self.assertSummariesMatchRebuild()
+
+    def test_dry_run_writes_nothing(self):
+        content = 'exercise_name,sets,reps,duration,calories_burned,date\nSquat,3,5,30,150,2024-03-01\n'
+        output = self.run_import('history.csv', content, user='alice', kind='workout', dry_run=True)
+        self.assertIn('Validated 1 rows', output)
+        self.assertFalse(Workout.objects.exists())
+        with self.assertRaisesMessage(CommandError, 'Unknown user: nobody'):
+            self.run_import('history.csv', '', user='nobody')
+
+
+# ==================== CATALOG DATA ====================
+
+class LoadFoodsTests(TrackerTestCase):
+    HEADER = 'name,meal_type,calories,protein,carbs,fats,quantity\n'
+
+    def load(self, *contents):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for index, content in enumerate(contents):
+                path = Path(directory) / f'foods{index}.csv'
+                path.write_text(self.HEADER + content)
+                paths.append(str(path))
+            output = StringIO()
+            call_command('load_indian_foods', *paths, stdout=output)
+            return output.getvalue()
+
+    def test_bundled_data_loads_once(self):
+        call_command('load_indian_foods', stdout=StringIO())
+        self.assertTrue(FoodCatalog.objects.filter(name='Masala Dosa (1 piece)').exists())
+        version = CatalogVersion.objects.get().version
+        output = StringIO()
+        call_command('load_indian_foods', stdout=output)
+        self.assertIn('up to date', output.getvalue())
+        self.assertEqual(CatalogVersion.objects.get().version, version)
+
+    def test_reloads_update_foods_in_place(self):
+        self.load('Poha,breakfast,180,4,30,5,1\n')
+        poha = FoodCatalog.objects.get()
+        self.client.post(reverse('quick_add_meal', args=[poha.pk]))
+        # Later files win over earlier ones
+        self.load('Poha,breakfast,180,4,30,5,1\n', 'Poha,breakfast,200,4,32,6,1\nUpma,breakfast,190,5,28,6,1\n')
+        self.assertEqual(dict(FoodCatalog.objects.values_list('name', 'calories')), {'Poha': 200, 'Upma': 190})
+        self.assertEqual(FoodCatalog.objects.get(name='Poha').pk, poha.pk)
+        self.assertEqual(Meal.objects.get().food_id, poha.pk)
+        self.assertEqual(catalog.get_catalog().get(poha.pk).calories, 200)
+
+    def test_bad_rows_load_nothing(self):
+        with self.assertRaisesMessage(CommandError, 'Bad row'):
+            self.load('Poha,breakfast,180,4,30,5,1\nUpma,breakfast,lots,5,28,6,1\n')
+        self.assertFalse(FoodCatalog.objects.exists())
+
+
+# ==================== EXPORT ====================
+
+class ExportTests(TrackerTestCase):
+    def test_streams_the_users_rows(self):
+        Workout.objects.create(user=self.user, exercise_name='Squat', date=date(2024, 2, 10))
+        response = self.client.get(reverse('export_data'), {'kind': 'workouts', 'format': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn('Squat', lines[1])
+
+    def test_bad_dates_are_rejected(self):
+        for value in ('10/02/2024', '2024-02-30'):
+            response = self.client.get(reverse('export_data'), {'start': value})
+            self.assertEqual(response.status_code, 400, value)
+
+    def test_command_rejects_impossible_dates(self):
+        with self.assertRaisesMessage(CommandError, '--end must be YYYY-MM-DD'):
+            call_command('export_history', user='alice', end='2024-02-30')
+
+
+# ==================== PROGRESS CHARTS ====================
+
+class ProgressTests(TrackerTestCase):
+    def series(self, range_key):
+        response = self.client.get(reverse('progress_data'), {'range': range_key})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_buckets_average_the_logged_days(self):
+        for days_ago in (0, 1, 3, 8, 15, 40, 80, 200, 500):
+            self.meal(days_ago=days_ago, calories=1000 + days_ago)
+            self.workout(days_ago=days_ago, calories_burned=days_ago)
+        self.workout(days_ago=3, calories_burned=50)
+        # A workout-only day counts towards burned but not intake
+        self.workout(days_ago=2, calories_burned=300)
+        days = {summary.date: summary for summary in DailySummary.objects.filter(user=self.user)}
+
+        for range_key, bucket, first in (('30', 'day', date.today() - timedelta(days=30)),
+                                         ('90', 'week', date.today() - timedelta(days=90)),
+                                         ('all', 'month', min(days))):
+            series = self.series(range_key)
+            self.assertEqual(series['bucket'], bucket)
+            # Every bucket has a slot, so the axis has no gaps
+            labels = [bucket_start(first, bucket)]
+            while next_bucket(labels[-1], bucket) <= date.today():
+                labels.append(next_bucket(labels[-1], bucket))
+            self.assertEqual(series['dates'], [label.isoformat() for label in labels])
+
+            for index, label in enumerate(labels):
+                logged = [summary for day, summary in days.items()
+                          if bucket_start(day, bucket) == label and day >= first]
+                burned = sum(summary.calories_burned for summary in logged) / len(logged) if logged else 0
+                fed = [summary for summary in logged if summary.meal_count]
+                consumed = sum(summary.calories_consumed for summary in fed) / len(fed) if fed else 0
+                self.assertEqual(series['workout_calories'][index], round(burned), (range_key, label))
+                self.assertEqual(series['meal_calories'][index], round(consumed), (range_key, label))
+
+    def test_charts_follow_new_entries(self):
+        self.assertEqual(self.series('7')['meal_calories'][-1], 0)
+        self.meal(calories=700)
+        self.assertEqual(self.series('7')['meal_calories'][-1], 700)
+        self.assertEqual(self.client.get(reverse('progress_data'), {'range': '12'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('progress'), {'range': 'all'}).context['series']['bucket'], 'month')
+
+
+# ==================== RECOMMENDATIONS ====================
+
+class RecommendationTests(TrackerTestCase):
+    def titles(self):
+        context = self.client.get(reverse('recommendations')).context
+        return [item['title'] for item in context['recommendations']], context
+
+    def test_window_averages_count_each_logged_day_once(self):
+        for days_ago in (0, 0, 2):
+            self.meal(days_ago=days_ago, calories=600, protein=30)
+        self.workout(days_ago=5, calories_burned=400)
+        self.meal(days_ago=8, calories=5000)
+        stats = recommendations.window_stats(self.user)
+        self.assertEqual(stats, {'avg_calories_burned': 400 / 3, 'avg_calories_consumed': 900,
+                                 'avg_protein': 45, 'workout_count': 1})
+
+    def test_rules_follow_the_profile_and_new_entries(self):
+        with self.committed():
+            UserProfile.objects.create(user=self.user, weight=60, fitness_goal='lose_weight')
+        self.meal(calories=2500, protein=20)
+        titles, context = self.titles()
+        self.assertEqual(titles, ['Calorie Deficit Needed', 'Low Protein Intake', 'Increase Workout Frequency'])
+        self.assertEqual(context['avg_calories_consumed'], 2500)
+
+        for days_ago in range(3):
+            self.workout(days_ago=days_ago, calories_burned=2500)
+        self.meal(calories=0, protein=100)
+        titles, _ = self.titles()
+        self.assertEqual(titles, [recommendations.DOING_WELL['title']])
+
+    def test_registered_rules_run_in_order(self):
+        extra = {'type': 'info', 'icon': 'fa-tint', 'title': 'Drink Water', 'message': '', 'action': ''}
+        with mock.patch.object(recommendations, 'RULES', list(recommendations.RULES)):
+            recommendations.rule(lambda profile, stats: extra)
+            titles = [item['title'] for item in recommendations.build_recommendations(self.user)['recommendations']]
+        self.assertEqual(titles, ['Increase Workout Frequency', 'Drink Water'])
+
+    def test_cached_results_cost_no_queries(self):
+        recommendations.get_recommendations(self.user)
+        with self.assertNumQueries(0):
+            recommendations.get_recommendations(self.user)
+
+
+# ==================== CACHING ====================
+
+class CachingTests(TrackerTestCase):
+    def test_entries_are_rebuilt_after_the_users_data_changes(self):
+        builder = mock.Mock(side_effect=lambda: builder.call_count)
+
+        def cached(user_id, *parts):
+            return caching.cached_for_user(user_id, 'test', builder, *parts)
+
+        self.assertEqual((cached(self.user.pk), cached(self.user.pk), cached(self.user.pk, 'other')), (1, 1, 2))
+
+        other = User.objects.create_user('bob')
+        Workout.objects.create(user=other, exercise_name='Squat', date=date.today())
+        self.assertEqual(cached(self.user.pk), 1)
+        self.workout()
+        self.assertEqual(cached(self.user.pk), 3)
+        with self.committed():
+            self.client.post(reverse('workout_bulk'), {'ids': [Workout.objects.filter(user=self.user).get().pk],
+                                                       'action': 'delete'})
+        self.assertEqual(cached(self.user.pk), 4)
+
+    def test_versions_only_move_forward(self):
+        version = caching.user_version(self.user.pk)
+        with mock.patch('tracker.caching._clock_version', return_value=version - 1000):
+            caching.bump_user_version(self.user.pk)
+        self.assertGreater(caching.user_version(self.user.pk), version)
+
+        # A version lost from the cache is replaced by a newer one
+        version = caching.user_version(self.user.pk)
+        cache.delete(caching.VERSION_KEY.format(self.user.pk))
+        self.assertGreater(caching.user_version(self.user.pk), version)
+
+    def test_writes_bump_the_version_once_they_commit(self):
+        version = caching.user_version(self.user.pk)
+        with self.committed():
+            Workout.objects.create(user=self.user, exercise_name='Squat', date=date.today())
+            # Until then other requests still read the old rows
+            self.assertEqual(caching.user_version(self.user.pk), version)
+        self.assertGreater(caching.user_version(self.user.pk), version)
+
+        # Logging in only stamps last_login
+        version = caching.user_version(self.user.pk)
+        with self.committed():
+            self.client.force_login(self.user)
+        self.assertEqual(caching.user_version(self.user.pk), version)
+
+    def test_warm_pages_only_load_the_session(self):
+        self.workout()
+        self.meal()
+        for name in ('home', 'workout_list', 'meal_list', 'progress', 'recommendations'):
+            self.client.get(reverse(name))
+            with self.assertNumQueries(1):
+                self.assertEqual(self.client.get(reverse(name)).status_code, 200, name)
+
+
+# ==================== SAMPLE DATA & BENCHMARKS ====================
+
+class SampleDataTests(TrackerTestCase):
+    def generate(self, **options):
+        call_command('generate_sample_data', users=2, years=0.1, stdout=StringIO(), **options)
+        return {
+            user.username: (Workout.objects.filter(user=user).count(), Meal.objects.filter(user=user).count())
+            for user in User.objects.filter(username__startswith='sample')
+        }
+
+    def test_generated_data_matches_a_rebuild(self):
+        counts = self.generate()
+        self.assertEqual(sorted(counts), ['sample1', 'sample2'])
+        self.assertTrue(all(workouts and meals for workouts, meals in counts.values()))
+
+        for user in User.objects.filter(username__startswith='sample'):
+            self.user = user
+            self.assertSummariesMatchRebuild()
+            self.assertMatchesRebuild(PersonalRecord, rebuild_personal_records, RECORD_FIELDS)
+            workouts, meals = counts[user.username]
+            self.assertEqual(ChangeLog.objects.filter(user=user).count(), workouts + meals)
+
+    def test_seeds_reproduce_the_dataset_and_clear_replaces_it(self):
+        counts = self.generate(seed=7)
+        with self.assertRaisesMessage(CommandError, 'use --clear'):
+            self.generate(seed=7)
+        self.assertEqual(self.generate(seed=7, clear=True), counts)
+
+    def test_benchmark_reports_every_view(self):
+        self.generate()
+        output = StringIO()
+        # The test runner has already set up the test environment
+        with mock.patch('tracker.management.commands.benchmark_views.setup_test_environment'), \
+                mock.patch('tracker.management.commands.benchmark_views.teardown_test_environment'):
+            call_command('benchmark_views', repeat=1, view=['home', 'workout_list'], stdout=output)
+        report = json.loads(output.getvalue())
+        self.assertEqual(report['user'], 'sample1')
+        self.assertEqual(sorted(report['views']), ['home', 'workout_list'])
+        for view in report['views'].values():
+            self.assertLessEqual(view['warm']['queries'], view['cold']['queries'])
+
+
+# ==================== REQUEST METRICS ====================
+
+@override_settings(REQUEST_METRICS_ENABLED=True, REQUEST_METRICS_SLOW_MS=10 ** 6, REQUEST_METRICS_SAMPLES=3)
+class RequestMetricsTests(TrackerTestCase):
+    def setUp(self):
+        super().setUp()
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+    def test_responses_carry_server_timing(self):
+        response = self.client.get(reverse('workout_list'))
+        timing = dict(part.split(';', 1) for part in re.split(r', (?=\w+;)', response['Server-Timing']))
+        self.assertEqual(sorted(timing), ['dup', 'sql', 'total'])
+        self.assertRegex(timing['sql'], r'^dur=[\d.]+;desc="\d+ queries"$')
+
+    def test_staff_see_percentiles_of_recent_requests(self):
+        for _ in range(5):
+            self.client.get(reverse('home'))
+        self.assertEqual(self.client.get(reverse('request_metrics')).status_code, 403)
+
+        self.user.is_staff = True
+        with self.committed():
+            self.user.save()
+        rows = self.client.get(reverse('request_metrics'), {'format': 'json'}).json()['views']
+        # Only the last REQUEST_METRICS_SAMPLES requests are kept
+        self.assertEqual({row['url_name']: row['count'] for row in rows}, {'home': 3, 'request_metrics': 1})
+
+    def test_slow_requests_are_logged_as_json(self):
+        with self.settings(REQUEST_METRICS_SLOW_MS=0):
+            # The middleware reads the threshold when it is loaded
+            self.client.handler.load_middleware()
+            with self.assertLogs('tracker.requests', 'WARNING') as logs:
+                self.client.get(reverse('home'))
+        event = json.loads(logs.records[0].getMessage())
+        self.assertEqual((event['event'], event['url_name'], event['user_id']), ('slow_request', 'home', self.user.pk))
+
+    def test_query_recorder_spots_duplicates(self):
+        recorder = metrics.QueryRecorder(time.perf_counter)
+        execute = mock.Mock()
+        for params in ((1,), (2,), (1,)):
+            recorder(execute, 'SELECT %s', params, False, {})
+        self.assertEqual((recorder.count, recorder.duplicates, recorder.similar), (3, 1, 2))
+        self.assertEqual(recorder.repeated(), [(3, 'SELECT %s')])
+        self.assertEqual([metrics.percentile([1, 2, 3, 4], fraction) for fraction in (0.5, 0.95)], [2, 4])
+
+
+# ==================== BATCH API ====================
+
+class BatchApiTests(TrackerTestCase):
+    WORKOUT = {'kind': 'workout', 'exercise_name': 'Squat', 'sets': 3, 'reps': 5, 'weight_used': 100,
+               'duration': 30, 'calories_burned': 150, 'date': '2024-03-01'}
+    MEAL = {'kind': 'meal', 'meal_type': 'lunch', 'food_name': 'Dal', 'calories': 300, 'protein': 10,
+            'carbs': 30, 'fats': 5, 'quantity': 1, 'date': '2024-03-01'}
+
+    def post(self, entries):
+        return self.client.post(reverse('batch_entries'), json.dumps({'entries': entries}),
+                                content_type='application/json')
+
+    def test_retried_uploads_are_reported_as_duplicates(self):
+        entries = [
+            {**self.WORKOUT, 'client_id': 'w1'},
+            {**self.WORKOUT, 'client_id': 'w1', 'weight_used': 120},
+            {**self.MEAL, 'client_id': 'm1'},
+            {**self.MEAL},
+            {**self.MEAL, 'client_id': 'm2', 'calories': 'lots'},
+        ]
+        first = self.post(entries).json()
+        self.assertEqual((first['created'], first['duplicate'], first['invalid']), (3, 1, 1))
+        self.assertEqual(first['results'][1]['id'], first['results'][0]['id'])
+        self.assertEqual(list(first['results'][4]['errors']), ['calories'])
+
+        retry = self.post(entries[:3]).json()
+        self.assertEqual([result['status'] for result in retry['results']], ['duplicate'] * 3)
+        self.assertEqual([result['id'] for result in retry['results']],
+                         [result['id'] for result in first['results'][:3]])
+        self.assertEqual((Workout.objects.count(), Meal.objects.count()), (1, 2))
+        self.assertEqual(self.assertSummariesMatchRebuild(), [(date(2024, 3, 1), 150, 600, 20, 60, 10, 1, 2)])
+        records = self.assertMatchesRebuild(PersonalRecord, rebuild_personal_records, RECORD_FIELDS)
+        self.assertEqual(records[0][1], 100)
+        self.assertEqual(ChangeLog.objects.filter(user=self.user).count(), 3)
+
+    def test_client_ids_are_per_user(self):
+        self.post([{**self.WORKOUT, 'client_id': 'w1'}])
+        self.client.force_login(User.objects.create_user('bob'))
+        self.assertEqual(self.post([{**self.WORKOUT, 'client_id': 'w1'}]).json()['created'], 1)
+        self.assertEqual(Workout.objects.filter(client_id='w1').count(), 2)
+
+    def test_foods_are_looked_up_once_per_batch(self):
+        foods = [FoodCatalog.objects.create(name=name, meal_type='lunch', calories=200) for name in ('Dal', 'Rice')]
+        entries = [{**self.MEAL, 'food': foods[index % 2].pk} for index in range(6)] + [{**self.MEAL, 'food': 0}]
+        with CaptureQueriesContext(connection) as queries:
+            results = self.post(entries).json()['results']
+        self.assertEqual(sum('"tracker_foodcatalog"' in query['sql'] for query in queries), 1)
+        self.assertEqual([result['status'] for result in results], ['created'] * 6 + ['invalid'])
+        self.assertEqual(list(results[-1]['errors']), ['food'])
+        self.assertEqual(Meal.objects.filter(food=foods[1]).count(), 3)
+
+    def test_a_conflicting_upload_is_retried_with_fresh_rows(self):
+        insert = bulk._insert_pending
+
+        def conflict(user_id, pending):
+            # The first attempt's ids are taken by another request once it rolls back
+            if conflict.attempts:
+                Meal.objects.create(user=self.user, food_name='Elsewhere', date=date.today())
+            conflict.attempts += 1
+            insert(user_id, pending)
+            if conflict.attempts == 1:
+                raise IntegrityError
+        conflict.attempts = 0
+
+        with mock.patch('tracker.bulk._insert_pending', conflict):
+            results = self.post([{**self.MEAL, 'client_id': 'm1'}, self.MEAL]).json()['results']
+        self.assertEqual([result['status'] for result in results], ['created'] * 2)
+        self.assertEqual(Meal.objects.filter(food_name='Dal').count(), 2)
+
+    def test_bad_requests_are_rejected(self):
+        response = self.client.post(reverse('batch_entries'), 'not json', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        with mock.patch('tracker.views.MAX_BATCH', 2):
+            self.assertEqual(self.post([self.MEAL] * 3).status_code, 413)
+        self.client.logout()
+        self.assertEqual(self.post([self.MEAL]).status_code, 401)
+        self.assertFalse(Meal.objects.exists())
+
+
+# ==================== DELTA SYNC ====================
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class SyncTests(TrackerTestCase):
+    def sync(self, since=None, **params):
+        response = self.client.get(reverse('sync_changes'), {'since': since, **params} if since else params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def sync_all(self, since=None, limit=2):
+        changes = []
+        while True:
+            page = self.sync(since, limit=limit)
+            changes += page['changes']
+            since = page['next']
+            if not page['has_more']:
+                return changes, since
+
+    def test_only_changes_after_the_token_are_sent(self):
+        workouts = [self.workout(days_ago=index) for index in range(3)]
+        meal = self.meal()
+        Workout.objects.create(user=User.objects.create_user('bob'), exercise_name='Squat', date=date.today())
+        changes, token = self.sync_all()
+        self.assertEqual({(change['kind'], change['id']) for change in changes},
+                         {('workout', workout.pk) for workout in workouts} | {('meal', meal.pk)})
+
+        self.assertEqual(self.sync(token)['changes'], [])
+        workouts[0].sets = 5
+        workouts[0].save()
+        deleted = workouts[1].pk
+        workouts[1].delete()
+        changes, token = self.sync_all(token)
+        self.assertEqual([(change['id'], change['action']) for change in changes],
+                         [(workouts[0].pk, 'upsert'), (deleted, 'delete')])
+        self.assertEqual(changes[0]['data']['sets'], 5)
+        self.assertNotIn('data', changes[1])
+
+    def test_the_log_keeps_one_row_per_entry(self):
+        workout = self.workout()
+        self.meal()
+        for sets in (4, 5):
+            workout.sets = sets
+            workout.save()
+        self.client.post(reverse('workout_bulk'), {'ids': [workout.pk], 'action': 'edit', 'exercise_name': 'Squat'})
+        logged = list(ChangeLog.objects.filter(user=self.user).values_list('kind', 'object_id', 'action'))
+        self.assertCountEqual(logged, [('workout', workout.pk, 'upsert'), ('meal', Meal.objects.get().pk, 'upsert')])
+
+        self.client.post(reverse('workout_bulk'), {'ids': [workout.pk], 'action': 'delete'})
+        self.assertEqual(ChangeLog.objects.get(kind='workout').action, 'delete')
+
+    def test_recent_changes_wait_to_settle(self):
+        self.workout()
+        with self.settings(SYNC_SETTLE_SECONDS=60):
+            page = self.sync()
+        self.assertEqual(page['changes'], [])
+        self.assertEqual(len(self.sync(page['next'])['changes']), 1)
+
+    def test_bad_requests_are_rejected(self):
+        for params in ({'since': 'forged'}, {'limit': 'all'}, {'limit': 0}):
+            self.assertEqual(self.client.get(reverse('sync_changes'), params).status_code, 400, params)
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('sync_changes')).status_code, 401)
+
+
+# ==================== ASGI ====================
+
+class AsgiTests(TrackerTestCase):
+    async def test_sync_pages_are_served_under_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        for name in ('home', 'progress', 'recommendations'):
+            response = await self.async_client.get(reverse(name))
+            self.assertEqual(response.status_code, 200, name)
+            self.assertContains(response, reverse('logout'))
+
+
+# ==================== BACKGROUND JOBS ====================
+
+class JobTests(TrackerTestCase):
+    def test_a_job_is_claimed_once(self):
+        queued = jobs.enqueue('recommendations', user=self.user)
+        self.assertEqual(jobs.claim('worker-1', 5), [queued.pk])
+        self.assertEqual(jobs.claim('worker-2', 5), [])
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.locked_by, queued.attempts), ('running', 'worker-1', 1))
+
+    def test_failures_are_retried_then_given_up(self):
+        queued = jobs.enqueue('export', user=self.user, max_attempts=2, kinds=['unknown'])
+        with tempfile.TemporaryDirectory() as root, self.settings(EXPORT_ROOT=root), \
+                self.assertLogs('tracker.jobs', 'WARNING'):
+            jobs.claim('worker', 1)
+            self.assertEqual(jobs.run(queued.pk), 'queued')
+            Job.objects.filter(pk=queued.pk).update(run_after=queued.run_after)
+            jobs.claim('worker', 1)
+            self.assertEqual(jobs.run(queued.pk), 'failed')
+            # Failed attempts leave no partial files behind
+            self.assertEqual(list(Path(root).glob('*/*')), [])
+
+    @override_settings(JOB_WORKER=False, JOB_BACKOFF_SECONDS=0)
+    def test_jobs_run_in_the_web_process_without_a_worker(self):
+        with mock.patch('tracker.jobs.threading.Thread') as thread, tempfile.TemporaryDirectory() as root, \
+                self.settings(EXPORT_ROOT=root), self.assertLogs('tracker.jobs', 'WARNING'):
+            thread.return_value.start.side_effect = lambda: jobs.run_inline(*thread.call_args.kwargs['args'])
+            uncommitted = jobs.enqueue('recommendations', user=self.user)
+            with self.committed():
+                ran = jobs.enqueue('recommendations', user=self.user)
+                failed = jobs.enqueue('export', user=self.user, max_attempts=2, kinds=['unknown'])
+                # Nothing runs before the jobs are committed
+                thread.assert_not_called()
+        self.assertEqual(thread.call_count, 2)
+        statuses = dict(Job.objects.values_list('pk', 'status'))
+        self.assertEqual([statuses[job.pk] for job in (uncommitted, ran, failed)], ['queued', 'succeeded', 'failed'])
+
+    def test_rebuild_without_a_user_rebuilds_everyone(self):
+        other = User.objects.create_user('bob')
+        for user in (self.user, other):
+            Workout.objects.create(user=user, exercise_name='Squat', date=date(2024, 3, 1), calories_burned=100)
+        DailySummary.objects.all().delete()
+        queued = jobs.enqueue('rebuild_summaries')
+        jobs.claim('worker', 1)
+        self.assertEqual(jobs.run(queued.pk), 'succeeded')
+        self.assertEqual(DailySummary.objects.count(), 2)
+
+    def test_exports_are_downloadable_until_they_expire(self):
+        Workout.objects.create(user=self.user, exercise_name='Squat', date=date(2024, 3, 1))
+        with tempfile.TemporaryDirectory() as root, self.settings(EXPORT_ROOT=root, EXPORT_MAX_AGE_SECONDS=60):
+            queued = jobs.enqueue('export', user=self.user)
+            jobs.claim('worker', 1)
+            self.assertEqual(jobs.run(queued.pk), 'succeeded')
+            response = self.client.get(reverse('job_download', args=[queued.pk]))
+            self.assertIn(b'Squat', b''.join(response.streaming_content))
+            response.close()
+
+            self.assertEqual(jobs.prune_exports(), 0)
+            path = Path(Job.objects.get(pk=queued.pk).result['path'])
+            old = time.time() - 120
+            os.utime(path, (old, old))
+            self.assertEqual(jobs.prune_exports(), 1)
+            self.assertFalse(path.exists())
+            self.assertEqual(self.client.get(reverse('job_download', args=[queued.pk])).status_code, 404)
+
+
+# ==================== ARCHIVE ====================
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class ArchiveTests(TrackerTestCase):
+    def archive(self, *args, **options):
+        call_command('archive_entries', *args, user=['alice'], stdout=StringIO(), **options)
+
+    def stored(self, model):
+        return sorted(model.objects.filter(user=self.user).values_list())
+
+    def test_archived_entries_round_trip(self):
+        for days_ago in (800, 500, 450, 400, 30):
+            self.workout(days_ago=days_ago, calories_burned=days_ago)
+            self.meal(days_ago=days_ago)
+        workouts, meals = self.stored(Workout), self.stored(Meal)
+        summaries = self.snapshot(DailySummary, SUMMARY_FIELDS)
+
+        self.archive(older_than=600)
+        self.archive(older_than=365)
+        self.assertEqual((Workout.objects.count(), Meal.objects.count()), (1, 1))
+        # Archiving only moves rows; everything derived from them stays put
+        self.assertEqual(self.assertSummariesMatchRebuild(), summaries)
+        self.assertEqual(sum(ArchiveChunk.objects.values_list('row_count', flat=True)), 8)
+
+        self.archive(restore=True)
+        self.assertFalse(ArchiveChunk.objects.exists())
+        self.assertEqual((self.stored(Workout), self.stored(Meal)), (workouts, meals))
+        self.assertEqual(self.assertSummariesMatchRebuild(), summaries)
+
+    def test_lists_sync_and_exports_still_see_archived_entries(self):
+        workouts = [self.workout(days_ago=days_ago) for days_ago in range(400, 400 + PAGE_SIZE * 2, 2)]
+        workouts.append(self.workout())
+        expected = [workout.pk for workout in sorted(workouts, key=lambda workout: workout.date, reverse=True)]
+        self.archive()
+
+        seen, cursor = [], None
+        while True:
+            response = self.client.get(reverse('workout_feed'), {'cursor': cursor} if cursor else {}).json()
+            seen += [int(pk) for pk in re.findall(r'data-card="(\d+)"', response['html'])]
+            cursor = response['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(seen, expected)
+
+        changes = self.client.get(reverse('sync_changes')).json()['changes']
+        self.assertEqual(sorted(change['id'] for change in changes), sorted(expected))
+        self.assertTrue(all(change['action'] == 'upsert' for change in changes))
+
+        response = self.client.get(reverse('export_data'), {'kind': 'workouts', 'format': 'csv'})
+        self.assertEqual(len(b''.join(response.streaming_content).decode().splitlines()), len(expected) + 1)
+
+    def test_dry_run_moves_nothing(self):
+        self.workout(days_ago=500)
+        self.archive(dry_run=True)
+        self.assertFalse(ArchiveChunk.objects.exists())
+        self.assertEqual(Workout.objects.count(), 1)
+
+
+# ==================== PERSONAL RECORDS ====================
+
+class PersonalRecordTests(TrackerTestCase):
+    def assertRecordsMatchRebuild(self):
+        return self.assertMatchesRebuild(PersonalRecord, rebuild_personal_records, RECORD_FIELDS)
+
+    def test_records_follow_creates_edits_and_deletes(self):
+        self.workout(weight_used=80)
+        heaviest = self.workout(weight_used=100, reps=1)
+        self.workout(exercise_name='Squat', weight_used=120)
+        records = dict((row[0], row[1]) for row in self.assertRecordsMatchRebuild())
+        self.assertEqual(records, {'Bench Press': 100, 'Squat': 120})
+
+        heaviest.weight_used = 90
+        heaviest.save()
+        self.assertRecordsMatchRebuild()
+        heaviest.delete()
+        self.assertEqual(self.assertRecordsMatchRebuild()[0][1], 80)
+
+    def test_archived_workouts_count_without_decoding_the_archive(self):
+        self.workout(days_ago=400, weight_used=140, reps=1)
+        self.workout(days_ago=2, weight_used=80)
+        call_command('archive_entries', days=365, stdout=StringIO())
+        self.assertEqual(ArchiveChunk.objects.count(), 1)
+        self.assertEqual(self.assertRecordsMatchRebuild()[0][1:3], (140, 140))
+
+        with mock.patch('tracker.archive._decode', side_effect=AssertionError('archive decoded')):
+            newest = self.workout(weight_used=100)
+            newest.delete()
+            Workout.objects.get().delete()
+        self.assertEqual(self.assertRecordsMatchRebuild()[0][4], 1)
+
+        call_command('archive_entries', restore=True, stdout=StringIO())
+        self.assertEqual(Workout.objects.get().weight_used, 140)
+        self.assertRecordsMatchRebuild()
+
+
+# ==================== CALORIE ESTIMATES ====================
+
+class CalorieEstimateTests(TrackerTestCase):
+    # Bench Press is a made-up exercise here, so it gets the 'other' MET of 4:
+    # 4 x 70 kg x 30 minutes x 3.5 / 200
+    ESTIMATE = 147
+
+    def add(self, **fields):
+        data = {'exercise_name': 'Bench Press', 'sets': 3, 'reps': 5, 'duration': 30,
+                'date': date.today().isoformat(), **fields}
+        self.client.post(reverse('workout_add'), data)
+        return Workout.objects.latest('pk')
+
+    def test_blank_calories_are_estimated(self):
+        workout = self.add(calories_burned='')
+        self.assertEqual((workout.calories_burned, workout.calories_estimated), (self.ESTIMATE, True))
+        workout = self.add(calories_burned='300')
+        self.assertEqual((workout.calories_burned, workout.calories_estimated), (300, False))
+
+    def test_edits_redo_estimates_but_keep_typed_calories(self):
+        workout = self.add(calories_burned='')
+        workout.duration = 60
+        workout.save()
+        self.assertEqual((workout.calories_burned, workout.calories_estimated), (self.ESTIMATE * 2, True))
+
+        # Typed over the estimate without unticking the flag
+        workout.calories_burned = 500
+        workout.save()
+        workout.refresh_from_db()
+        self.assertEqual((workout.calories_burned, workout.calories_estimated), (500, False))
+        workout.duration = 90
+        workout.save()
+        self.assertEqual(workout.calories_burned, 500)
+        self.assertSummariesMatchRebuild()
+
+    def test_backfill_follows_weight_and_skips_typed_calories(self):
+        estimated = self.add(calories_burned='')
+        typed = self.add(calories_burned='300')
+        UserProfile.objects.create(user=self.user, weight=140)
+        call_command('recalculate_calories', stdout=StringIO())
+        estimated.refresh_from_db()
+        typed.refresh_from_db()
+        self.assertEqual((estimated.calories_burned, typed.calories_burned), (self.ESTIMATE * 2, 300))
+        self.assertEqual(self.assertSummariesMatchRebuild()[0][1], self.ESTIMATE * 2 + 300)
+
+
+# ==================== TRENDS ====================
+
+class TrendTests(TrackerTestCase):
+    def naive_mean(self, days, field, counted, window):
+        """The trailing average of ``field`` over counted days, one day at a time"""
+        today = date.today()
+        values = [getattr(days[today - timedelta(days=offset)], field)
+                  for offset in range(window) if today - timedelta(days=offset) in days
+                  and counted(days[today - timedelta(days=offset)])]
+        return sum(values) / len(values) if values else 0
+
+    def test_rolling_averages_match_a_day_by_day_calculation(self):
+        for days_ago in (0, 1, 2, 5, 9, 20, 27, 40):
+            self.meal(days_ago=days_ago, calories=1800 + days_ago * 10)
+        for days_ago in (0, 1, 3, 9, 30):
+            self.workout(days_ago=days_ago, calories_burned=200 + days_ago)
+        days = {summary.date: summary for summary in DailySummary.objects.filter(user=self.user)}
+
+        latest = analytics.trends(self.user)['latest']
+        for window in analytics.WINDOWS:
+            intake = self.naive_mean(days, 'calories_consumed', lambda day: day.meal_count, window)
+            burn = self.naive_mean(days, 'calories_burned', lambda day: day.meal_count or day.workout_count, window)
+            self.assertEqual(latest[f'intake_{window}'], round(intake), window)
+            self.assertEqual(latest[f'burn_{window}'], round(burn), window)
+            self.assertEqual(latest[f'net_{window}'], round(intake - burn), window)
+
+    def test_streaks_and_week_over_week(self):
+        for days_ago in (1, 2, 3, 10, 11, 12, 13, 14):
+            self.workout(days_ago=days_ago, calories_burned=100)
+        result = analytics.trends(self.user)
+        # Today can still be logged, so yesterday's run is current
+        self.assertEqual(result['streaks']['workout_current'], 3)
+        self.assertEqual(result['streaks']['workout_longest'], 5)
+        workouts = next(row for row in result['week_over_week'] if row['key'] == 'workouts')
+        self.assertEqual((workouts['current'], workouts['previous'], workouts['delta']), (3, 4, -1))
+
+    def test_projection_needs_a_profile_and_logged_meals(self):
+        for days_ago in range(10):
+            self.meal(days_ago=days_ago, calories=1500)
+        self.assertIsNone(analytics.trends(self.user)['projection'])
+
+        with self.committed():
+            UserProfile.objects.create(user=self.user, age=30, weight=80, height=180)
+        projection = analytics.trends(self.user)['projection']
+        balance, weights = analytics.project_weight(80, 180, 30, 1500, 0)
+        self.assertEqual(projection['balance'], round(balance))
+        self.assertEqual(projection['in_90_days'], round(float(weights[-1]), 1))
+        # Eating below maintenance loses weight, more slowly as it goes
+        steps = -np.diff(weights)
+        self.assertTrue((steps > 0).all() and (np.diff(steps) < 0).all())
+
+    def test_progress_page_trends_follow_new_entries(self):
+        self.meal(calories=2000)
+        self.assertEqual(self.client.get(reverse('progress')).context['trends']['latest']['intake_7'], 2000)
+        self.meal(calories=1000)
+        self.assertEqual(self.client.get(reverse('progress')).context['trends']['latest']['intake_7'], 3000)
+
+
+# ==================== STATIC ASSETS ====================
+
+class StaticAssetTests(TrackerTestCase):
+    PAGES = ('home', 'workout_list', 'workout_add', 'meal_list', 'meal_add', 'indian_foods', 'progress',
+             'recommendations', 'profile')
+
+    def test_pages_only_load_self_hosted_assets(self):
+        UserProfile.objects.create(user=self.user)
+        pages = [self.client.get(reverse(name)).content.decode() for name in self.PAGES]
+        self.client.logout()
+        pages.append(self.client.get(reverse('login')).content.decode())
+
+        for html in pages:
+            self.assertNotRegex(html, r'<(link|script)[^>]+(href|src)="(https?:)?//')
+            self.assertNotIn('<style', html)
+            # Scripts are files, apart from JSON data islands
+            self.assertNotRegex(html, r'<script(?![^>]*(src=|application/json))[^>]*>')
+            urls = re.findall(r'(?:href|src)="/static/([^"]+)"', html)
+            self.assertTrue(urls)
+            for url in urls:
+                self.assertIsNotNone(finders.find(url), url)
+
+
+# ==================== CONDITIONAL GET ====================
+
+class ConditionalGetTests(TrackerTestCase):
+    PAGES = ('home', 'workout_list', 'meal_list', 'progress', 'recommendations')
+
+    def test_unchanged_pages_are_not_rendered_again(self):
+        for name in self.PAGES:
+            first = self.client.get(reverse(name))
+            self.assertEqual(first.status_code, 200, name)
+            self.assertIn('private', first['Cache-Control'])
+            self.assertIn('no-cache', first['Cache-Control'])
+            with mock.patch('tracker.views.render', side_effect=AssertionError('rendered')):
+                again = self.client.get(reverse(name), HTTP_IF_NONE_MATCH=first['ETag'])
+                self.assertEqual(again.status_code, 304, name)
+                since = self.client.get(reverse(name), HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+                self.assertEqual(since.status_code, 304, name)
+
+    def test_writes_change_the_etag(self):
+        etag = self.client.get(reverse('workout_list'))['ETag']
+        self.workout()
+        response = self.client.get(reverse('workout_list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        etag = response['ETag']
+        with self.committed():
+            UserProfile.objects.create(user=self.user, weight=70)
+        self.assertEqual(self.client.get(reverse('workout_list'), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etags_are_per_user_and_pending_messages_always_render(self):
+        etag = self.client.get(reverse('home'))['ETag']
+        self.client.force_login(User.objects.create_user('bob'))
+        self.assertEqual(self.client.get(reverse('home'), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.client.get(reverse('workout_list'))['ETag']
+        self.client.post(reverse('workout_add'), {'exercise_name': 'Squat', 'sets': 3, 'reps': 5, 'duration': 30,
+                                                  'date': date.today().isoformat()})
+        response = self.client.get(reverse('workout_list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Workout added successfully')
+        self.assertNotIn('ETag', response)
+
+
+# ==================== FRAGMENTS ====================
+
+class FragmentTests(TrackerTestCase):
+    XHR = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}
+    MEAL = {'meal_type': 'lunch', 'food_name': 'Dal', 'calories': 300, 'protein': 10, 'carbs': 30, 'fats': 5,
+            'quantity': 1}
+
+    def test_scripted_adds_and_deletes_get_fragments(self):
+        response = self.client.post(reverse('meal_add'), {**self.MEAL, 'date': date.today().isoformat()}, **self.XHR)
+        meal = Meal.objects.get()
+        self.assertEqual(response.status_code, 201)
+        self.assertContains(response, f'data-card="{meal.pk}"', status_code=201)
+        self.assertNotContains(response, '<html', status_code=201)
+
+        food = FoodCatalog.objects.create(name='Idli', meal_type='breakfast', calories=78)
+        response = self.client.post(reverse('quick_add_meal', args=[food.pk]), **self.XHR)
+        self.assertContains(response, 'Idli', status_code=201)
+
+        response = self.client.post(reverse('meal_delete', args=[meal.pk]), **self.XHR)
+        self.assertEqual((response.status_code, response.content), (204, b''))
+        self.assertEqual(self.assertSummariesMatchRebuild(), [(date.today(), 0, 78, 0, 0, 0, 0, 1)])
+
+    def test_invalid_scripted_adds_get_errors_as_json(self):
+        response = self.client.post(reverse('workout_add'), {'exercise_name': 'Squat', 'sets': 'three'}, **self.XHR)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('sets', response.json()['errors'])
+        self.assertFalse(Workout.objects.exists())
+
+    def test_plain_requests_still_redirect(self):
+        workout = self.workout()
+        response = self.client.post(reverse('workout_delete', args=[workout.pk]), follow=True)
+        self.assertRedirects(response, reverse('workout_list'))
+        self.assertContains(response, 'Workout deleted successfully!')
+
+        other = Workout.objects.create(user=User.objects.create_user('bob'), exercise_name='Squat', date=date.today())
+        self.assertEqual(self.client.post(reverse('workout_delete', args=[other.pk]), **self.XHR).status_code, 404)
+        self.assertTrue(Workout.objects.filter(pk=other.pk).exists())
+
+
+# ==================== BULK EDIT ====================
+
+class BulkEditTests(TrackerTestCase):
+    def setUp(self):
+        super().setUp()
+        running = Exercise.objects.create(name='Running', category='cardio', met=8.0)
+        ExerciseAlias.objects.create(alias='running', exercise=running)
+
+    def bulk(self, kind, workouts, **data):
+        return self.client.post(reverse(f'{kind}_bulk'), {'ids': [entry.pk for entry in workouts], **data},
+                                HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+    def assertDerivedMatchRebuild(self):
+        self.assertSummariesMatchRebuild()
+        self.assertMatchesRebuild(PersonalRecord, rebuild_personal_records, RECORD_FIELDS)
+        logged = list(ChangeLog.objects.filter(user=self.user).values_list('kind', 'object_id'))
+        self.assertEqual(len(logged), len(set(logged)))
+
+    def test_edit_moves_days_and_redoes_only_the_selected_estimates(self):
+        estimated = self.workout(days_ago=3, calories_burned=None)
+        typed = self.workout(days_ago=3, calories_burned=300)
+        untouched = self.workout(days_ago=3, calories_burned=None)
+        Exercise.objects.filter(name='Bench Press').update(met=6.0)
+
+        response = self.bulk('workout', [estimated, typed], action='edit', exercise_name='running',
+                             date=(date.today() - timedelta(days=1)).isoformat())
+        self.assertEqual(sorted(response.json()['updated']), sorted([estimated.pk, typed.pk]))
+        calories = dict(Workout.objects.values_list('pk', 'calories_burned'))
+        # 8 MET x 70 kg x 30 minutes x 3.5 / 200; the unselected estimate keeps its old MET
+        self.assertEqual(calories, {estimated.pk: 294, typed.pk: 300, untouched.pk: 147})
+        self.assertEqual([row[0] for row in self.snapshot(DailySummary, SUMMARY_FIELDS)],
+                         [untouched.date, date.today() - timedelta(days=1)])
+        self.assertDerivedMatchRebuild()
+
+    def test_delete_only_touches_the_users_entries(self):
+        mine = [self.workout(days_ago=1), self.workout(days_ago=2)]
+        theirs = Workout.objects.create(user=User.objects.create_user('bob'), exercise_name='Squat',
+                                        date=date.today())
+        response = self.bulk('workout', mine + [theirs], action='delete')
+        self.assertEqual(sorted(response.json()['deleted']), sorted(entry.pk for entry in mine))
+        self.assertEqual(list(Workout.objects.all()), [theirs])
+        self.assertEqual(DailySummary.objects.filter(user=self.user).count(), 0)
+        self.assertDerivedMatchRebuild()
+
+    def test_meal_edit_without_js_redirects_with_a_message(self):
+        meals = [Meal.objects.create(user=self.user, meal_type='lunch', food_name='Dal', calories=300,
+                                     date=date.today()) for _ in range(2)]
+        response = self.client.post(reverse('meal_bulk'), {'ids': [meal.pk for meal in meals],
+                                                           'action': 'edit', 'meal_type': 'dinner'}, follow=True)
+        self.assertContains(response, 'Updated 2 meals.')
+        self.assertEqual(set(Meal.objects.values_list('meal_type', flat=True)), {'dinner'})
+        self.assertDerivedMatchRebuild()
+
+    def test_invalid_requests_are_rejected(self):
+        workout = self.workout()
+        self.assertEqual(self.bulk('workout', [], action='delete').status_code, 400)
+        self.assertEqual(self.bulk('workout', [workout], action='edit').json(),
+                         {'errors': {'__all__': ['Fill in at least one field to change.']}})
+        self.assertEqual(self.bulk('workout', [workout], action='edit', date='2024-02-30').status_code, 400)
+        self.assertTrue(Workout.objects.filter(pk=workout.pk).exists())
+
+
+# ==================== AUTHENTICATED USER CACHE ====================
+
+@override_settings(AUTH_USER_CACHE=True)
+class UserCacheTests(TrackerTestCase):
+    def user_queries(self, name='workout_list'):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(name))
+        return response, [query['sql'] for query in queries if 'auth_user' in query['sql']]
+
+    def test_repeat_requests_skip_the_user_query(self):
+        self.assertEqual(len(self.user_queries()[1]), 1)
+        response, queries = self.user_queries()
+        self.assertEqual((response.status_code, queries), (200, []))
+
+    def test_password_changes_and_deactivation_still_log_out(self):
+        self.user_queries()
+        self.user.set_password('a-new-password')
+        with self.committed():
+            self.user.save()
+        response, _ = self.user_queries()
+        self.assertEqual(response.status_code, 302)
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+        self.client.force_login(self.user)
+        self.user_queries()
+        self.user.is_active = False
+        with self.committed():
+            self.user.save()
+        self.assertEqual(self.user_queries()[0].status_code, 302)
+
+    def test_updates_that_skip_save_wait_for_a_bump_or_the_timeout(self):
+        self.user_queries()
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.user_queries()[0].status_code, 200)
+        caching.bump_user_version(self.user.pk)
+        self.assertEqual(self.user_queries()[0].status_code, 302)
+
+        User.objects.filter(pk=self.user.pk).update(is_active=True)
+        self.client.force_login(self.user)
+        with self.settings(AUTH_USER_CACHE_SECONDS=0):
+            self.user_queries()
+            User.objects.filter(pk=self.user.pk).update(is_active=False)
+            self.assertEqual(self.user_queries()[0].status_code, 302)
+
+    def test_profiles_are_cached_until_they_change(self):
+        with self.committed():
+            profile = UserProfile.objects.create(user=self.user, weight=70)
+        self.assertEqual(users.get_profile(self.user).weight, 70)
+        with self.assertNumQueries(0):
+            cached = users.get_profile(self.user)
+        # Callers get copies
+        cached.weight = 1
+        self.assertEqual(users.get_profile(self.user).weight, 70)
+
+        profile.weight = 72
+        with self.committed():
+            profile.save()
+        self.assertEqual(users.get_profile(self.user).weight, 72)
+
+
+# ==================== EXERCISE DATA ====================
+
+class LoadExercisesTests(TrackerTestCase):
+    def load(self, *rows, force=False):
+        with tempfile.TemporaryDirectory() as root:
+            path = Path(root) / 'exercises.csv'
+            path.write_text('name,category,met,aliases\n' + ''.join(row + '\n' for row in rows))
+            output = StringIO()
+            with mock.patch('tracker.management.commands.load_exercises.enqueue') as self.enqueue:
+                call_command('load_exercises', str(path), force=force, stdout=output)
+        return output.getvalue()
+
+    def test_calories_are_recalculated_only_when_a_workouts_met_changes(self):
+        self.load('Bench Press,strength,5.0,')
+        self.enqueue.assert_not_called()
+
+        self.workout(exercise_name='Flat Bench', duration=30, calories_burned=None)
+        self.workout(exercise_name='Squat', duration=30, calories_burned=200)
+        # New exercises and the METs of unused or hand-typed ones don't matter
+        self.load('Bench Press,strength,5.0,', 'Deadlift,strength,6.0,', 'Squat,strength,5.0,')
+        self.enqueue.assert_not_called()
+        # A relink to an exercise with another MET does
+        self.load('Bench Press,strength,5.0,Flat Bench', 'Deadlift,strength,6.0,', 'Squat,strength,5.0,')
+        self.enqueue.assert_called_once_with('recalculate_calories')
+        self.load('Bench Press,strength,5.5,Flat Bench', 'Deadlift,strength,6.0,', 'Squat,strength,5.0,')
+        self.enqueue.assert_called_once_with('recalculate_calories')
+
+    def test_unchanged_files_are_skipped(self):
+        self.assertIn('Successfully loaded 1 exercises', self.load('Bench Press,strength,5.0,BP'))
+        with mock.patch('tracker.management.commands.load_exercises.Command.relink') as relink:
+            self.assertIn('up to date', self.load('Bench Press,strength,5.0,BP'))
+        relink.assert_not_called()
+        self.assertIn('Successfully loaded', self.load('Bench Press,strength,5.0,BP', force=True))
+
+    def test_exercises_of_archived_workouts_are_kept(self):
+        self.workout(days_ago=400, exercise_name='Flat Bench')
+        self.workout(days_ago=2, exercise_name='Flat Bench')
+        made_up = Exercise.objects.get(name='Flat Bench')
+        call_command('archive_entries', days=365, stdout=StringIO())
+
+        self.load('Bench Press,strength,5.0,Flat Bench')
+        self.assertEqual(Workout.objects.get().exercise.name, 'Bench Press')
+        self.assertTrue(Exercise.objects.filter(pk=made_up.pk).exists())
+        self.assertTrue(PersonalRecord.objects.filter(exercise=made_up).exists())
+
+        call_command('archive_entries', restore=True, stdout=StringIO())
+        self.assertEqual(Workout.objects.filter(exercise=made_up).count(), 1)
@@ -10,22 +10,39 @@ urlpatterns = [
     
     # Workouts
     path('workouts/', views.workout_list, name='workout_list'),
+    path('workouts/feed/', views.workout_feed, name='workout_feed'),
     path('workouts/add/', views.workout_add, name='workout_add'),
     path('workouts/delete/<int:pk>/', views.workout_delete, name='workout_delete'),
+    path('workouts/records/', views.personal_records_view, name='personal_records'),
+    path('workouts/bulk/', views.bulk_edit, {'kind': 'workout'}, name='workout_bulk'),
     
     # Meals
     path('meals/', views.meal_list, name='meal_list'),
+    path('meals/feed/', views.meal_feed, name='meal_feed'),
     path('meals/add/', views.meal_add, name='meal_add'),
     path('meals/delete/<int:pk>/', views.meal_delete, name='meal_delete'),
+    path('meals/bulk/', views.bulk_edit, {'kind': 'meal'}, name='meal_bulk'),
     
     # Profile
     path('profile/', views.profile_view, name='profile'),
+    path('export/', views.export_data, name='export_data'),
+    path('export/background/', views.export_start, name='export_start'),
     
     # Indian Foods
     path('indian-foods/', views.indian_foods_list, name='indian_foods'),
-    path('quick-add/<int:meal_id>/', views.quick_add_meal, name='quick_add_meal'),
+    path('quick-add/<int:food_id>/', views.quick_add_meal, name='quick_add_meal'),
+    path('api/search-foods/', views.search_foods_view, name='search_foods'),
     # Progress
     path('progress/', views.progress_view, name='progress'),
+    path('progress/data/', views.progress_data, name='progress_data'),
     # Recommendations
     path('recommendations/', views.recommendations_view, name='recommendations'),
+    # Batch logging & sync API
+    path('api/entries/batch/', views.batch_entries, name='batch_entries'),
+    path('api/sync/', views.sync_changes, name='sync_changes'),
+    # Background jobs
+    path('api/jobs/<int:pk>/', views.job_status, name='job_status'),
+    path('jobs/<int:pk>/download/', views.job_download, name='job_download'),
+    # Request metrics (staff only)
+    path('metrics/', views.request_metrics_view, name='request_metrics'),
 ]
\ No newline at end of file
@@ -0,0 +1,118 @@
+"""
+Process-local cache of authenticated users and their profiles.
+
+Loading request.user normally costs a query per request, and pages that
+show the profile fetch it again. Here each process keeps recently seen
+users and profiles for AUTH_USER_CACHE_SECONDS. An entry is only used
+while the user's data version (see tracker.caching) is the one it was
+loaded under; saving or deleting the user or the profile bumps that
+version, so every process drops its copy on its next request. Checking
+the version is a cache read, not a query.
+
+Session hashes are still compared on every request, so a password change
+logs other sessions out as usual. Callers get copies, never the cached
+instances themselves.
+
+Only writes that send the model signals bump the version. A user changed
+with QuerySet.update() (say, is_active=False), or a password set in the
+database behind Django's back, keeps working from the cached copy for up
+to AUTH_USER_CACHE_SECONDS in every process that has it. Call
+tracker.caching.bump_user_version(user_id) after such writes, or keep the
+timeout short; the cache is on by default whenever DEBUG is off.
+"""
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.utils.crypto import constant_time_compare
+
+from .caching import auser_version, user_version
+from .models import UserProfile
+
+# Entries kept per process before the cache is emptied and refilled
+MAX_ENTRIES = 10000
+
+_lock = threading.Lock()
+_users = {}
+_profiles = {}
+
+
+def _timeout():
+    return getattr(settings, 'AUTH_USER_CACHE_SECONDS', 60)
+
+
+def _lookup(entries, key, version):
+    """(found, value) for ``key`` if it was stored under ``version`` and has not expired"""
+    entry = entries.get(key)
+    if entry is None or entry[0] != version or entry[1] < time.monotonic():
+        return False, None
+    return True, copy.copy(entry[2])
+
+
+def _store(entries, key, version, value):
+    with _lock:
+        if len(entries) >= MAX_ENTRIES:
+            entries.clear()
+        entries[key] = (version, time.monotonic() + _timeout(), copy.copy(value))
+
+
+def _session_user(request):
+    """(user id, backend) logged in to the session, or None if there is none"""
+    user_id = request.session.get(SESSION_KEY)
+    backend = request.session.get(BACKEND_SESSION_KEY)
+    if user_id is None or backend not in settings.AUTHENTICATION_BACKENDS:
+        return None
+    return str(user_id), backend
+
+
+def _verified(request, user):
+    """The session was logged in with the user's current password"""
+    session_hash = request.session.get(HASH_SESSION_KEY)
+    return bool(session_hash) and constant_time_compare(session_hash, user.get_session_auth_hash())
+
+
+def get_user(request):
+    """
+    django.contrib.auth.get_user() through the cache. Anything unusual
+    (no session, a stale hash) falls back to Django's own implementation.
+    """
+    key = _session_user(request)
+    if key is None:
+        return auth.get_user(request)
+    version = user_version(key[0])
+    found, user = _lookup(_users, key, version)
+    if found and _verified(request, user):
+        return user
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        _store(_users, key, version, user)
+    return user
+
+
+async def aget_user(request):
+    user_id = await request.session.aget(SESSION_KEY)
+    backend = await request.session.aget(BACKEND_SESSION_KEY)
+    if user_id is None or backend not in settings.AUTHENTICATION_BACKENDS:
+        return await auth.aget_user(request)
+    key = str(user_id), backend
+    version = await auser_version(key[0])
+    found, user = _lookup(_users, key, version)
+    if found and _verified(request, user):
+        return user
+    user = await auth.aget_user(request)
+    if user.is_authenticated:
+        _store(_users, key, version, user)
+    return user
+
+
+def get_profile(user):
+    """The user's UserProfile, or None if they have none"""
+    version = user_version(user.pk)
+    found, profile = _lookup(_profiles, user.pk, version)
+    if not found:
+        profile = UserProfile.objects.filter(user=user).first()
+        _store(_profiles, user.pk, version, profile)
+    return profile
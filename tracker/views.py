@@ -1,48 +1,55 @@
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Sum
-from datetime import date, timedelta
-from .models import Workout, Meal, UserProfile
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.template.defaultfilters import pluralize
+from django.template.loader import render_to_string
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_GET, require_POST
+from datetime import date
+from functools import partial
+import json
+from .models import Workout, Meal, UserProfile, Job, PersonalRecord
 from .forms import WorkoutForm, MealForm, UserProfileForm
+from .catalog import get_catalog
+from .search import search_foods
+from .exports import KINDS, stream_export
+from .progress import DEFAULT_RANGE, RANGES, progress_series
+from .analytics import get_trends
+from .recommendations import get_recommendations
+from .pagination import InvalidCursor, keyset_page
+from .archive import entries_after
+from .caching import cached_for_user
+from .conditional import conditional_page
+from .dashboard import dashboard_context
+from .bulk import MAX_BATCH, MODELS, clean_edit, delete_entries, save_batch, update_entries
+from .sync import MAX_PAGE_SIZE, PAGE_SIZE, InvalidToken, changes_since
+from . import metrics
+from .jobs import enqueue
+
+
+def _wants_fragment(request):
+    """
+    True for add and delete requests sent by the pages' scripts, which update
+    the page themselves; plain form posts and links still get a redirect
+    """
+    return request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+
 
 # ==================== HOME & AUTH VIEWS ====================
 
+@conditional_page
 def home(request):
     """Home page - shows dashboard if logged in"""
     context = {}
     if request.user.is_authenticated:
-        # Get today's data
         today = date.today()
-        
-        # Today's workouts
-        today_workouts = Workout.objects.filter(user=request.user, date=today)
-        total_calories_burned = today_workouts.aggregate(Sum('calories_burned'))['calories_burned__sum'] or 0
-        
-        # Today's meals
-        today_meals = Meal.objects.filter(user=request.user, date=today)
-        total_calories_consumed = today_meals.aggregate(Sum('calories'))['calories__sum'] or 0
-        total_protein = today_meals.aggregate(Sum('protein'))['protein__sum'] or 0
-        total_carbs = today_meals.aggregate(Sum('carbs'))['carbs__sum'] or 0
-        total_fats = today_meals.aggregate(Sum('fats'))['fats__sum'] or 0
-        
-        # This week's stats
-        week_ago = today - timedelta(days=7)
-        week_workouts = Workout.objects.filter(user=request.user, date__gte=week_ago).count()
-        week_meals = Meal.objects.filter(user=request.user, date__gte=week_ago).count()
-        
-        context = {
-            'today_workouts': today_workouts,
-            'today_meals': today_meals,
-            'total_calories_burned': total_calories_burned,
-            'total_calories_consumed': total_calories_consumed,
-            'total_protein': round(total_protein, 1),
-            'total_carbs': round(total_carbs, 1),
-            'total_fats': round(total_fats, 1),
-            'week_workouts': week_workouts,
-            'week_meals': week_meals,
-        }
+        context = cached_for_user(
+            request.user.pk, 'dashboard', lambda: dashboard_context(request.user, today), today
+        )
     
     return render(request, 'tracker/home.html', context)
 
@@ -104,11 +111,38 @@ def logout_view(request):
 
 # ==================== WORKOUT VIEWS ====================
 
+def _workout_page(request):
+    """One cached page of the user's workouts"""
+    cursor = request.GET.get('cursor') or ''
+    return cached_for_user(
+        request.user.pk, 'workouts',
+        lambda: keyset_page(
+            Workout.objects.filter(user=request.user), cursor,
+            archive=partial(entries_after, request.user.pk, 'workout'),
+        ), cursor
+    )
+
+
 @login_required
+@conditional_page
 def workout_list(request):
-    """View all workouts"""
-    workouts = Workout.objects.filter(user=request.user)
-    return render(request, 'tracker/workout_list.html', {'workouts': workouts})
+    """View workouts, one page at a time"""
+    try:
+        page = _workout_page(request)
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor')
+    return render(request, 'tracker/workout_list.html', {'workouts': page.items, 'next_cursor': page.next_cursor})
+
+
+@login_required
+def workout_feed(request):
+    """JSON feed of workout cards for infinite scroll"""
+    try:
+        page = _workout_page(request)
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+    html = render_to_string('tracker/_workout_cards.html', {'workouts': page.items}, request=request)
+    return JsonResponse({'html': html, 'next_cursor': page.next_cursor})
 
 
 @login_required
@@ -120,8 +154,12 @@ def workout_add(request):
             workout = form.save(commit=False)
             workout.user = request.user
             workout.save()
+            if _wants_fragment(request):
+                return render(request, 'tracker/_workout_card.html', {'workout': workout}, status=201)
             messages.success(request, 'Workout added successfully! 💪')
             return redirect('workout_list')
+        if _wants_fragment(request):
+            return JsonResponse({'errors': form.errors.get_json_data()}, status=400)
     else:
         form = WorkoutForm(initial={'date': date.today()})
     
@@ -133,17 +171,55 @@ def workout_delete(request, pk):
     """Delete workout"""
     workout = get_object_or_404(Workout, pk=pk, user=request.user)
     workout.delete()
+    if _wants_fragment(request):
+        return HttpResponse(status=204)
     messages.success(request, 'Workout deleted successfully!')
     return redirect('workout_list')
 
 
+@login_required
+def personal_records_view(request):
+    """Best lifts and totals per exercise, kept up to date on every workout write"""
+    records = PersonalRecord.objects.filter(user=request.user).select_related('exercise').order_by('exercise__name')
+    return render(request, 'tracker/personal_records.html', {'records': records})
+
+
 # ==================== MEAL VIEWS ====================
 
+def _meal_page(request):
+    """One cached page of the user's meals"""
+    cursor = request.GET.get('cursor') or ''
+    return cached_for_user(
+        request.user.pk, 'meals',
+        lambda: keyset_page(
+            Meal.objects.filter(user=request.user), cursor,
+            archive=partial(entries_after, request.user.pk, 'meal'),
+        ), cursor
+    )
+
+
 @login_required
+@conditional_page
 def meal_list(request):
-    """View all meals"""
-    meals = Meal.objects.filter(user=request.user)
-    return render(request, 'tracker/meal_list.html', {'meals': meals})
+    """View meals, one page at a time"""
+    try:
+        page = _meal_page(request)
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor')
+    return render(request, 'tracker/meal_list.html', {
+        'meals': page.items, 'next_cursor': page.next_cursor, 'meal_types': Meal.MEAL_TYPE_CHOICES,
+    })
+
+
+@login_required
+def meal_feed(request):
+    """JSON feed of meal cards for infinite scroll"""
+    try:
+        page = _meal_page(request)
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+    html = render_to_string('tracker/_meal_cards.html', {'meals': page.items}, request=request)
+    return JsonResponse({'html': html, 'next_cursor': page.next_cursor})
 
 
 @login_required
@@ -155,8 +231,12 @@ def meal_add(request):
             meal = form.save(commit=False)
             meal.user = request.user
             meal.save()
+            if _wants_fragment(request):
+                return render(request, 'tracker/_meal_card.html', {'meal': meal}, status=201)
             messages.success(request, 'Meal logged successfully! 🍎')
             return redirect('meal_list')
+        if _wants_fragment(request):
+            return JsonResponse({'errors': form.errors.get_json_data()}, status=400)
     else:
         form = MealForm(initial={'date': date.today()})
     
@@ -168,10 +248,59 @@ def meal_delete(request, pk):
     """Delete meal"""
     meal = get_object_or_404(Meal, pk=pk, user=request.user)
     meal.delete()
+    if _wants_fragment(request):
+        return HttpResponse(status=204)
     messages.success(request, 'Meal deleted successfully!')
     return redirect('meal_list')
 
 
+# ==================== BULK EDIT ====================
+
+@login_required
+@require_POST
+def bulk_edit(request, kind):
+    """Delete or edit the workouts or meals selected on a list page in one request"""
+    list_url = f'{kind}_list'
+    try:
+        pks = sorted({int(pk) for pk in request.POST.getlist('ids')})
+    except ValueError:
+        return HttpResponseBadRequest('Invalid ids')
+    
+    errors = {}
+    if not pks:
+        errors['ids'] = ['Select at least one entry.']
+    elif len(pks) > MAX_BATCH:
+        errors['ids'] = [f'Select at most {MAX_BATCH} entries at a time.']
+    action = request.POST.get('action')
+    if action == 'edit':
+        changes, field_errors = clean_edit(kind, request.POST)
+        errors.update(field_errors)
+        if not changes and not errors:
+            errors['__all__'] = ['Fill in at least one field to change.']
+    elif action != 'delete':
+        errors['action'] = ['Must be delete or edit.']
+    if errors:
+        if _wants_fragment(request):
+            return JsonResponse({'errors': errors}, status=400)
+        for field_messages in errors.values():
+            messages.error(request, ' '.join(field_messages))
+        return redirect(list_url)
+    
+    if action == 'delete':
+        ids = delete_entries(MODELS[kind], request.user.pk, pks)
+        if _wants_fragment(request):
+            return JsonResponse({'deleted': ids})
+        messages.success(request, f'Deleted {len(ids)} {kind}{pluralize(len(ids))}.')
+    else:
+        ids = update_entries(MODELS[kind], request.user.pk, pks, changes)
+        if _wants_fragment(request):
+            entries = MODELS[kind].objects.filter(pk__in=ids)
+            html = render_to_string(f'tracker/_{kind}_cards.html', {f'{kind}s': entries}, request=request)
+            return JsonResponse({'updated': ids, 'html': html})
+        messages.success(request, f'Updated {len(ids)} {kind}{pluralize(len(ids))}.')
+    return redirect(list_url)
+
+
 # ==================== PROFILE VIEW ====================
 
 @login_required
@@ -183,207 +312,261 @@ def profile_view(request):
         form = UserProfileForm(request.POST, instance=profile)
         if form.is_valid():
             form.save()
+            if 'weight' in form.changed_data:
+                # Estimated workout calories depend on body weight
+                enqueue('recalculate_calories', user=request.user)
             messages.success(request, 'Profile updated successfully!')
             return redirect('profile')
     else:
         form = UserProfileForm(instance=profile)
     
     return render(request, 'tracker/profile.html', {'form': form, 'profile': profile})
+
+
 @login_required
-def quick_add_meal(request, meal_id):
-    """Quick add Indian food template"""
-    template_meal = get_object_or_404(Meal, pk=meal_id)
-    
-    # Create a copy for current user
-    Meal.objects.create(
+def export_data(request):
+    """Download workout, meal and profile history as CSV or NDJSON"""
+    file_format = request.GET.get('format', 'ndjson')
+    kind = request.GET.get('kind', 'all')
+    kinds = KINDS if kind == 'all' else [kind]
+    try:
+        start = parse_date(request.GET['start']) if request.GET.get('start') else None
+        end = parse_date(request.GET['end']) if request.GET.get('end') else None
+    except ValueError:
+        # Well-formed but impossible, such as 2024-02-30
+        return HttpResponseBadRequest('Dates must be YYYY-MM-DD')
+    
+    if file_format not in ('csv', 'ndjson') or not set(kinds) <= set(KINDS):
+        return HttpResponseBadRequest('Unknown format or kind')
+    if file_format == 'csv' and len(kinds) != 1:
+        return HttpResponseBadRequest('CSV exports need a single kind')
+    if (request.GET.get('start') and start is None) or (request.GET.get('end') and end is None):
+        return HttpResponseBadRequest('Dates must be YYYY-MM-DD')
+    
+    # Staff can dump every user's rows at once
+    user = request.user
+    if request.GET.get('all_users'):
+        if not request.user.is_staff:
+            return HttpResponseForbidden()
+        user = None
+    
+    response = StreamingHttpResponse(
+        stream_export(file_format, kinds, user, start, end),
+        content_type='text/csv' if file_format == 'csv' else 'application/x-ndjson',
+    )
+    filename = f"fitness-{kind}-{date.today().isoformat()}.{file_format}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@login_required
+@require_POST
+def export_start(request):
+    """Queue a full NDJSON export as a background job; the page polls job_status"""
+    export_job = enqueue('export', user=request.user, file_format='ndjson')
+    return JsonResponse({
+        'id': export_job.pk,
+        'status': export_job.status,
+        'status_url': reverse('job_status', args=[export_job.pk]),
+    }, status=202)
+
+
+@login_required
+def quick_add_meal(request, food_id):
+    """Quick add a food from the catalog"""
+    food = get_catalog().get(food_id)
+    if food is None:
+        raise Http404('No such food')
+    
+    # Create a meal for current user
+    meal = Meal.objects.create(
         user=request.user,
-        food_name=template_meal.food_name,
-        meal_type=template_meal.meal_type,
-        calories=template_meal.calories,
-        protein=template_meal.protein,
-        carbs=template_meal.carbs,
-        fats=template_meal.fats,
-        quantity=template_meal.quantity,
+        food=food,
+        food_name=food.name,
+        meal_type=food.meal_type,
+        calories=food.calories,
+        protein=food.protein,
+        carbs=food.carbs,
+        fats=food.fats,
+        quantity=food.quantity,
         date=date.today()
     )
     
-    messages.success(request, f'{template_meal.food_name} added! 🍽️')
+    if _wants_fragment(request):
+        return render(request, 'tracker/_meal_card.html', {'meal': meal}, status=201)
+    messages.success(request, f'{food.name} added! 🍽️')
     return redirect('meal_list')
 
 
 @login_required
 def indian_foods_list(request):
     """Show Indian food templates for quick adding"""
-    from django.contrib.auth.models import User
-    system_user = User.objects.get(username='system_foods')
-    indian_foods = Meal.objects.filter(user=system_user).order_by('meal_type', 'food_name')
-    
-    # Group by meal type
-    breakfast_foods = indian_foods.filter(meal_type='breakfast')
-    lunch_foods = indian_foods.filter(meal_type='lunch')
-    snack_foods = indian_foods.filter(meal_type='snack')
+    catalog = get_catalog()
     
     context = {
-        'breakfast_foods': breakfast_foods,
-        'lunch_foods': lunch_foods,
-        'snack_foods': snack_foods,
+        'breakfast_foods': catalog.section('breakfast'),
+        'lunch_foods': catalog.section('lunch'),
+        'snack_foods': catalog.section('snack'),
     }
     
     return render(request, 'tracker/indian_foods.html', context)
 @login_required
+def search_foods_view(request):
+    """Autocomplete search over the food catalog and the user's past meals"""
+    query = request.GET.get('q', '').strip()
+    foods = search_foods(request.user.pk, query) if query else []
+    return JsonResponse({'foods': foods})
+
+
+@login_required
+@conditional_page
 def progress_view(request):
-    """Show weekly/monthly progress with charts"""
-    from datetime import timedelta
-    from django.db.models import Sum, Count
-    from django.db.models.functions import TruncDate
+    """Show progress charts over a selectable range"""
+    range_key = request.GET.get('range', DEFAULT_RANGE)
+    if range_key not in RANGES:
+        range_key = DEFAULT_RANGE
     
-    # Get last 7 days data
     today = date.today()
-    week_ago = today - timedelta(days=7)
-    
-    # Workouts by day
-    workouts_by_day = Workout.objects.filter(
-        user=request.user,
-        date__gte=week_ago
-    ).values('date').annotate(
-        total_calories=Sum('calories_burned'),
-        count=Count('id')
-    ).order_by('date')
-    
-    # Meals by day
-    meals_by_day = Meal.objects.filter(
-        user=request.user,
-        date__gte=week_ago
-    ).values('date').annotate(
-        total_calories=Sum('calories'),
-        total_protein=Sum('protein'),
-        total_carbs=Sum('carbs'),
-        total_fats=Sum('fats'),
-        count=Count('id')
-    ).order_by('date')
-    
-    # Format data for Chart.js
-    dates = [(week_ago + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(8)]
-    workout_calories = [0] * 8
-    meal_calories = [0] * 8
-    protein_data = [0] * 8
-    
-    for workout in workouts_by_day:
-        date_str = workout['date'].strftime('%Y-%m-%d')
-        if date_str in dates:
-            idx = dates.index(date_str)
-            workout_calories[idx] = workout['total_calories'] or 0
-    
-    for meal in meals_by_day:
-        date_str = meal['date'].strftime('%Y-%m-%d')
-        if date_str in dates:
-            idx = dates.index(date_str)
-            meal_calories[idx] = meal['total_calories'] or 0
-            protein_data[idx] = round(meal['total_protein'] or 0, 1)
+    series = cached_for_user(
+        request.user.pk, 'progress', lambda: progress_series(request.user, range_key, today), range_key, today
+    )
     
     context = {
-        'dates': dates,
-        'workout_calories': workout_calories,
-        'meal_calories': meal_calories,
-        'protein_data': protein_data,
+        'series': series,
+        'ranges': [('7', '7 Days'), ('30', '30 Days'), ('90', '90 Days'), ('365', '1 Year'), ('all', 'All Time')],
+        'trends': get_trends(request.user),
     }
     
     return render(request, 'tracker/progress.html', context)
+
+
 @login_required
+def progress_data(request):
+    """Chart.js data for one progress range"""
+    range_key = request.GET.get('range', DEFAULT_RANGE)
+    if range_key not in RANGES:
+        return JsonResponse({'error': 'Unknown range'}, status=400)
+    today = date.today()
+    return JsonResponse(cached_for_user(
+        request.user.pk, 'progress', lambda: progress_series(request.user, range_key, today), range_key, today
+    ))
+
+
+@login_required
+@conditional_page
 def recommendations_view(request):
     """AI-powered recommendations based on user data"""
-    from datetime import timedelta
-    from django.db.models import Avg, Sum
-    
-    # Get user profile
-    profile = UserProfile.objects.filter(user=request.user).first()
-    
-    # Get last 7 days data
-    today = date.today()
-    week_ago = today - timedelta(days=7)
-    
-    # Calculate averages
-    avg_calories_burned = Workout.objects.filter(
-        user=request.user, date__gte=week_ago
-    ).aggregate(Avg('calories_burned'))['calories_burned__avg'] or 0
-    
-    avg_calories_consumed = Meal.objects.filter(
-        user=request.user, date__gte=week_ago
-    ).aggregate(Avg('calories'))['calories__avg'] or 0
-    
-    avg_protein = Meal.objects.filter(
-        user=request.user, date__gte=week_ago
-    ).aggregate(Avg('protein'))['protein__avg'] or 0
-    
-    workout_count = Workout.objects.filter(
-        user=request.user, date__gte=week_ago
-    ).count()
-    
-    # Generate recommendations
-    recommendations = []
-    
-    # Calorie recommendations
-    if profile and profile.fitness_goal == 'lose_weight':
-        target_deficit = 500
-        if avg_calories_consumed - avg_calories_burned > target_deficit:
-            recommendations.append({
-                'type': 'warning',
-                'icon': 'fa-fire',
-                'title': 'Calorie Deficit Needed',
-                'message': f'For weight loss, aim for 500 calorie deficit. Currently: {round(avg_calories_consumed - avg_calories_burned)} calories. Reduce intake by {round(avg_calories_consumed - avg_calories_burned - target_deficit)} calories.',
-                'action': 'Reduce portion sizes or increase cardio'
-            })
-    
-    elif profile and profile.fitness_goal == 'gain_muscle':
-        target_surplus = 300
-        if avg_calories_consumed - avg_calories_burned < target_surplus:
-            recommendations.append({
-                'type': 'info',
-                'icon': 'fa-dumbbell',
-                'title': 'Calorie Surplus Needed',
-                'message': f'For muscle gain, aim for 300 calorie surplus. Currently: {round(avg_calories_consumed - avg_calories_burned)} calories. Increase intake by {round(target_surplus - (avg_calories_consumed - avg_calories_burned))} calories.',
-                'action': 'Add protein-rich meals like eggs, chicken, paneer'
-            })
-    
-    # Protein recommendations
-    if profile and profile.weight:
-        target_protein = profile.weight * 1.6  # 1.6g per kg bodyweight
-        if avg_protein < target_protein:
-            recommendations.append({
-                'type': 'warning',
-                'icon': 'fa-egg',
-                'title': 'Low Protein Intake',
-                'message': f'Target: {round(target_protein)}g/day. Current: {round(avg_protein)}g/day. Increase by {round(target_protein - avg_protein)}g.',
-                'action': 'Add: Chicken breast (31g), Paneer (18g), Eggs (6g each)'
-            })
-    
-    # Workout frequency
-    if workout_count < 3:
-        recommendations.append({
-            'type': 'info',
-            'icon': 'fa-running',
-            'title': 'Increase Workout Frequency',
-            'message': f'You worked out {workout_count} times this week. Aim for at least 3-4 sessions for better results.',
-            'action': 'Schedule 3-4 workout days per week'
-        })
-    
-    # If doing well
-    if not recommendations:
-        recommendations.append({
-            'type': 'success',
-            'icon': 'fa-trophy',
-            'title': 'Great Job! Keep It Up! 🎉',
-            'message': 'Your nutrition and workout routine look excellent! You\'re on track to reach your goals.',
-            'action': 'Maintain current habits and stay consistent'
-        })
-    
-    context = {
-        'recommendations': recommendations,
-        'avg_calories_burned': round(avg_calories_burned),
-        'avg_calories_consumed': round(avg_calories_consumed),
-        'avg_protein': round(avg_protein, 1),
-        'workout_count': workout_count,
-        'profile': profile
+    return render(request, 'tracker/recommendations.html', get_recommendations(request.user))
+
+
+# ==================== BACKGROUND JOBS ====================
+
+def _visible_job(request, pk):
+    """The job if the user owns it (staff see every job), else 404"""
+    jobs = Job.objects.all() if request.user.is_staff else Job.objects.filter(user=request.user)
+    return get_object_or_404(jobs, pk=pk)
+
+
+@login_required
+def job_status(request, pk):
+    """Progress of a background job, polled by the UI"""
+    job = _visible_job(request, pk)
+    data = {
+        'id': job.pk,
+        'name': job.name,
+        'status': job.status,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
     }
-    
-    return render(request, 'tracker/recommendations.html', context)
\ No newline at end of file
+    if job.status == 'failed':
+        data['error'] = job.error.strip().splitlines()[-1] if job.error.strip() else ''
+    if job.status == 'succeeded':
+        data['result'] = {key: value for key, value in (job.result or {}).items() if key != 'path'}
+        if job.name == 'export':
+            data['download_url'] = reverse('job_download', args=[job.pk])
+    return JsonResponse(data)
+
+
+@login_required
+def job_download(request, pk):
+    """Download the file written by a finished export job"""
+    job = _visible_job(request, pk)
+    if job.name != 'export' or job.status != 'succeeded':
+        raise Http404('No finished export')
+    try:
+        return FileResponse(open(job.result['path'], 'rb'), as_attachment=True, filename=job.result['filename'])
+    except (KeyError, TypeError, OSError):
+        raise Http404('Export file is no longer available')
+
+
+# ==================== BATCH API ====================
+
+@require_POST
+def batch_entries(request):
+    """
+    Log many workouts and meals in one JSON request, e.g. from an offline
+    mobile client. Body: {"entries": [{"kind": "workout"|"meal", "client_id": ..., <form fields>}, ...]}
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    
+    try:
+        payload = json.loads(request.body)
+    except (UnicodeDecodeError, ValueError):
+        return JsonResponse({'error': 'Body must be JSON'}, status=400)
+    items = payload.get('entries') if isinstance(payload, dict) else payload
+    if not isinstance(items, list):
+        return JsonResponse({'error': 'Expected a list of entries'}, status=400)
+    if len(items) > MAX_BATCH:
+        return JsonResponse({'error': f'At most {MAX_BATCH} entries per request'}, status=413)
+    
+    results = save_batch(request.user.pk, items)
+    counts = {status: 0 for status in ('created', 'duplicate', 'invalid')}
+    for result in results:
+        counts[result['status']] += 1
+    return JsonResponse({**counts, 'results': results})
+
+
+@require_GET
+def sync_changes(request):
+    """
+    Workouts and meals created, updated or deleted since ``?since=<token>``.
+    Clients keep requesting with the returned ``next`` token while ``has_more`` is true.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    
+    try:
+        limit = min(int(request.GET.get('limit', PAGE_SIZE)), MAX_PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({'error': 'limit must be a number'}, status=400)
+    if limit < 1:
+        return JsonResponse({'error': 'limit must be positive'}, status=400)
+    
+    try:
+        page = changes_since(request.user.pk, request.GET.get('since'), limit)
+    except InvalidToken:
+        return JsonResponse({'error': 'Invalid sync token'}, status=400)
+    return JsonResponse(page)
+
+
+# ==================== REQUEST METRICS ====================
+
+@login_required
+def request_metrics_view(request):
+    """Staff-only p50/p95/p99 request timings per URL name, for this process"""
+    if not request.user.is_staff:
+        return HttpResponseForbidden()
+    
+    rows = metrics.summary()
+    if request.GET.get('format') == 'json':
+        return JsonResponse({'enabled': settings.REQUEST_METRICS_ENABLED, 'views': rows})
+    
+    return render(request, 'tracker/request_metrics.html', {
+        'rows': rows,
+        'enabled': settings.REQUEST_METRICS_ENABLED,
+        'slow_ms': settings.REQUEST_METRICS_SLOW_MS,
+    })